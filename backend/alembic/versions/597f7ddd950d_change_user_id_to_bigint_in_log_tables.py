@@ -18,16 +18,59 @@ branch_labels: Union[str, Sequence[str], None] = None
 depends_on: Union[str, Sequence[str], None] = None
 
 
+BACKFILL_BATCH_SIZE = 10000
+
+
+def _swap_user_id_to_bigint(table_name: str) -> None:
+    """
+    Change ``user_id`` of a log table to BIGINT without rewriting the table
+    under an ACCESS EXCLUSIVE lock:
+    
+    1. Add a nullable ``user_id_new BIGINT`` (catalog-only change).
+    2. Install a trigger that keeps ``user_id_new`` in sync for rows written
+       while the backfill runs.
+    3. Backfill in ctid-bounded batches, each committed on its own.
+    4. Drop the old column and rename the new one in a short transaction.
+    """
+    connection = op.get_bind()
+    op.execute(f"ALTER TABLE {table_name} ADD COLUMN user_id_new BIGINT")
+    op.execute(f"""
+        CREATE OR REPLACE FUNCTION {table_name}_user_id_dual_write() RETURNS trigger AS $$
+        BEGIN
+            NEW.user_id_new := NEW.user_id;
+            RETURN NEW;
+        END;
+        $$ LANGUAGE plpgsql
+    """)
+    op.execute(f"""
+        CREATE TRIGGER {table_name}_user_id_dual_write
+        BEFORE INSERT OR UPDATE ON {table_name}
+        FOR EACH ROW EXECUTE FUNCTION {table_name}_user_id_dual_write()
+    """)
+    
+    with op.get_context().autocommit_block():
+        while True:
+            result = connection.execute(sa.text(
+                f"UPDATE {table_name} SET user_id_new = user_id::bigint "
+                f"WHERE ctid = ANY(ARRAY(SELECT ctid FROM {table_name} "
+                f"WHERE user_id_new IS NULL AND user_id IS NOT NULL "
+                f"LIMIT {BACKFILL_BATCH_SIZE}))"
+            ))
+            if result.rowcount == 0:
+                break
+    
+    op.execute(f"LOCK TABLE {table_name} IN ACCESS EXCLUSIVE MODE")
+    op.execute(f"DROP TRIGGER {table_name}_user_id_dual_write ON {table_name}")
+    op.execute(f"DROP FUNCTION {table_name}_user_id_dual_write()")
+    op.execute(f"ALTER TABLE {table_name} DROP COLUMN user_id")
+    op.execute(f"ALTER TABLE {table_name} RENAME COLUMN user_id_new TO user_id")
+    op.execute(f"COMMENT ON COLUMN {table_name}.user_id IS '用户ID'")
+
+
 def upgrade() -> None:
-    # Change user_id from INTEGER to BIGINT in log tables
-    op.alter_column('sys_login_log', 'user_id',
-                    existing_type=sa.Integer(),
-                    type_=sa.BigInteger(),
-                    existing_nullable=True)
-    op.alter_column('sys_opt_log', 'user_id',
-                    existing_type=sa.Integer(),
-                    type_=sa.BigInteger(),
-                    existing_nullable=True)
+    # Change user_id from INTEGER to BIGINT in log tables (add/backfill/swap)
+    _swap_user_id_to_bigint('sys_login_log')
+    _swap_user_id_to_bigint('sys_opt_log')
 
 
 def downgrade() -> None:
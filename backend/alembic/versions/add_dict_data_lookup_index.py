@@ -0,0 +1,33 @@
+"""replace dict_data type index with covering lookup index
+
+Revision ID: add_dict_data_lookup_index
+Revises: add_user_menu_keyset_indexes
+Create Date: 2026-10-16 12:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'add_dict_data_lookup_index'
+down_revision: Union[str, None] = 'add_user_menu_keyset_indexes'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Covering index for "enabled entries of type X in tenant Y ordered by sort":
+    # served by an index-only scan without a separate sort step. It leads with
+    # tenant_id, so the single-column dict_type_id index is dropped once it
+    # exists. CONCURRENTLY cannot run inside a transaction block.
+    with op.get_context().autocommit_block():
+        op.create_index('ix_dict_data_lookup', 'dict_data', ['tenant_id', 'dict_type_id', 'status', 'sort'], unique=False, postgresql_include=['label', 'value', 'color', 'icon'], postgresql_concurrently=True)
+        op.drop_index('ix_dict_data_dict_type_id', table_name='dict_data', postgresql_concurrently=True)
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.create_index('ix_dict_data_dict_type_id', 'dict_data', ['dict_type_id'], unique=False, postgresql_concurrently=True)
+        op.drop_index('ix_dict_data_lookup', table_name='dict_data', postgresql_concurrently=True)
@@ -38,10 +38,6 @@ def upgrade() -> None:
     sa.PrimaryKeyConstraint('id'),
     comment='字典类型表'
     )
-    op.create_index(op.f('ix_dict_types_code'), 'dict_types', ['code'], unique=False)
-    op.create_index(op.f('ix_dict_types_tenant_id'), 'dict_types', ['tenant_id'], unique=False)
-    # Create unique index for code + tenant_id combination
-    op.create_index('uk_dict_types_code_tenant', 'dict_types', ['code', 'tenant_id'], unique=True)
     
     # Create dict_data table
     op.create_table('dict_data',
@@ -66,19 +62,28 @@ def upgrade() -> None:
     sa.PrimaryKeyConstraint('id'),
     comment='字典数据表'
     )
-    op.create_index(op.f('ix_dict_data_dict_type_id'), 'dict_data', ['dict_type_id'], unique=False)
-    op.create_index(op.f('ix_dict_data_tenant_id'), 'dict_data', ['tenant_id'], unique=False)
-    # Create unique index for value + dict_type_id combination
-    op.create_index('uk_dict_data_value_type', 'dict_data', ['value', 'dict_type_id'], unique=True)
+    
+    # Build indexes with CREATE INDEX CONCURRENTLY so writes are not blocked while
+    # they build. CONCURRENTLY cannot run inside a transaction block.
+    with op.get_context().autocommit_block():
+        op.create_index(op.f('ix_dict_types_code'), 'dict_types', ['code'], unique=False, postgresql_concurrently=True)
+        op.create_index(op.f('ix_dict_types_tenant_id'), 'dict_types', ['tenant_id'], unique=False, postgresql_concurrently=True)
+        # Create unique index for code + tenant_id combination
+        op.create_index('uk_dict_types_code_tenant', 'dict_types', ['code', 'tenant_id'], unique=True, postgresql_concurrently=True)
+        
+        op.create_index(op.f('ix_dict_data_dict_type_id'), 'dict_data', ['dict_type_id'], unique=False, postgresql_concurrently=True)
+        op.create_index(op.f('ix_dict_data_tenant_id'), 'dict_data', ['tenant_id'], unique=False, postgresql_concurrently=True)
+        # Create unique index for value + dict_type_id combination
+        op.create_index('uk_dict_data_value_type', 'dict_data', ['value', 'dict_type_id'], unique=True, postgresql_concurrently=True)
 
 
 def downgrade() -> None:
-    op.drop_index('uk_dict_data_value_type', table_name='dict_data')
-    op.drop_index(op.f('ix_dict_data_tenant_id'), table_name='dict_data')
-    op.drop_index(op.f('ix_dict_data_dict_type_id'), table_name='dict_data')
+    with op.get_context().autocommit_block():
+        op.drop_index('uk_dict_data_value_type', table_name='dict_data', postgresql_concurrently=True)
+        op.drop_index(op.f('ix_dict_data_tenant_id'), table_name='dict_data', postgresql_concurrently=True)
+        op.drop_index(op.f('ix_dict_data_dict_type_id'), table_name='dict_data', postgresql_concurrently=True)
+        op.drop_index('uk_dict_types_code_tenant', table_name='dict_types', postgresql_concurrently=True)
+        op.drop_index(op.f('ix_dict_types_tenant_id'), table_name='dict_types', postgresql_concurrently=True)
+        op.drop_index(op.f('ix_dict_types_code'), table_name='dict_types', postgresql_concurrently=True)
     op.drop_table('dict_data')
-    op.drop_index('uk_dict_types_code_tenant', table_name='dict_types')
-    op.drop_index(op.f('ix_dict_types_tenant_id'), table_name='dict_types')
-    op.drop_index(op.f('ix_dict_types_code'), table_name='dict_types')
     op.drop_table('dict_types')
-
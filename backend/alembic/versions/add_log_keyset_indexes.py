@@ -0,0 +1,33 @@
+"""add keyset pagination indexes to log tables
+
+Revision ID: add_log_keyset_indexes
+Revises: add_dict_tables
+Create Date: 2026-10-16 10:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'add_log_keyset_indexes'
+down_revision: Union[str, None] = 'add_dict_tables'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # (tenant_id, time, id) serves both the newest-first listing and the
+    # "(time, id) < cursor" seek of the log endpoints; a btree is scanned
+    # backwards for the DESC order. CONCURRENTLY cannot run inside a
+    # transaction block.
+    with op.get_context().autocommit_block():
+        op.create_index('ix_sys_login_log_keyset', 'sys_login_log', ['tenant_id', 'login_time', 'id'], unique=False, postgresql_concurrently=True)
+        op.create_index('ix_sys_opt_log_keyset', 'sys_opt_log', ['tenant_id', 'created_at', 'id'], unique=False, postgresql_concurrently=True)
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_sys_opt_log_keyset', table_name='sys_opt_log', postgresql_concurrently=True)
+        op.drop_index('ix_sys_login_log_keyset', table_name='sys_login_log', postgresql_concurrently=True)
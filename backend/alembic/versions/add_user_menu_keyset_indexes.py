@@ -0,0 +1,32 @@
+"""add keyset pagination indexes to users and menus
+
+Revision ID: add_user_menu_keyset_indexes
+Revises: add_log_keyset_indexes
+Create Date: 2026-10-16 11:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'add_user_menu_keyset_indexes'
+down_revision: Union[str, None] = 'add_log_keyset_indexes'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Users are listed newest first by (created_at, id), menus by (sort, id);
+    # the cursor seeks of both lists run on these. CONCURRENTLY cannot run
+    # inside a transaction block.
+    with op.get_context().autocommit_block():
+        op.create_index('ix_users_keyset', 'users', ['tenant_id', 'created_at', 'id'], unique=False, postgresql_concurrently=True)
+        op.create_index('ix_menus_keyset', 'menus', ['tenant_id', 'sort', 'id'], unique=False, postgresql_concurrently=True)
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_menus_keyset', table_name='menus', postgresql_concurrently=True)
+        op.drop_index('ix_users_keyset', table_name='users', postgresql_concurrently=True)
@@ -10,6 +10,8 @@ from typing import Sequence, Union
 from alembic import op
 import sqlalchemy as sa
 
+from app.utils.migration import get_multi_columns_cached, invalidate_table
+
 
 # revision identifiers, used by Alembic.
 revision: str = 'change_all_ids_to_varchar'
@@ -18,6 +20,199 @@ branch_labels: Union[str, Sequence[str], None] = None
 depends_on: Union[str, Sequence[str], None] = None
 
 
+def _group_by_table(fields):
+    """Group (table, column) pairs by table, keeping first-seen order."""
+    columns_by_table = {}
+    for table_name, column_name in fields:
+        columns_by_table.setdefault(table_name, []).append(column_name)
+    return columns_by_table
+
+
+def _alter_columns_sql(table_name, column_names, type_sql, cast):
+    """Build one ALTER TABLE statement changing the type of several columns."""
+    clauses = ", ".join(
+        f"ALTER COLUMN {column_name} TYPE {type_sql} USING {column_name}::{cast}"
+        for column_name in column_names
+    )
+    return f"ALTER TABLE {table_name} {clauses}"
+
+
+def _reflect_columns(table_names):
+    """Reflect the column names of the given tables with one bulk query."""
+    return get_multi_columns_cached(op.get_bind(), table_names)
+
+
+# Log tables can be very large: they are migrated with add-backfill-swap so the
+# table is never rewritten under an ACCESS EXCLUSIVE lock
+LARGE_TABLES = {'sys_login_log', 'sys_opt_log'}
+BACKFILL_BATCH_SIZE = 10000
+
+
+def _dependent_indexes(table_name, column_names):
+    """
+    Return ``(name, definition)`` of the non-constraint indexes of a table that
+    reference any of the given columns, so they can be rebuilt after a swap.
+    """
+    return op.get_bind().execute(sa.text(
+        "SELECT DISTINCT i.relname, pg_get_indexdef(x.indexrelid) "
+        "FROM pg_index x "
+        "JOIN pg_class i ON i.oid = x.indexrelid "
+        "JOIN pg_attribute a ON a.attrelid = x.indrelid AND a.attnum = ANY(x.indkey) "
+        "WHERE x.indrelid = CAST(:table_name AS regclass) "
+        "AND NOT x.indisprimary "
+        "AND a.attname = ANY(:column_names) "
+        "AND NOT EXISTS (SELECT 1 FROM pg_constraint c WHERE c.conindid = x.indexrelid)"
+    ), {"table_name": table_name, "column_names": list(column_names)}).all()
+
+
+def _dependent_constraints(table_name, column_names):
+    """
+    Return ``(name, definition)`` of the constraints of a table, other than the
+    primary key and NOT NULL, that reference any of the given columns.
+    """
+    return op.get_bind().execute(sa.text(
+        "SELECT DISTINCT c.conname, pg_get_constraintdef(c.oid) "
+        "FROM pg_constraint c "
+        "JOIN pg_attribute a ON a.attrelid = c.conrelid AND a.attnum = ANY(c.conkey) "
+        "WHERE c.conrelid = CAST(:table_name AS regclass) "
+        "AND c.contype NOT IN ('p', 'n') "
+        "AND a.attname = ANY(:column_names)"
+    ), {"table_name": table_name, "column_names": list(column_names)}).all()
+
+
+def _column_comments(table_name, column_names):
+    """Return ``{column: comment}`` of the given columns that have a comment."""
+    rows = op.get_bind().execute(sa.text(
+        "SELECT a.attname, col_description(a.attrelid, a.attnum) "
+        "FROM pg_attribute a "
+        "WHERE a.attrelid = CAST(:table_name AS regclass) "
+        "AND a.attname = ANY(:column_names)"
+    ), {"table_name": table_name, "column_names": list(column_names)}).all()
+    return {column_name: comment for column_name, comment in rows if comment is not None}
+
+
+def _comment_literal(comment):
+    """Quote a column comment as an SQL literal inside sa.text()."""
+    return "'" + comment.replace("'", "''").replace(":", "\\:") + "'"
+
+
+def _swap_columns_to_varchar(table_name, column_names):
+    """
+    Change columns of a large table to VARCHAR(50) via add-backfill-swap.
+    
+    1. Add nullable shadow columns ``<column>__new VARCHAR(50)`` and install a
+       trigger that keeps them in sync for rows written while the backfill runs.
+       The columns that become NOT NULL get a ``CHECK (... IS NOT NULL) NOT
+       VALID`` constraint, which only checks new writes.
+    2. Backfill them in committed batches of BACKFILL_BATCH_SIZE rows.
+    3. Validate the NOT NULL checks and build the primary key index on the
+       shadow ``id`` concurrently; neither blocks writes.
+    4. In one short transaction: drop the trigger and the old columns, rename
+       the shadow columns into place, set NOT NULL (proven by the validated
+       checks, so without a table scan), re-add the dropped constraints and
+       the column comments.
+    5. Rebuild the other indexes that referenced the old columns concurrently.
+    """
+    connection = op.get_bind()
+    shadow = {column_name: f"{column_name}__new" for column_name in column_names}
+    trigger_name = f"{table_name}_varchar_dual_write"
+    not_null = [c for c in ('id', 'tenant_id') if c in shadow]
+    checks = {c: f"{table_name}_{c}_new_not_null" for c in not_null}
+    
+    op.execute(sa.text(
+        f"ALTER TABLE {table_name} "
+        + ", ".join(f"ADD COLUMN {shadow[c]} VARCHAR(50)" for c in column_names)
+    ))
+    op.execute(sa.text(f"""
+        CREATE OR REPLACE FUNCTION {trigger_name}() RETURNS trigger AS $$
+        BEGIN
+            {" ".join(f"NEW.{shadow[c]} := NEW.{c}::text;" for c in column_names)}
+            RETURN NEW;
+        END;
+        $$ LANGUAGE plpgsql
+    """))
+    op.execute(sa.text(f"""
+        CREATE TRIGGER {trigger_name}
+        BEFORE INSERT OR UPDATE ON {table_name}
+        FOR EACH ROW EXECUTE FUNCTION {trigger_name}()
+    """))
+    op.execute(sa.text(
+        f"ALTER TABLE {table_name} "
+        + ", ".join(
+            f"ADD CONSTRAINT {checks[c]} CHECK ({shadow[c]} IS NOT NULL) NOT VALID"
+            for c in not_null
+        )
+    ))
+    
+    set_clause = ", ".join(f"{shadow[c]} = {c}::text" for c in column_names)
+    with op.get_context().autocommit_block():
+        while True:
+            result = connection.execute(sa.text(
+                f"UPDATE {table_name} SET {set_clause} "
+                f"WHERE ctid IN (SELECT ctid FROM {table_name} "
+                f"WHERE {shadow['id']} IS NULL LIMIT {BACKFILL_BATCH_SIZE})"
+            ))
+            if result.rowcount == 0:
+                break
+        
+        for column_name in not_null:
+            connection.execute(sa.text(
+                f"ALTER TABLE {table_name} VALIDATE CONSTRAINT {checks[column_name]}"
+            ))
+        connection.execute(sa.text(
+            f"CREATE UNIQUE INDEX CONCURRENTLY {table_name}_id_new_key "
+            f"ON {table_name} ({shadow['id']})"
+        ))
+    
+    # Swap (back inside the migration transaction). The trigger has kept every
+    # row written since the backfill in sync, so no catch-up pass is needed.
+    op.execute(sa.text(f"LOCK TABLE {table_name} IN ACCESS EXCLUSIVE MODE"))
+    indexes = _dependent_indexes(table_name, column_names)
+    constraints = _dependent_constraints(table_name, column_names)
+    comments = _column_comments(table_name, column_names)
+    op.execute(sa.text(f"DROP TRIGGER {trigger_name} ON {table_name}"))
+    op.execute(sa.text(f"DROP FUNCTION {trigger_name}()"))
+    op.execute(sa.text(
+        f"ALTER TABLE {table_name} "
+        + ", ".join(f"DROP COLUMN {c}" for c in column_names)
+    ))
+    for column_name in column_names:
+        op.execute(sa.text(
+            f"ALTER TABLE {table_name} RENAME COLUMN {shadow[column_name]} TO {column_name}"
+        ))
+    # SET NOT NULL skips the table scan: the validated checks already prove it
+    op.execute(sa.text(
+        f"ALTER TABLE {table_name} "
+        + ", ".join(f"ALTER COLUMN {c} SET NOT NULL" for c in not_null)
+    ))
+    op.execute(sa.text(
+        f"ALTER TABLE {table_name} "
+        + ", ".join(f"DROP CONSTRAINT {checks[c]}" for c in not_null)
+    ))
+    op.execute(sa.text(
+        f"ALTER TABLE {table_name} "
+        f"ADD CONSTRAINT {table_name}_pkey PRIMARY KEY USING INDEX {table_name}_id_new_key"
+    ))
+    if 'tenant_id' in shadow:
+        op.execute(sa.text(f"ALTER TABLE {table_name} ALTER COLUMN tenant_id SET DEFAULT '0'"))
+    for column_name, comment in comments.items():
+        op.execute(sa.text(
+            f"COMMENT ON COLUMN {table_name}.{column_name} IS {_comment_literal(comment)}"
+        ))
+    for constraint_name, definition in constraints:
+        op.execute(sa.text(
+            f"ALTER TABLE {table_name} ADD CONSTRAINT {constraint_name} {definition}"
+        ))
+    
+    # The definitions name the columns, which now resolve to the swapped ones
+    with op.get_context().autocommit_block():
+        for _index_name, definition in indexes:
+            connection.execute(sa.text(
+                definition.replace("CREATE INDEX", "CREATE INDEX CONCURRENTLY", 1)
+                .replace("CREATE UNIQUE INDEX", "CREATE UNIQUE INDEX CONCURRENTLY", 1)
+            ))
+
+
 def upgrade() -> None:
     """
     Change all ID fields from BIGINT to VARCHAR(50).
@@ -97,35 +292,39 @@ def upgrade() -> None:
         ('role_permissions', 'created_by'),
     ]
     
-    # Modify each field
-    for table_name, column_name in tables_to_modify:
+    columns_by_table = _group_by_table(tables_to_modify)
+    # Reflect schema once up front instead of per table
+    existing_columns = _reflect_columns(columns_by_table)
+    
+    # Modify all fields of a table with a single ALTER TABLE (one rewrite per table)
+    for table_name, column_names in columns_by_table.items():
         try:
             # Check if table exists
-            connection = op.get_bind()
-            inspector = sa.inspect(connection)
-            if table_name not in inspector.get_table_names():
+            if table_name not in existing_columns:
                 print(f"Table {table_name} does not exist, skipping...")
                 continue
             
-            # Check if column exists
-            columns = [col['name'] for col in inspector.get_columns(table_name)]
-            if column_name not in columns:
-                print(f"Column {table_name}.{column_name} does not exist, skipping...")
+            # Check which columns exist
+            columns = existing_columns[table_name]
+            existing = []
+            for column_name in column_names:
+                if column_name not in columns:
+                    print(f"Column {table_name}.{column_name} does not exist, skipping...")
+                    continue
+                existing.append(column_name)
+            if not existing:
                 continue
             
-            # Alter column type
-            op.alter_column(
-                table_name,
-                column_name,
-                type_=sa.String(50),
-                existing_type=sa.BigInteger(),
-                existing_nullable=True if column_name in ['dept_id', 'parent_id', 'leader_id', 'created_by', 'updated_by', 'deleted_by', 'user_id', 'package_id'] else False,
-                postgresql_using=f'{column_name}::text'
-            )
-            print(f"Changed {table_name}.{column_name} from BIGINT to VARCHAR(50)")
+            # Alter column types
+            if table_name in LARGE_TABLES and 'id' in existing:
+                _swap_columns_to_varchar(table_name, existing)
+            else:
+                op.execute(sa.text(_alter_columns_sql(table_name, existing, "VARCHAR(50)", "text")))
+            invalidate_table(op.get_bind(), table_name)
+            print(f"Changed {table_name}.({', '.join(existing)}) from BIGINT to VARCHAR(50)")
         except Exception as e:
-            print(f"Error modifying {table_name}.{column_name}: {e}")
-            # Continue with other fields even if one fails
+            print(f"Error modifying {table_name}: {e}")
+            # Continue with other tables even if one fails
             continue
 
 
@@ -206,29 +405,25 @@ def downgrade() -> None:
         ('tenants', 'id'),
     ]
     
-    # Modify each field
-    for table_name, column_name in tables_to_modify:
+    columns_by_table = _group_by_table(tables_to_modify)
+    # Reflect schema once up front instead of per table
+    existing_columns = _reflect_columns(columns_by_table)
+    
+    # Modify all fields of a table with a single ALTER TABLE (one rewrite per table)
+    for table_name, column_names in columns_by_table.items():
         try:
-            connection = op.get_bind()
-            inspector = sa.inspect(connection)
-            if table_name not in inspector.get_table_names():
+            if table_name not in existing_columns:
                 continue
             
-            columns = [col['name'] for col in inspector.get_columns(table_name)]
-            if column_name not in columns:
+            columns = existing_columns[table_name]
+            existing = [column_name for column_name in column_names if column_name in columns]
+            if not existing:
                 continue
             
-            # Alter column type back to BigInteger
-            op.alter_column(
-                table_name,
-                column_name,
-                type_=sa.BigInteger(),
-                existing_type=sa.String(50),
-                existing_nullable=True if column_name in ['dept_id', 'parent_id', 'leader_id', 'created_by', 'updated_by', 'deleted_by', 'user_id', 'package_id'] else False,
-                postgresql_using=f'{column_name}::bigint'
-            )
-            print(f"Reverted {table_name}.{column_name} from VARCHAR(50) to BIGINT")
+            # Alter column types back to BigInteger
+            op.execute(sa.text(_alter_columns_sql(table_name, existing, "BIGINT", "bigint")))
+            invalidate_table(op.get_bind(), table_name)
+            print(f"Reverted {table_name}.({', '.join(existing)}) from VARCHAR(50) to BIGINT")
         except Exception as e:
-            print(f"Error reverting {table_name}.{column_name}: {e}")
+            print(f"Error reverting {table_name}: {e}")
             continue
-
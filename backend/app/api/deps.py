@@ -1,18 +1,123 @@
 """
 API dependencies.
 """
-from typing import Optional
+import hashlib
+import hmac
+import re
+import time
+from functools import lru_cache
+from typing import Optional, Tuple
 
+from cachetools import TTLCache
 from fastapi import Depends, HTTPException, status, Request
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import lazyload, load_only, selectinload
 
 from app.core import get_db, decode_token
 from app.core.config import settings
-from app.models import User
+from app.core.i18n import i18n
+from app.core.redis import RedisClient
+from app.core.security import blacklist_keys
+from app.models import User, Role
 
 security = HTTPBearer()
 
+# Short-lived local copy of "user_session:{user_id}" for the single session check
+_session_token_cache: TTLCache = TTLCache(maxsize=10_000, ttl=5)
+_MISSING = object()
+
+# Shared 401 errors of the auth path. Raised with .with_traceback(None) so a
+# reused instance doesn't keep accumulating traceback frames.
+_INVALID_CREDENTIALS = HTTPException(
+    status_code=status.HTTP_401_UNAUTHORIZED,
+    detail="Invalid authentication credentials",
+    headers={"WWW-Authenticate": "Bearer"},
+)
+_INVALID_PAYLOAD = HTTPException(
+    status_code=status.HTTP_401_UNAUTHORIZED,
+    detail="Invalid token payload",
+)
+
+# User columns loaded for the authenticated user: everything read off
+# current_user / request.state.user (auth checks, data scope, user-info, logging).
+# Other columns are loaded when a query for the same user asks for them.
+_AUTH_USER_COLS = (
+    User.id,
+    User.username,
+    User.real_name,
+    User.avatar,
+    User.tenant_id,
+    User.dept_id,
+    User.user_type,
+    User.status,
+)
+
+# User IDs are VARCHAR(50) keys (snowflake strings)
+_USER_ID_PATTERN = re.compile(r"[A-Za-z0-9_-]{1,50}")
+
+
+# Verified JWT payloads, keyed by a digest of the raw token
+_jwt_payload_cache: TTLCache = TTLCache(maxsize=4096, ttl=60)
+
+
+def invalidate_session_cache(user_id) -> None:
+    """Drop the locally cached active session token of a user."""
+    _session_token_cache.pop(str(user_id), None)
+
+
+def tenant_scope(user: User) -> Optional[str]:
+    """Tenant ID a user's lookups are restricted to (None for superadmins)."""
+    return None if user.user_type == 0 else user.tenant_id
+
+
+def _decode_token_cached(token: str) -> Optional[dict]:
+    """Decode a JWT, reusing the payload of a recently verified identical token."""
+    key = hashlib.blake2b(token.encode(), digest_size=16).digest()
+    payload = _jwt_payload_cache.get(key)
+    if payload is not None:
+        exp = payload.get("exp")
+        if exp is None or exp > time.time():
+            return payload
+        _jwt_payload_cache.pop(key, None)
+        return None
+
+    payload = decode_token(token)
+    if payload:
+        _jwt_payload_cache[key] = payload
+    return payload
+
+
+async def _check_token_revoked(
+    token: str, user_id: str
+) -> Tuple[bool, Optional[str], Optional[str]]:
+    """
+    Check the token blacklist and read the grants version in one Redis round
+    trip, also fetching the user's cached access data when it isn't held
+    locally.
+    
+    Returns:
+        (revoked, raw "user:access" value or None, grants version or None if
+        Redis is unavailable)
+    """
+    # Imported lazily: these modules import this one
+    from app.core.permissions import has_local_access
+    from app.utils.cache import PermissionCache, TreeVersionCache
+    
+    try:
+        pipe = RedisClient.pipeline()
+        pipe.exists(*blacklist_keys(token))
+        pipe.get(TreeVersionCache.version_key(TreeVersionCache.GRANTS))
+        if not has_local_access(user_id):
+            pipe.get(PermissionCache.access_key(user_id))
+        revoked, grants_version, *access_data = await pipe.execute()
+        # A version that was never bumped reads as "0", as in TreeVersionCache
+        return bool(revoked), next(iter(access_data), None), grants_version or "0"
+    except Exception:
+        # Same as is_token_blacklisted: fail open if Redis is down
+        return False, None, None
+
 
 async def get_current_user(
     request: Request,
@@ -33,33 +138,47 @@ async def get_current_user(
         HTTPException: If token is invalid or user not found
     """
     token = credentials.credentials
-    payload = decode_token(token)
+
+    # Reuse the user already resolved for this request (FastAPI may resolve
+    # get_current_user several times through nested dependencies)
+    cached_user = getattr(request.state, "user", None)
+    if cached_user is not None and getattr(request.state, "_auth_token", None) == token:
+        return cached_user
+
+    payload = _decode_token_cached(token)
     
     if not payload:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Invalid authentication credentials",
-            headers={"WWW-Authenticate": "Bearer"},
-        )
+        raise _INVALID_CREDENTIALS.with_traceback(None)
     
-    # Check if token is blacklisted
-    from app.core.security import is_token_blacklisted
-    if await is_token_blacklisted(token):
+    user_id: Optional[str] = payload.get("sub")
+    if not isinstance(user_id, str) or not _USER_ID_PATTERN.fullmatch(user_id):
+        raise _INVALID_PAYLOAD.with_traceback(None)
+    
+    # Check if token is blacklisted (prefetching the user's permissions)
+    revoked, access_data, grants_version = await _check_token_revoked(token, user_id)
+    if revoked:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Token has been revoked",
             headers={"WWW-Authenticate": "Bearer"},
         )
     
-    user_id: Optional[str] = payload.get("sub")
-    if not user_id:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Invalid token payload",
+    # Query user from database. Roles are fetched with one SELECT ... IN, and the
+    # selectin cascade from Role (users, permissions, departments) is cut off:
+    # permission codes come from get_user_permissions, not from these relations.
+    result = await db.execute(
+        select(User)
+        .where(User.id == user_id)
+        .options(
+            load_only(*_AUTH_USER_COLS),
+            selectinload(User.roles).options(
+                lazyload(Role.users),
+                lazyload(Role.permissions),
+                lazyload(Role.custom_departments),
+            )
         )
-    
-    # Query user from database
-    user = await db.get(User, user_id)
+    )
+    user = result.scalar_one_or_none()
     if not user:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -68,15 +187,17 @@ async def get_current_user(
         
     # Single Session Check
     if settings.SINGLE_SESSION_MODE:
-        from app.core.redis import RedisClient
-        redis = RedisClient.get_client()
-        active_token = await redis.get(f"user_session:{user.id}")
+        active_token = _session_token_cache.get(str(user.id), _MISSING)
+        if active_token is _MISSING:
+            redis = RedisClient.get_client()
+            active_token = await redis.get(f"user_session:{user.id}")
+            _session_token_cache[str(user.id)] = active_token
         
-        if active_token and active_token != token:
-            from app.core.i18n import i18n
+        # Constant-time comparison: the active session token is a secret
+        if active_token and not hmac.compare_digest(active_token.encode(), token.encode()):
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
-                detail=i18n.t("account_logged_in_elsewhere"),
+                detail=i18n.tr("account_logged_in_elsewhere"),
                 headers={"WWW-Authenticate": "Bearer"},
             )
         
@@ -87,47 +208,57 @@ async def get_current_user(
             detail="User inactive or disabled",
         )
         
+    from app.core.permissions import prime_user_access
+    prime_user_access(user, access_data, grants_version)
+    
     # Store user in request state for middleware access (e.g. logging)
     # Also store user attributes separately to avoid detached instance errors
     request.state.user = user
     request.state.user_id = user.id
     request.state.username = user.username
     request.state.tenant_id = user.tenant_id
+    request.state._auth_token = token
+    request.state.jwt_payload = payload
     return user
 
 
 
+@lru_cache(maxsize=None)
 def require_permissions(*permissions: str):
     """
     Dependency to require specific permissions.
     
+    Memoized per permission set: endpoints requiring the same codes share one
+    dependency callable, so FastAPI resolves it once per request even when
+    several dependencies of an endpoint ask for it.
+    
     Args:
         *permissions: Required permission codes
         
     Returns:
         Dependency function
     """
+    required_permissions = frozenset(permissions)
+    
     async def permission_checker(
         current_user: User = Depends(get_current_user),
         db: AsyncSession = Depends(get_db),
     ) -> User:
         """Check if user has required permissions."""
+        # Imported lazily: app.core.permissions imports this module
         from app.core.permissions import get_user_permissions
         
         # Superadmin bypasses permission check
         if current_user.user_type == 0:
             return current_user
         
-        # Get user's permissions
+        # Get user's permissions (a frozenset: one C-level subset test)
         user_permissions = await get_user_permissions(db, current_user)
         
-        # Check if user has all required permissions
-        missing_permissions = set(permissions) - user_permissions
-        if missing_permissions:
-            from app.core.i18n import i18n
+        if not required_permissions <= user_permissions:
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
-                detail=i18n.t("forbidden")
+                detail=i18n.tr("forbidden")
             )
         
         return current_user
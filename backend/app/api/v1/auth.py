@@ -1,9 +1,10 @@
 """
 Authentication API endpoints.
 """
+import logging
 import time
-from datetime import datetime
 from fastapi import APIRouter, Depends, HTTPException, status, Request, BackgroundTasks
+from fastapi.responses import ORJSONResponse
 from fastapi.security import OAuth2PasswordRequestForm
 from sqlalchemy.ext.asyncio import AsyncSession
 
@@ -11,15 +12,43 @@ from app.core import get_db, security
 from app.api import deps
 from app.core.config import settings
 from app.core.i18n import i18n
+from app.core.permissions import get_user_permissions, resolve_data_scope
+from app.core.security import decode_token, get_token_expiry_seconds
 from app.models.user import User
 from app.schemas import LoginRequest, TokenResponse, Response
 from app.services.auth_service import auth_service
 from app.services.user_service import user_service
 from app.services.log_service import LogService
+from app.utils.cache import PermissionCache
 from app.utils.ip import IPUtils
+from app.utils.response import timestamp
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/auth", tags=["Authentication"])
 
+_BEARER_PREFIX = "Bearer "
+
+
+def _login_failed(status_code: int, message: str, background_tasks: BackgroundTasks) -> ORJSONResponse:
+    """
+    Build a failed-login error response that still runs the background tasks.
+    
+    Raising HTTPException would drop the request's background tasks (the
+    exception handler builds a new response), so the error is returned in the
+    same shape as http_exception_handler instead.
+    """
+    return ORJSONResponse(
+        status_code=status_code,
+        content={
+            "code": status_code,
+            "message": message,
+            "data": None,
+            "timestamp": timestamp(),
+        },
+        background=background_tasks,
+    )
+
 
 @router.post("/login", response_model=Response)
 async def login(
@@ -31,6 +60,8 @@ async def login(
     """
     User login endpoint.
     """
+    # One clock read for the login time and the response timestamp
+    now = time.time()
     ip = IPUtils.get_ip(request)
     user_agent = request.headers.get("user-agent", "")
     
@@ -39,21 +70,20 @@ async def login(
 
     if not user:
         # Log failure (User not found)
-        await LogService.create_login_log(
+        background_tasks.add_task(
+            LogService.create_login_log,
             username=login_data.username,
             status=0,
             ip=ip,
             msg="用户不存在",
             user_agent=user_agent
         )
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail=i18n.t("login_failed")
-        )
+        return _login_failed(status.HTTP_401_UNAUTHORIZED, i18n.tr("login_failed"), background_tasks)
     
     if not security.verify_password(login_data.password, user.password):
         # Log failure (Password mismatch)
-        await LogService.create_login_log(
+        background_tasks.add_task(
+            LogService.create_login_log,
             username=login_data.username,
             status=0,
             ip=ip,
@@ -62,14 +92,12 @@ async def login(
             user_agent=user_agent,
             tenant_id=user.tenant_id
         )
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail=i18n.t("login_failed")
-        )
+        return _login_failed(status.HTTP_401_UNAUTHORIZED, i18n.tr("login_failed"), background_tasks)
     
     if user.status != 1:
         # Log failure (User disabled)
-        await LogService.create_login_log(
+        background_tasks.add_task(
+            LogService.create_login_log,
             username=login_data.username,
             status=0,
             ip=ip,
@@ -78,10 +106,7 @@ async def login(
             user_agent=user_agent,
             tenant_id=user.tenant_id
         )
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail=i18n.t("user_inactive")
-        )
+        return _login_failed(status.HTTP_403_FORBIDDEN, i18n.tr("user_inactive"), background_tasks)
 
     # Check password expiration
     if security.is_password_expired(user.password_updated_at):
@@ -99,19 +124,21 @@ async def login(
         )
         return {
             "code": 10003, # Password Expired
-            "message": i18n.t("password_expired"),
+            "message": i18n.tr("password_expired"),
             "data": {"must_change_password": True},
-            "timestamp": int(time.time())
+            "timestamp": int(now)
         }
 
-    # Update user's last login time and IP
-    user.last_login_time = datetime.now()
-    user.last_login_ip = ip
-    user.login_count = (user.login_count or 0) + 1
-    await db.commit()
-    
     token_data = await auth_service.create_tokens(db, user.id)
     
+    # Update user's last login time and IP (single UPDATE, after the response)
+    background_tasks.add_task(
+        user_service.update_login_info,
+        user.id,
+        ip,
+        now,
+    )
+    
     # Log success
     background_tasks.add_task(
         LogService.create_login_log,
@@ -126,9 +153,9 @@ async def login(
     
     return {
         "code": 200,
-        "message": i18n.t("login_success"),
+        "message": i18n.tr("login_success"),
         "data": token_data.model_dump(),
-        "timestamp": int(time.time()),
+        "timestamp": int(now),
     }
 
 
@@ -146,7 +173,7 @@ async def refresh_token(
         "code": 200,
         "message": "Token refreshed successfully",
         "data": token_data,
-        "timestamp": int(time.time()),
+        "timestamp": timestamp(),
     }
 
 
@@ -159,37 +186,43 @@ async def logout(
     User logout endpoint.
     Blacklists the current access token and clears user session.
     """
-    from app.core.security import blacklist_token, decode_token, get_token_expiry_seconds
-    
     # Get token from authorization header
     auth_header = request.headers.get("authorization", "")
-    if not auth_header.startswith("Bearer "):
+    if not auth_header.startswith(_BEARER_PREFIX):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid authentication credentials",
         )
     
-    token = auth_header.replace("Bearer ", "")
+    token = auth_header[len(_BEARER_PREFIX):]
     
-    # Decode token to get expiry time
-    payload = decode_token(token)
-    if payload:
-        # Add token to blacklist with remaining TTL
-        expires_in = get_token_expiry_seconds(payload)
-        if expires_in > 0:
-            await blacklist_token(token, expires_in)
+    # Token expiry time (payload already decoded by get_current_user)
+    payload = getattr(request.state, "jwt_payload", None) or decode_token(token)
+    expires_in = get_token_expiry_seconds(payload) if payload else 0
+    
+    # Blacklist the token with its remaining TTL and clear the user session
+    # (if single session mode is enabled) in one Redis round trip. Logout only
+    # succeeds once the token is actually revoked.
+    revoked = await security.blacklist_token(
+        token,
+        expires_in,
+        session_user_id=current_user.id if settings.SINGLE_SESSION_MODE else None,
+    )
+    if not revoked:
+        logger.warning("Failed to revoke token of user %s", current_user.id)
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Logout failed, please try again",
+        )
     
-    # Clear user session in Redis (if single session mode is enabled)
     if settings.SINGLE_SESSION_MODE:
-        from app.core.redis import RedisClient
-        redis = RedisClient.get_client()
-        await redis.delete(f"user_session:{current_user.id}")
+        deps.invalidate_session_cache(current_user.id)
     
     return {
         "code": 200,
         "message": "Logout successful",
         "data": None,
-        "timestamp": int(time.time()),
+        "timestamp": timestamp(),
     }
 
 
@@ -201,11 +234,18 @@ async def get_user_info(
     """
     Get current user information including roles and permissions.
     """
-    from app.core.permissions import get_user_permissions, get_user_roles, get_user_data_scope
-    from app.services.user_service import user_service
+    # Assembled user info is cached briefly; role/permission/profile changes clear it
+    user_info = await PermissionCache.get_user_info(current_user.id)
+    if user_info is not None:
+        return {
+            "code": 200,
+            "message": "success",
+            "data": user_info,
+            "timestamp": timestamp(),
+        }
     
-    # Get user roles with details
-    roles = await user_service.get_user_roles(db, current_user.id)
+    # Roles were already loaded with the user by get_current_user
+    roles = [role for role in current_user.roles if not role.is_deleted]
     roles_data = [
         {
             "id": role.id,
@@ -224,22 +264,25 @@ async def get_user_info(
         user_permissions = await get_user_permissions(db, current_user)
         permissions = sorted(list(user_permissions))
     
-    # Get data scope
-    data_scope = await get_user_data_scope(db, current_user)
+    # Data scope from the active roles (same rule as get_user_data_scope)
+    data_scope = resolve_data_scope(role.data_scope for role in roles if role.status == 1)
+    
+    user_info = {
+        "id": current_user.id,
+        "username": current_user.username,
+        "real_name": current_user.real_name,
+        "avatar": current_user.avatar,
+        "tenant_id": current_user.tenant_id,
+        "user_type": current_user.user_type,
+        "roles": roles_data,
+        "permissions": permissions,
+        "data_scope": data_scope.value
+    }
+    await PermissionCache.set_user_info(current_user.id, user_info)
     
     return {
         "code": 200,
         "message": "success",
-        "data": {
-            "id": current_user.id,
-            "username": current_user.username,
-            "real_name": current_user.real_name,
-            "avatar": current_user.avatar,
-            "tenant_id": current_user.tenant_id,
-            "user_type": current_user.user_type,
-            "roles": roles_data,
-            "permissions": permissions,
-            "data_scope": data_scope.value
-        },
-        "timestamp": int(time.time()),
+        "data": user_info,
+        "timestamp": timestamp(),
     }
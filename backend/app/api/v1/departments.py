@@ -1,12 +1,15 @@
 """
 Department API endpoints.
 """
+import logging
 from typing import List
 from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.responses import ORJSONResponse
+from pydantic import TypeAdapter
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core import get_db
-from app.api.deps import get_current_user
+from app.api.deps import require_permissions
 from app.models.user import User
 from app.schemas.department import (
     DepartmentTreeNode,
@@ -16,16 +19,19 @@ from app.schemas.department import (
 )
 from app.services.department_service import department_service
 from app.core.i18n import i18n
-from app.core.permissions import require_permissions
-import time
+from app.utils.response import dump_list, timestamp
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/departments", tags=["Departments"])
 
+# Validate whole lists in one pass instead of one model_validate per row
+_DEPT_LIST = TypeAdapter(List[DepartmentResponse])
+
 
 @router.get("", response_model=dict)
-@require_permissions("dept:list")
 async def list_departments(
-    current_user: User = Depends(get_current_user),
+    current_user: User = Depends(require_permissions("dept:list")),
     db: AsyncSession = Depends(get_db)
 ):
     """
@@ -35,18 +41,17 @@ async def list_departments(
     """
     departments = await department_service.get_departments(db, current_user.tenant_id)
     
-    return {
+    return ORJSONResponse({
         "code": 200,
-        "message": i18n.t("success"),
-        "data": [DepartmentResponse.model_validate(d) for d in departments],
-        "timestamp": int(time.time())
-    }
+        "message": i18n.tr("success"),
+        "data": dump_list(_DEPT_LIST, departments),
+        "timestamp": timestamp()
+    })
 
 
 @router.get("/tree", response_model=dict)
-@require_permissions("dept:list")
 async def get_department_tree(
-    current_user: User = Depends(get_current_user),
+    current_user: User = Depends(require_permissions("dept:list")),
     db: AsyncSession = Depends(get_db)
 ):
     """
@@ -54,22 +59,20 @@ async def get_department_tree(
     
     Requires permission: dept:list
     """
-    departments = await department_service.get_departments(db, current_user.tenant_id)
-    tree = department_service.build_department_tree(departments)
+    tree = await department_service.get_department_tree(db, current_user.tenant_id)
     
     return {
         "code": 200,
-        "message": i18n.t("success"),
+        "message": i18n.tr("success"),
         "data": tree,
-        "timestamp": int(time.time())
+        "timestamp": timestamp()
     }
 
 
 @router.get("/{dept_id}", response_model=dict)
-@require_permissions("dept:query")
 async def get_department(
     dept_id: str,
-    current_user: User = Depends(get_current_user),
+    current_user: User = Depends(require_permissions("dept:query")),
     db: AsyncSession = Depends(get_db)
 ):
     """
@@ -77,33 +80,29 @@ async def get_department(
     
     Requires permission: dept:query
     """
-    # Debug: Log the request
-    import logging
-    logger = logging.getLogger(__name__)
-    logger.info(f"Getting department: dept_id={dept_id}, tenant_id={current_user.tenant_id}")
+    logger.debug("Getting department: dept_id=%s, tenant_id=%s", dept_id, current_user.tenant_id)
     
     department = await department_service.get_department_by_id(db, dept_id, current_user.tenant_id)
     
     if not department:
-        logger.warning(f"Department not found: dept_id={dept_id}, tenant_id={current_user.tenant_id}")
+        logger.warning("Department not found: dept_id=%s, tenant_id=%s", dept_id, current_user.tenant_id)
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
-            detail=i18n.t("not_found")
+            detail=i18n.tr("not_found")
         )
     
     return {
         "code": 200,
-        "message": i18n.t("success"),
+        "message": i18n.tr("success"),
         "data": DepartmentResponse.model_validate(department),
-        "timestamp": int(time.time())
+        "timestamp": timestamp()
     }
 
 
 @router.post("", response_model=dict)
-@require_permissions("dept:create")
 async def create_department(
     dept_data: DepartmentCreate,
-    current_user: User = Depends(get_current_user),
+    current_user: User = Depends(require_permissions("dept:create")),
     db: AsyncSession = Depends(get_db)
 ):
     """
@@ -119,9 +118,9 @@ async def create_department(
         
         return {
             "code": 200,
-            "message": i18n.t("success"),
+            "message": i18n.tr("success"),
             "data": DepartmentResponse.model_validate(department),
-            "timestamp": int(time.time())
+            "timestamp": timestamp()
         }
     except ValueError as e:
         raise HTTPException(
@@ -131,11 +130,10 @@ async def create_department(
 
 
 @router.put("/{dept_id}", response_model=dict)
-@require_permissions("dept:update")
 async def update_department(
     dept_id: str,
     dept_data: DepartmentUpdate,
-    current_user: User = Depends(get_current_user),
+    current_user: User = Depends(require_permissions("dept:update")),
     db: AsyncSession = Depends(get_db)
 ):
     """
@@ -144,27 +142,24 @@ async def update_department(
     Requires permission: dept:update
     """
     try:
-        # Debug: Log the request
-        import logging
-        logger = logging.getLogger(__name__)
-        logger.info(f"Updating department: dept_id={dept_id}, tenant_id={current_user.tenant_id}")
+        logger.debug("Updating department: dept_id=%s, tenant_id=%s", dept_id, current_user.tenant_id)
         
         department = await department_service.update_department(db, dept_id, dept_data, current_user.tenant_id)
         
         if not department:
-            logger.warning(f"Department not found: dept_id={dept_id}, tenant_id={current_user.tenant_id}")
+            logger.warning("Department not found: dept_id=%s, tenant_id=%s", dept_id, current_user.tenant_id)
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
-                detail=i18n.t("not_found")
+                detail=i18n.tr("not_found")
             )
         
         await db.commit()
         
         return {
             "code": 200,
-            "message": i18n.t("success"),
+            "message": i18n.tr("success"),
             "data": DepartmentResponse.model_validate(department),
-            "timestamp": int(time.time())
+            "timestamp": timestamp()
         }
     except ValueError as e:
         raise HTTPException(
@@ -174,10 +169,9 @@ async def update_department(
 
 
 @router.delete("/{dept_id}", response_model=dict)
-@require_permissions("dept:delete")
 async def delete_department(
     dept_id: str,
-    current_user: User = Depends(get_current_user),
+    current_user: User = Depends(require_permissions("dept:delete")),
     db: AsyncSession = Depends(get_db)
 ):
     """
@@ -191,16 +185,16 @@ async def delete_department(
         if not success:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
-                detail=i18n.t("not_found")
+                detail=i18n.tr("not_found")
             )
         
         await db.commit()
         
         return {
             "code": 200,
-            "message": i18n.t("success"),
+            "message": i18n.tr("success"),
             "data": None,
-            "timestamp": int(time.time())
+            "timestamp": timestamp()
         }
     except ValueError as e:
         raise HTTPException(
@@ -2,31 +2,32 @@
 Dictionary data API endpoints.
 """
 from typing import Optional
+
+import orjson
 from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi.responses import ORJSONResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core import get_db
-from app.api.deps import get_current_user
+from app.api.deps import get_current_user, require_permissions
 from app.models.user import User
 from app.schemas.dict_data import DictDataCreate, DictDataUpdate, DictDataResponse
 from app.schemas import Response
-from app.services.dict_data_service import dict_data_service
+from app.services.dict_data_service import DICT_DATA_LIST, dict_data_service
 from app.core.i18n import i18n
-from app.core.permissions import require_permissions
-import time
+from app.utils.response import dump_list, timestamp
 
 router = APIRouter(prefix="/dict-data", tags=["Dictionary Data"])
 
 
 @router.get("", response_model=Response)
-@require_permissions(["dict:list"])
 async def list_dict_data(
     page: int = Query(1, ge=1),
     page_size: int = Query(20, ge=1, le=100),
     keyword: Optional[str] = None,
     dict_type_id: Optional[str] = None,
     status: Optional[int] = None,
-    current_user: User = Depends(get_current_user),
+    current_user: User = Depends(require_permissions("dict:list")),
     db: AsyncSession = Depends(get_db)
 ):
     """
@@ -44,17 +45,17 @@ async def list_dict_data(
         status
     )
     
-    return {
+    return ORJSONResponse({
         "code": 200,
-        "message": i18n.t("success"),
+        "message": i18n.tr("success"),
         "data": {
-            "items": [DictDataResponse.model_validate(dd) for dd in dict_data],
+            "items": dump_list(DICT_DATA_LIST, dict_data),
             "total": total,
             "page": page,
             "page_size": page_size
         },
-        "timestamp": int(time.time())
-    }
+        "timestamp": timestamp()
+    })
 
 
 @router.get("/type/{type_code}", response_model=Response)
@@ -69,23 +70,23 @@ async def get_dict_data_by_type(
     This endpoint does not require authentication, but we still get current_user
     for tenant isolation. For truly public access, you may want to modify this.
     """
-    dict_data_list = await dict_data_service.get_dict_data_by_type_cached(
+    dict_data_json = await dict_data_service.get_dict_data_by_type_cached(
         db, type_code, current_user.tenant_id
     )
     
-    return {
+    # Cached payload is already JSON; embed it as-is
+    return ORJSONResponse({
         "code": 200,
-        "message": i18n.t("success"),
-        "data": [DictDataResponse.model_validate(dd) for dd in dict_data_list],
-        "timestamp": int(time.time())
-    }
+        "message": i18n.tr("success"),
+        "data": orjson.Fragment(dict_data_json),
+        "timestamp": timestamp()
+    })
 
 
 @router.get("/{dict_data_id}", response_model=Response)
-@require_permissions(["dict:query"])
 async def get_dict_data(
     dict_data_id: str,
-    current_user: User = Depends(get_current_user),
+    current_user: User = Depends(require_permissions("dict:query")),
     db: AsyncSession = Depends(get_db)
 ):
     """
@@ -98,22 +99,21 @@ async def get_dict_data(
     if not dict_data:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
-            detail=i18n.t("resource_not_found")
+            detail=i18n.tr("resource_not_found")
         )
     
     return {
         "code": 200,
-        "message": i18n.t("success"),
+        "message": i18n.tr("success"),
         "data": DictDataResponse.model_validate(dict_data),
-        "timestamp": int(time.time())
+        "timestamp": timestamp()
     }
 
 
 @router.post("", response_model=dict)
-@require_permissions(["dict:create"])
 async def create_dict_data(
     dict_data_data: DictDataCreate,
-    current_user: User = Depends(get_current_user),
+    current_user: User = Depends(require_permissions("dict:create")),
     db: AsyncSession = Depends(get_db)
 ):
     """Create a new dictionary data."""
@@ -123,9 +123,9 @@ async def create_dict_data(
     except ValueError as e:
         error_msg = str(e)
         if "not found" in error_msg:
-            error_msg = i18n.t("dict.typeNotFound")
+            error_msg = i18n.tr("dict.typeNotFound")
         elif "already exists" in error_msg:
-            error_msg = i18n.t("dict.valueExists")
+            error_msg = i18n.tr("dict.valueExists")
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=error_msg
@@ -133,18 +133,17 @@ async def create_dict_data(
     
     return {
         "code": 200,
-        "message": i18n.t("success"),
+        "message": i18n.tr("success"),
         "data": DictDataResponse.model_validate(dict_data),
-        "timestamp": int(time.time())
+        "timestamp": timestamp()
     }
 
 
 @router.put("/{dict_data_id}", response_model=dict)
-@require_permissions(["dict:update"])
 async def update_dict_data(
     dict_data_id: str,
     dict_data_data: DictDataUpdate,
-    current_user: User = Depends(get_current_user),
+    current_user: User = Depends(require_permissions("dict:update")),
     db: AsyncSession = Depends(get_db)
 ):
     """Update a dictionary data."""
@@ -155,9 +154,9 @@ async def update_dict_data(
     except ValueError as e:
         error_msg = str(e)
         if "not found" in error_msg:
-            error_msg = i18n.t("dict.typeNotFound")
+            error_msg = i18n.tr("dict.typeNotFound")
         elif "already exists" in error_msg:
-            error_msg = i18n.t("dict.valueExists")
+            error_msg = i18n.tr("dict.valueExists")
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=error_msg
@@ -166,24 +165,23 @@ async def update_dict_data(
     if not dict_data:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
-            detail=i18n.t("resource_not_found")
+            detail=i18n.tr("resource_not_found")
         )
     
     await db.commit()
     
     return {
         "code": 200,
-        "message": i18n.t("success"),
+        "message": i18n.tr("success"),
         "data": DictDataResponse.model_validate(dict_data),
-        "timestamp": int(time.time())
+        "timestamp": timestamp()
     }
 
 
 @router.delete("/{dict_data_id}", response_model=dict)
-@require_permissions(["dict:delete"])
 async def delete_dict_data(
     dict_data_id: str,
-    current_user: User = Depends(get_current_user),
+    current_user: User = Depends(require_permissions("dict:delete")),
     db: AsyncSession = Depends(get_db)
 ):
     """Delete a dictionary data."""
@@ -192,15 +190,15 @@ async def delete_dict_data(
     if not success:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
-            detail=i18n.t("resource_not_found")
+            detail=i18n.tr("resource_not_found")
         )
     
     await db.commit()
     
     return {
         "code": 200,
-        "message": i18n.t("success"),
+        "message": i18n.tr("success"),
         "data": None,
-        "timestamp": int(time.time())
+        "timestamp": timestamp()
     }
 
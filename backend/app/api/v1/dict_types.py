@@ -1,31 +1,34 @@
 """
 Dictionary type API endpoints.
 """
-from typing import Optional
+from typing import List, Optional
 from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi.responses import ORJSONResponse
+from pydantic import TypeAdapter
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core import get_db
-from app.api.deps import get_current_user
+from app.api.deps import require_permissions
 from app.models.user import User
 from app.schemas.dict_type import DictTypeCreate, DictTypeUpdate, DictTypeResponse
 from app.schemas import Response
 from app.services.dict_type_service import dict_type_service
 from app.core.i18n import i18n
-from app.core.permissions import require_permissions
-import time
+from app.utils.response import dump_list, timestamp
 
 router = APIRouter(prefix="/dict-types", tags=["Dictionary Types"])
 
+# Validate whole lists in one pass instead of one model_validate per row
+_DICT_TYPE_LIST = TypeAdapter(List[DictTypeResponse])
+
 
 @router.get("", response_model=Response)
-@require_permissions(["dict:list"])
 async def list_dict_types(
     page: int = Query(1, ge=1),
     page_size: int = Query(20, ge=1, le=100),
     keyword: Optional[str] = None,
     status: Optional[int] = None,
-    current_user: User = Depends(get_current_user),
+    current_user: User = Depends(require_permissions("dict:list")),
     db: AsyncSession = Depends(get_db)
 ):
     """
@@ -42,24 +45,23 @@ async def list_dict_types(
         status
     )
     
-    return {
+    return ORJSONResponse({
         "code": 200,
-        "message": i18n.t("success"),
+        "message": i18n.tr("success"),
         "data": {
-            "items": [DictTypeResponse.model_validate(dt) for dt in dict_types],
+            "items": dump_list(_DICT_TYPE_LIST, dict_types),
             "total": total,
             "page": page,
             "page_size": page_size
         },
-        "timestamp": int(time.time())
-    }
+        "timestamp": timestamp()
+    })
 
 
 @router.get("/{dict_type_id}", response_model=Response)
-@require_permissions(["dict:query"])
 async def get_dict_type(
     dict_type_id: str,
-    current_user: User = Depends(get_current_user),
+    current_user: User = Depends(require_permissions("dict:query")),
     db: AsyncSession = Depends(get_db)
 ):
     """
@@ -72,22 +74,21 @@ async def get_dict_type(
     if not dict_type:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
-            detail=i18n.t("resource_not_found")
+            detail=i18n.tr("resource_not_found")
         )
     
     return {
         "code": 200,
-        "message": i18n.t("success"),
+        "message": i18n.tr("success"),
         "data": DictTypeResponse.model_validate(dict_type),
-        "timestamp": int(time.time())
+        "timestamp": timestamp()
     }
 
 
 @router.post("", response_model=dict)
-@require_permissions(["dict:create"])
 async def create_dict_type(
     dict_type_data: DictTypeCreate,
-    current_user: User = Depends(get_current_user),
+    current_user: User = Depends(require_permissions("dict:create")),
     db: AsyncSession = Depends(get_db)
 ):
     """Create a new dictionary type."""
@@ -97,7 +98,7 @@ async def create_dict_type(
     except ValueError as e:
         error_msg = str(e)
         if "already exists" in error_msg:
-            error_msg = i18n.t("dict.codeExists")
+            error_msg = i18n.tr("dict.codeExists")
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=error_msg
@@ -105,18 +106,17 @@ async def create_dict_type(
     
     return {
         "code": 200,
-        "message": i18n.t("success"),
+        "message": i18n.tr("success"),
         "data": DictTypeResponse.model_validate(dict_type),
-        "timestamp": int(time.time())
+        "timestamp": timestamp()
     }
 
 
 @router.put("/{dict_type_id}", response_model=dict)
-@require_permissions(["dict:update"])
 async def update_dict_type(
     dict_type_id: str,
     dict_type_data: DictTypeUpdate,
-    current_user: User = Depends(get_current_user),
+    current_user: User = Depends(require_permissions("dict:update")),
     db: AsyncSession = Depends(get_db)
 ):
     """Update a dictionary type."""
@@ -127,7 +127,7 @@ async def update_dict_type(
     except ValueError as e:
         error_msg = str(e)
         if "already exists" in error_msg:
-            error_msg = i18n.t("dict.codeExists")
+            error_msg = i18n.tr("dict.codeExists")
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=error_msg
@@ -136,24 +136,23 @@ async def update_dict_type(
     if not dict_type:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
-            detail=i18n.t("resource_not_found")
+            detail=i18n.tr("resource_not_found")
         )
     
     await db.commit()
     
     return {
         "code": 200,
-        "message": i18n.t("success"),
+        "message": i18n.tr("success"),
         "data": DictTypeResponse.model_validate(dict_type),
-        "timestamp": int(time.time())
+        "timestamp": timestamp()
     }
 
 
 @router.delete("/{dict_type_id}", response_model=dict)
-@require_permissions(["dict:delete"])
 async def delete_dict_type(
     dict_type_id: str,
-    current_user: User = Depends(get_current_user),
+    current_user: User = Depends(require_permissions("dict:delete")),
     db: AsyncSession = Depends(get_db)
 ):
     """Delete a dictionary type."""
@@ -162,7 +161,7 @@ async def delete_dict_type(
     except ValueError as e:
         error_msg = str(e)
         if "associated data" in error_msg:
-            error_msg = i18n.t("dict.typeHasData")
+            error_msg = i18n.tr("dict.typeHasData")
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=error_msg
@@ -171,15 +170,15 @@ async def delete_dict_type(
     if not success:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
-            detail=i18n.t("resource_not_found")
+            detail=i18n.tr("resource_not_found")
         )
     
     await db.commit()
     
     return {
         "code": 200,
-        "message": i18n.t("success"),
+        "message": i18n.tr("success"),
         "data": None,
-        "timestamp": int(time.time())
+        "timestamp": timestamp()
     }
 
@@ -1,11 +1,13 @@
 """
 Log query API endpoints.
 """
-from typing import Optional
+from typing import List, Optional
 from datetime import datetime
-import time
 
-from fastapi import APIRouter, Depends, Query
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import status as http_status
+from fastapi.responses import ORJSONResponse
+from pydantic import TypeAdapter
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core import get_db
@@ -15,9 +17,18 @@ from app.schemas.log import LoginLogResponse, OperationLogResponse, OnlineUserRe
 from app.schemas.common import Response, PageResponse
 from app.services.log_service import LogService
 from app.core.i18n import i18n
+from app.core.redis import RedisClient
+from app.utils.response import dump_list, row_dumper, timestamp
 
 router = APIRouter(prefix="/logs", tags=["Logs"])
 
+# Log rows are plain columns written by the app itself: read them straight
+# into dicts instead of validating up to 100 rows per page
+_dump_login_logs = row_dumper(LoginLogResponse)
+_dump_operation_logs = row_dumper(OperationLogResponse)
+# Validate whole lists in one pass instead of one model_validate per row
+_ONLINE_USER_LIST = TypeAdapter(List[OnlineUserResponse])
+
 
 @router.get("/login", response_model=Response)
 async def get_login_logs(
@@ -28,6 +39,8 @@ async def get_login_logs(
     ip: Optional[str] = Query(None, description="IP地址"),
     start_time: Optional[datetime] = Query(None, description="开始时间"),
     end_time: Optional[datetime] = Query(None, description="结束时间"),
+    cursor: Optional[str] = Query(None, description="游标(上一页返回的next_cursor),传入时忽略page且不返回total"),
+    include_total: bool = Query(True, description="是否返回总数(false时无法由当前页推算则total为null)"),
     current_user: User = Depends(deps.require_permissions("log:login:list")),
     db: AsyncSession = Depends(get_db),
 ):
@@ -36,29 +49,35 @@ async def get_login_logs(
     
     Requires permission: log:login:list
     """
-    logs, total = await LogService.get_login_logs(
-        db,
-        page=page,
-        page_size=page_size,
-        username=username,
-        status=status,
-        ip=ip,
-        start_time=start_time,
-        end_time=end_time,
-        tenant_id=current_user.tenant_id if current_user.user_type != 0 else None
-    )
+    try:
+        logs, total, next_cursor = await LogService.get_login_logs(
+            db,
+            page=page,
+            page_size=page_size,
+            username=username,
+            status=status,
+            ip=ip,
+            start_time=start_time,
+            end_time=end_time,
+            tenant_id=current_user.tenant_id if current_user.user_type != 0 else None,
+            cursor=cursor,
+            include_total=include_total
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=http_status.HTTP_400_BAD_REQUEST, detail=str(e))
     
-    return {
+    return ORJSONResponse({
         "code": 200,
-        "message": i18n.t("success"),
+        "message": i18n.tr("success"),
         "data": {
-            "items": [LoginLogResponse.model_validate(log) for log in logs],
+            "items": _dump_login_logs(logs),
             "total": total,
             "page": page,
-            "page_size": page_size
+            "page_size": page_size,
+            "next_cursor": next_cursor
         },
-        "timestamp": int(time.time()),
-    }
+        "timestamp": timestamp(),
+    })
 
 
 @router.get("/operation", response_model=Response)
@@ -71,6 +90,8 @@ async def get_operation_logs(
     method: Optional[str] = Query(None, description="HTTP方法"),
     start_time: Optional[datetime] = Query(None, description="开始时间"),
     end_time: Optional[datetime] = Query(None, description="结束时间"),
+    cursor: Optional[str] = Query(None, description="游标(上一页返回的next_cursor),传入时忽略page且不返回total"),
+    include_total: bool = Query(True, description="是否返回总数(false时无法由当前页推算则total为null)"),
     current_user: User = Depends(deps.require_permissions("log:operation:list")),
     db: AsyncSession = Depends(get_db),
 ):
@@ -79,30 +100,36 @@ async def get_operation_logs(
     
     Requires permission: log:operation:list
     """
-    logs, total = await LogService.get_operation_logs(
-        db,
-        page=page,
-        page_size=page_size,
-        username=username,
-        module=module,
-        status=status,
-        method=method,
-        start_time=start_time,
-        end_time=end_time,
-        tenant_id=current_user.tenant_id if current_user.user_type != 0 else None
-    )
+    try:
+        logs, total, next_cursor = await LogService.get_operation_logs(
+            db,
+            page=page,
+            page_size=page_size,
+            username=username,
+            module=module,
+            status=status,
+            method=method,
+            start_time=start_time,
+            end_time=end_time,
+            tenant_id=current_user.tenant_id if current_user.user_type != 0 else None,
+            cursor=cursor,
+            include_total=include_total
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=http_status.HTTP_400_BAD_REQUEST, detail=str(e))
     
-    return {
+    return ORJSONResponse({
         "code": 200,
-        "message": i18n.t("success"),
+        "message": i18n.tr("success"),
         "data": {
-            "items": [OperationLogResponse.model_validate(log) for log in logs],
+            "items": _dump_operation_logs(logs),
             "total": total,
             "page": page,
-            "page_size": page_size
+            "page_size": page_size,
+            "next_cursor": next_cursor
         },
-        "timestamp": int(time.time()),
-    }
+        "timestamp": timestamp(),
+    })
 
 
 @router.get("/online", response_model=Response)
@@ -120,12 +147,12 @@ async def get_online_users(
         tenant_id=current_user.tenant_id if current_user.user_type != 0 else None
     )
     
-    return {
+    return ORJSONResponse({
         "code": 200,
-        "message": i18n.t("success"),
-        "data": [OnlineUserResponse.model_validate(user) for user in users],
-        "timestamp": int(time.time()),
-    }
+        "message": i18n.tr("success"),
+        "data": dump_list(_ONLINE_USER_LIST, users),
+        "timestamp": timestamp(),
+    })
 
 
 @router.post("/online/{user_id}/force-logout", response_model=Response)
@@ -139,18 +166,17 @@ async def force_logout_user(
     
     Requires permission: log:online:force-logout
     """
-    from app.core.redis import RedisClient
-    
     redis = RedisClient.get_client()
     session_key = f"user_session:{user_id}"
     
     # Delete session from Redis
     await redis.delete(session_key)
+    deps.invalidate_session_cache(user_id)
     
     return {
         "code": 200,
-        "message": i18n.t("success"),
+        "message": i18n.tr("success"),
         "data": None,
-        "timestamp": int(time.time()),
+        "timestamp": timestamp(),
     }
 
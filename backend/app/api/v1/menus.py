@@ -2,31 +2,36 @@
 Menu API endpoints.
 """
 from typing import List, Optional
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Request
+from fastapi import status as http_status
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core import get_db
-from app.api.deps import get_current_user
+from app.api.deps import get_current_user, require_permissions, tenant_scope
 from app.models.user import User
 from app.schemas.menu import MenuTreeNode, MenuCreate, MenuUpdate, MenuResponse
 from app.schemas import Response
 from app.services.menu_service import menu_service
 from app.core.i18n import i18n
-from app.core.permissions import require_permissions
-import time
+from app.utils.cache import TreeVersionCache
+from app.utils.response import envelope_response, row_dumper, timestamp, tree_response
 
 router = APIRouter(prefix="/menus", tags=["Menus"])
 
+# Menu rows are plain columns: read them into dicts without validation
+_dump_menus = row_dumper(MenuResponse)
+
 
 @router.get("", response_model=Response)
-@require_permissions(["menu:list"])
 async def list_menus(
     page: int = Query(1, ge=1),
     page_size: int = Query(20, ge=1, le=100),
     keyword: Optional[str] = None,
     menu_type: Optional[int] = None,
     status: Optional[int] = None,
-    current_user: User = Depends(get_current_user),
+    cursor: Optional[str] = Query(None, description="游标(上一页返回的next_cursor),传入时忽略page且不返回total"),
+    include_total: bool = Query(True, description="是否返回总数(false时无法由当前页推算则total为null)"),
+    current_user: User = Depends(require_permissions("menu:list")),
     db: AsyncSession = Depends(get_db)
 ):
     """
@@ -34,52 +39,59 @@ async def list_menus(
     
     Requires menu:list permission.
     """
-    menus, total = await menu_service.get_all_menus(
-        db,
-        current_user.tenant_id,
-        page,
-        page_size,
-        keyword,
-        menu_type,
-        status
-    )
+    try:
+        menus, total, next_cursor = await menu_service.get_all_menus(
+            db,
+            current_user.tenant_id,
+            page,
+            page_size,
+            keyword,
+            menu_type,
+            status,
+            cursor,
+            include_total
+        )
+    except ValueError as e:
+        # "status" is the menu status filter here, hence the module alias
+        raise HTTPException(status_code=http_status.HTTP_400_BAD_REQUEST, detail=str(e))
     
-    return {
-        "code": 200,
-        "message": i18n.t("success"),
-        "data": {
-            "items": [MenuResponse.model_validate(menu) for menu in menus],
+    return envelope_response(
+        {
+            "items": _dump_menus(menus),
             "total": total,
             "page": page,
-            "page_size": page_size
+            "page_size": page_size,
+            "next_cursor": next_cursor,
+            "has_more": next_cursor is not None
         },
-        "timestamp": int(time.time())
-    }
+        i18n.tr("success")
+    )
 
 
 @router.get("/tree/all", response_model=Response)
-@require_permissions(["menu:list"])
 async def get_menu_tree(
-    current_user: User = Depends(get_current_user),
+    request: Request,
+    current_user: User = Depends(require_permissions("menu:list")),
     db: AsyncSession = Depends(get_db)
 ):
     """
     Get complete menu tree (without permission filtering).
     
     For admin use. Requires menu:list permission.
+    Conditional GET and Redis-cached: both follow the menus version.
     """
-    menu_tree = await menu_service.get_all_menus_tree(db, current_user.tenant_id)
-    
-    return {
-        "code": 200,
-        "message": i18n.t("success"),
-        "data": menu_tree,
-        "timestamp": int(time.time())
-    }
+    return await tree_response(
+        request,
+        f"menus:{current_user.tenant_id}",
+        (TreeVersionCache.MENUS,),
+        lambda: menu_service.get_all_menus_tree(db, current_user.tenant_id),
+        i18n.tr("success")
+    )
 
 
 @router.get("/user", response_model=Response)
 async def get_user_menu_tree(
+    request: Request,
     current_user: User = Depends(get_current_user),
     db: AsyncSession = Depends(get_db)
 ):
@@ -87,26 +99,26 @@ async def get_user_menu_tree(
     Get current user's menu tree.
     
     Returns menu tree based on user's permissions.
+    Conditional GET and Redis-cached: both follow the menus and grants versions.
     """
-    # Get user's accessible menus
-    menus = await menu_service.get_user_menus(db, current_user)
-    
-    # Build tree structure
-    menu_tree = menu_service.build_menu_tree(menus)
-    
-    return {
-        "code": 200,
-        "message": i18n.t("success"),
-        "data": menu_tree,
-        "timestamp": int(time.time())
-    }
+    async def build():
+        # Get user's accessible menus and build the tree structure
+        menus = await menu_service.get_user_menus(db, current_user)
+        return menu_service.build_menu_tree(menus)
+    
+    return await tree_response(
+        request,
+        f"user_menus:{current_user.id}",
+        (TreeVersionCache.MENUS, TreeVersionCache.GRANTS),
+        build,
+        i18n.tr("success")
+    )
 
 
 @router.get("/{menu_id}", response_model=Response)
-@require_permissions(["menu:query"])
 async def get_menu(
     menu_id: str,
-    current_user: User = Depends(get_current_user),
+    current_user: User = Depends(require_permissions("menu:query")),
     db: AsyncSession = Depends(get_db)
 ):
     """
@@ -114,34 +126,22 @@ async def get_menu(
     
     Requires menu:query permission.
     """
-    menu = await menu_service.get_menu_by_id(db, menu_id)
+    # Menus of other tenants are filtered out in the query (404, not 403)
+    menu = await menu_service.get_menu_by_id(db, menu_id, tenant_scope(current_user))
     
     if not menu:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
-            detail=i18n.t("resource_not_found")
-        )
-    
-    # Check tenant
-    if menu.tenant_id != current_user.tenant_id and current_user.user_type != 0:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail=i18n.t("forbidden")
+            detail=i18n.tr("resource_not_found")
         )
     
-    return {
-        "code": 200,
-        "message": i18n.t("success"),
-        "data": MenuResponse.model_validate(menu),
-        "timestamp": int(time.time())
-    }
+    return envelope_response(_dump_menus((menu,))[0], i18n.tr("success"))
 
 
 @router.post("", response_model=dict)
-@require_permissions(["menu:create"])
 async def create_menu(
     menu_data: MenuCreate,
-    current_user: User = Depends(get_current_user),
+    current_user: User = Depends(require_permissions("menu:create")),
     db: AsyncSession = Depends(get_db)
 ):
     """Create a new menu."""
@@ -152,9 +152,9 @@ async def create_menu(
         error_msg = str(e)
         # Try to translate common error messages
         if "Invalid parent menu" in error_msg:
-            error_msg = i18n.t("menu.invalid_parent")
+            error_msg = i18n.tr("menu.invalid_parent")
         elif "Circular reference" in error_msg:
-            error_msg = i18n.t("menu.circular_reference")
+            error_msg = i18n.tr("menu.circular_reference")
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=error_msg
@@ -162,30 +162,31 @@ async def create_menu(
     
     return {
         "code": 200,
-        "message": i18n.t("success"),
+        "message": i18n.tr("success"),
         "data": MenuResponse.model_validate(menu),
-        "timestamp": int(time.time())
+        "timestamp": timestamp()
     }
 
 
 @router.put("/{menu_id}", response_model=dict)
-@require_permissions(["menu:update"])
 async def update_menu(
     menu_id: str,
     menu_data: MenuUpdate,
-    current_user: User = Depends(get_current_user),
+    current_user: User = Depends(require_permissions("menu:update")),
     db: AsyncSession = Depends(get_db)
 ):
     """Update a menu."""
+    # Menus of other tenants are filtered out in the UPDATE (404). A ValueError
+    # becomes an HTTPException, so get_db rolls the UPDATE back
     try:
-        menu = await menu_service.update_menu(db, menu_id, menu_data)
+        menu = await menu_service.update_menu(db, menu_id, menu_data, tenant_scope(current_user))
     except ValueError as e:
         error_msg = str(e)
         # Try to translate common error messages
         if "Invalid parent menu" in error_msg:
-            error_msg = i18n.t("menu.invalid_parent")
+            error_msg = i18n.tr("menu.invalid_parent")
         elif "Circular reference" in error_msg:
-            error_msg = i18n.t("menu.circular_reference")
+            error_msg = i18n.tr("menu.circular_reference")
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=error_msg
@@ -194,40 +195,39 @@ async def update_menu(
     if not menu:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
-            detail=i18n.t("resource_not_found")
+            detail=i18n.tr("resource_not_found")
         )
     
     await db.commit()
     
     return {
         "code": 200,
-        "message": i18n.t("success"),
+        "message": i18n.tr("success"),
         "data": MenuResponse.model_validate(menu),
-        "timestamp": int(time.time())
+        "timestamp": timestamp()
     }
 
 
 @router.delete("/{menu_id}", response_model=dict)
-@require_permissions(["menu:delete"])
 async def delete_menu(
     menu_id: str,
-    current_user: User = Depends(get_current_user),
+    current_user: User = Depends(require_permissions("menu:delete")),
     db: AsyncSession = Depends(get_db)
 ):
     """Delete a menu."""
-    success = await menu_service.delete_menu(db, menu_id)
+    success = await menu_service.delete_menu(db, menu_id, tenant_scope(current_user))
     
     if not success:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
-            detail=i18n.t("resource_not_found")
+            detail=i18n.tr("resource_not_found")
         )
     
     await db.commit()
     
     return {
         "code": 200,
-        "message": i18n.t("success"),
+        "message": i18n.tr("success"),
         "data": None,
-        "timestamp": int(time.time())
+        "timestamp": timestamp()
     }
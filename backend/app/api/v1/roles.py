@@ -2,27 +2,30 @@
 Role API endpoints.
 """
 from typing import List
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, status
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core import get_db
-from app.api.deps import get_current_user
-from app.core.permissions import require_permissions
+from app.api.deps import require_permissions
 from app.models.user import User
 from app.schemas.role import RoleCreate, RoleUpdate, RoleResponse, RoleWithPermissions
 from app.schemas.permission import PermissionResponse, PermissionTreeNode
 from app.services.role_service import role_service
 from app.services.permission_service import permission_service
 from app.core.i18n import i18n
-import time
+from app.utils.cache import TreeVersionCache
+from app.utils.response import envelope_response, row_dumper, timestamp, tree_response
 
 router = APIRouter(prefix="/roles", tags=["Roles"])
 
+# Role/permission rows are plain columns: read them into dicts without validation
+_dump_roles = row_dumper(RoleResponse)
+_dump_permissions = row_dumper(PermissionResponse)
+
 
 @router.get("", response_model=dict)
-@require_permissions("role:list")
 async def list_roles(
-    current_user: User = Depends(get_current_user),
+    current_user: User = Depends(require_permissions("role:list")),
     db: AsyncSession = Depends(get_db)
 ):
     """
@@ -32,47 +35,34 @@ async def list_roles(
     """
     roles = await role_service.get_roles(db, current_user.tenant_id)
     
-    return {
-        "code": 200,
-        "message": i18n.t("success"),
-        "data": [RoleResponse.model_validate(r) for r in roles],
-        "timestamp": int(time.time())
-    }
+    return envelope_response(_dump_roles(roles), i18n.tr("success"))
 
 
 @router.get("/permissions/tree", response_model=dict)
-@require_permissions("role:list")
 async def get_permission_tree(
-    current_user: User = Depends(get_current_user),
+    request: Request,
+    current_user: User = Depends(require_permissions("role:list")),
     db: AsyncSession = Depends(get_db)
 ):
     """
     Get permission tree.
     
     Requires permission: role:list
+    Conditional GET and Redis-cached: both follow the permissions version.
     """
-    import logging
-    logger = logging.getLogger(__name__)
-    
-    permissions = await permission_service.get_permissions(db, current_user.tenant_id)
-    logger.info(f"Found {len(permissions)} permissions for tenant_id={current_user.tenant_id}")
-    
-    tree = permission_service.build_permission_tree(permissions)
-    logger.info(f"Built permission tree with {len(tree)} root nodes")
-    
-    return {
-        "code": 200,
-        "message": i18n.t("success"),
-        "data": tree,
-        "timestamp": int(time.time())
-    }
+    return await tree_response(
+        request,
+        f"permissions:{current_user.tenant_id}",
+        (TreeVersionCache.PERMISSIONS,),
+        lambda: permission_service.get_permission_tree(db, current_user.tenant_id),
+        i18n.tr("success")
+    )
 
 
 @router.get("/{role_id}", response_model=dict)
-@require_permissions("role:query")
 async def get_role(
     role_id: str,
-    current_user: User = Depends(get_current_user),
+    current_user: User = Depends(require_permissions("role:query")),
     db: AsyncSession = Depends(get_db)
 ):
     """
@@ -80,34 +70,32 @@ async def get_role(
     
     Requires permission: role:query
     """
-    role = await role_service.get_role_by_id(db, role_id)
+    role = await role_service.get_role_by_id(db, role_id, load_permissions=True)
     
     if not role:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
-            detail=i18n.t("not_found")
+            detail=i18n.tr("not_found")
         )
     
-    # Get role permissions
-    permissions = await role_service.get_role_permissions(db, role_id)
+    # Permissions were loaded with the role, in no particular order: id breaks
+    # ties between equal sort values so the order is stable
+    permissions = sorted(
+        (p for p in role.permissions if not p.is_deleted),
+        key=lambda p: (p.sort, p.id)
+    )
     
     # Build response
-    role_dict = RoleResponse.model_validate(role).model_dump()
-    role_dict["permissions"] = [PermissionResponse.model_validate(p) for p in permissions]
+    role_dict = _dump_roles((role,))[0]
+    role_dict["permissions"] = _dump_permissions(permissions)
     
-    return {
-        "code": 200,
-        "message": i18n.t("success"),
-        "data": role_dict,
-        "timestamp": int(time.time())
-    }
+    return envelope_response(role_dict, i18n.tr("success"))
 
 
 @router.post("", response_model=dict)
-@require_permissions("role:create")
 async def create_role(
     role_data: RoleCreate,
-    current_user: User = Depends(get_current_user),
+    current_user: User = Depends(require_permissions("role:create")),
     db: AsyncSession = Depends(get_db)
 ):
     """
@@ -121,9 +109,9 @@ async def create_role(
         
         return {
             "code": 200,
-            "message": i18n.t("success"),
+            "message": i18n.tr("success"),
             "data": RoleResponse.model_validate(role),
-            "timestamp": int(time.time())
+            "timestamp": timestamp()
         }
     except ValueError as e:
         raise HTTPException(
@@ -133,11 +121,10 @@ async def create_role(
 
 
 @router.put("/{role_id}", response_model=dict)
-@require_permissions("role:update")
 async def update_role(
     role_id: str,
     role_data: RoleUpdate,
-    current_user: User = Depends(get_current_user),
+    current_user: User = Depends(require_permissions("role:update")),
     db: AsyncSession = Depends(get_db)
 ):
     """
@@ -151,16 +138,16 @@ async def update_role(
         if not role:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
-                detail=i18n.t("not_found")
+                detail=i18n.tr("not_found")
             )
         
         await db.commit()
         
         return {
             "code": 200,
-            "message": i18n.t("success"),
+            "message": i18n.tr("success"),
             "data": RoleResponse.model_validate(role),
-            "timestamp": int(time.time())
+            "timestamp": timestamp()
         }
     except ValueError as e:
         raise HTTPException(
@@ -170,10 +157,9 @@ async def update_role(
 
 
 @router.delete("/{role_id}", response_model=dict)
-@require_permissions("role:delete")
 async def delete_role(
     role_id: str,
-    current_user: User = Depends(get_current_user),
+    current_user: User = Depends(require_permissions("role:delete")),
     db: AsyncSession = Depends(get_db)
 ):
     """
@@ -187,16 +173,16 @@ async def delete_role(
         if not success:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
-                detail=i18n.t("not_found")
+                detail=i18n.tr("not_found")
             )
         
         await db.commit()
         
         return {
             "code": 200,
-            "message": i18n.t("success"),
+            "message": i18n.tr("success"),
             "data": None,
-            "timestamp": int(time.time())
+            "timestamp": timestamp()
         }
     except ValueError as e:
         raise HTTPException(
@@ -1,8 +1,11 @@
 """
 System initialization API.
 """
+import asyncio
+from typing import Dict
+
 from fastapi import APIRouter, Depends, status
-from sqlalchemy import select
+from sqlalchemy import exists, insert, literal, select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core import get_db
@@ -10,9 +13,23 @@ from app.models.user import User
 from app.core.security import get_password_hash
 from app.schemas.common import Response
 from app.core.config import settings
+from app.utils.snowflake import generate_id
+from app.utils.response import timestamp
 
 router = APIRouter(prefix="/system", tags=["System"])
 
+# bcrypt hash of the admin password, computed once per process and password
+_admin_password_hashes: Dict[str, str] = {}
+
+
+async def _admin_password_hash(password: str) -> str:
+    """Hash the admin password off the event loop, reusing an earlier hash."""
+    hashed = _admin_password_hashes.get(password)
+    if hashed is None:
+        hashed = await asyncio.to_thread(get_password_hash, password)
+        _admin_password_hashes[password] = hashed
+    return hashed
+
 
 @router.post("/init", response_model=Response)
 async def init_system_data(
@@ -24,23 +41,7 @@ async def init_system_data(
     This endpoint should be called once when the application starts.
     It checks if the admin user exists, and creates it if not.
     """
-    import time
-    current_time = int(time.time())
-    
-    # Check if admin exists
-    stmt = select(User).where(User.username == "admin")
-    result = await db.execute(stmt)
-    existing_admin = result.scalar_one_or_none()
-    
-    if existing_admin:
-        return Response(
-            code=400,
-            message="System already initialized (admin user exists)",
-            timestamp=current_time
-        )
-    
-    # Initialize Snowflake if needed (usually done in main.py, but safe to ensure)
-    # We assume app startup has handles global init, so we just focus on DB data
+    current_time = timestamp()
     
     # Create admin user
     # Password should be set via environment variable ADMIN_PASSWORD
@@ -48,30 +49,32 @@ async def init_system_data(
     import os
     admin_password = os.getenv("ADMIN_PASSWORD", "admin123")  # Change in production!
     
-    admin = User(
-        username="admin",
-        password=get_password_hash(admin_password),
-        email="admin@example.com",
-        real_name="Super Admin",
-        user_type=0,  # Superadmin
-        status=1,
-        tenant_id="0"  # System tenant
+    # Insert the admin unless a user named "admin" exists, in one statement:
+    # INSERT ... SELECT ... WHERE NOT EXISTS ... RETURNING. Core inserts skip
+    # the ORM snowflake hook, so the ID is generated here.
+    admin_values = {
+        "id": generate_id(),
+        "username": "admin",
+        "password": await _admin_password_hash(admin_password),
+        "email": "admin@example.com",
+        "real_name": "Super Admin",
+        "user_type": 0,  # Superadmin
+        "status": 1,
+        "tenant_id": "0",  # System tenant
+    }
+    stmt = (
+        insert(User)
+        .from_select(
+            list(admin_values),
+            select(*(literal(value) for value in admin_values.values()))
+            .where(~exists().where(User.username == "admin"))
+        )
+        .returning(User.id, User.username)
     )
-    db.add(admin)
     
     try:
+        admin = (await db.execute(stmt)).first()
         await db.commit()
-        await db.refresh(admin)
-        
-        return Response(
-            code=200,
-            message="System initialized successfully",
-            data={
-                "username": admin.username,
-                "user_id": str(admin.id)
-            },
-            timestamp=current_time
-        )
     except Exception as e:
         await db.rollback()
         return Response(
@@ -79,3 +82,20 @@ async def init_system_data(
             message=f"Initialization failed: {str(e)}",
             timestamp=current_time
         )
+    
+    if admin is None:
+        return Response(
+            code=400,
+            message="System already initialized (admin user exists)",
+            timestamp=current_time
+        )
+    
+    return Response(
+        code=200,
+        message="System initialized successfully",
+        data={
+            "username": admin.username,
+            "user_id": str(admin.id)
+        },
+        timestamp=current_time
+    )
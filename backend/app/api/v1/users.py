@@ -1,29 +1,77 @@
 """
 User management API endpoints.
 """
+from operator import attrgetter
 from typing import List, Optional
 from datetime import datetime
-import time
 
 from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi.responses import Response as FastAPIResponse, StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core import get_db
 from app.api import deps
-from app.schemas import UserListResponse, UserCreate, UserUpdate, UserResponse
+from app.schemas import UserListResponse, UserCreate, UserUpdate, UserResponse, UserPasswordReset
 from app.schemas.common import Response, PageResponse
 from app.services.user_service import user_service
 from app.core.exceptions import BusinessException
 from app.core.i18n import i18n
 from app.models.user import User
+from app.utils.response import envelope, envelope_response, row_dumper, stream_envelope
 
 router = APIRouter(prefix="/users", tags=["User Management"])
 
+# User rows are read straight into dicts (no per-row validation); the
+# role fields are filled in from the loaded roles
+_dump_users = row_dumper(UserResponse, exclude=("roles", "role_ids"))
+
+
+# Pages larger than this are streamed instead of serialized in one piece
+_STREAM_PAGE_SIZE = 50
+
+
+# Role summary fields of user entries, read in one attrgetter call per role
+_ROLE_FIELDS = ("id", "name", "code")
+_role_values = attrgetter(*_ROLE_FIELDS)
+
+
+def _role_items(roles) -> list:
+    """Role summaries of a user detail/list entry."""
+    return [dict(zip(_ROLE_FIELDS, values)) for values in map(_role_values, roles)]
+
+
+def _set_roles(item: dict, roles) -> dict:
+    """Fill in role_ids and roles of a user entry from one pass over its roles."""
+    values = list(map(_role_values, roles))
+    item["role_ids"] = [role_id for role_id, _, _ in values]
+    item["roles"] = [dict(zip(_ROLE_FIELDS, triple)) for triple in values]
+    return item
+
+
+def _not_found() -> FastAPIResponse:
+    """404 envelope; its serialized head is cached per locale by envelope_bytes."""
+    return envelope_response(None, i18n.tr("resource_not_found"), 404)
+
+
+def _user_item(user: User) -> dict:
+    """User list entry with its role fields."""
+    # Roles are eager-loaded with the page (no lazy load here)
+    return _set_roles(_dump_users((user,))[0], user.roles or ())
+
+
+def _page_fields(total: Optional[int], next_cursor: Optional[str]) -> dict:
+    """Paging fields of a user list response."""
+    return {
+        "total": total,
+        "next_cursor": next_cursor,
+        "has_more": next_cursor is not None
+    }
+
 
 @router.get("", response_model=Response)
 async def get_users(
-    page: int = 1,
-    page_size: int = 20,
+    page: int = Query(1, ge=1),
+    page_size: int = Query(20, ge=1, le=100),
     username: str = None,
     email: str = None,
     phone: str = None,
@@ -32,6 +80,8 @@ async def get_users(
     dept_id: str = None,
     last_login_start: Optional[datetime] = Query(None, description="最后登录开始时间"),
     last_login_end: Optional[datetime] = Query(None, description="最后登录结束时间"),
+    cursor: Optional[str] = Query(None, description="游标(上一页返回的next_cursor),传入时忽略page且不返回total"),
+    include_total: bool = Query(True, description="是否返回总数(false时无法由当前页推算则total为null)"),
     current_user: User = Depends(deps.require_permissions("user:list")),
     db: AsyncSession = Depends(get_db),
 ):
@@ -39,11 +89,7 @@ async def get_users(
     Get user list.
     Requires permission: user:list
     """
-    
-    users, total = await user_service.get_user_list(
-        db,
-        page=page,
-        page_size=page_size,
+    filters = dict(
         username=username,
         email=email,
         phone=phone,
@@ -52,61 +98,46 @@ async def get_users(
         dept_id=dept_id,
         last_login_start=last_login_start,
         last_login_end=last_login_end,
-        tenant_id=current_user.tenant_id
+        tenant_id=current_user.tenant_id,
     )
     
-    # Manual conversion because generic Response has data: dict
-    # Serialize to dict to ensure datetime fields are properly converted
-    # Convert roles from Role objects to dictionaries before validation
-    items = []
-    for u in users:
-        # Get roles for this user
-        roles = u.roles if hasattr(u, 'roles') and u.roles else []
-        # Convert roles to dictionaries
-        roles_dict = [{"id": role.id, "name": role.name, "code": role.code} for role in roles]
-        role_ids = [role.id for role in roles]
-        
-        # Temporarily remove roles from user object to avoid validation error
-        # Create a copy of user attributes without roles
-        user_data = {
-            "id": u.id,
-            "username": u.username,
-            "real_name": u.real_name,
-            "nickname": u.nickname,
-            "email": u.email,
-            "phone": u.phone,
-            "user_type": u.user_type,
-            "dept_id": u.dept_id,
-            "position": u.position,
-            "status": u.status,
-            "avatar": u.avatar,
-            "gender": u.gender,
-            "last_login_time": u.last_login_time,
-            "last_login_ip": u.last_login_ip,
-            "login_count": u.login_count,
-            "password_updated_at": u.password_updated_at,
-            "must_change_password": u.must_change_password,
-            "created_at": u.created_at,
-            "updated_at": u.updated_at,
-            "tenant_id": u.tenant_id,
-            "dept_name": getattr(u, 'dept_name', None),
-            "roles": roles_dict,  # Already converted to dict
-            "role_ids": role_ids
-        }
-        
-        # Create user dict using model_validate with the prepared data
-        user_dict = UserResponse.model_validate(user_data).model_dump(mode='json')
-        items.append(user_dict)
+    # Large pages are streamed row by row instead of built in memory
+    if page_size > _STREAM_PAGE_SIZE:
+        try:
+            query = await user_service.user_list_query(
+                db, page=page, page_size=page_size, cursor=cursor, **filters
+            )
+        except ValueError as e:
+            return envelope(None, str(e), 400)
+        page_info = {}
+        items = (
+            _user_item(user)
+            async for user in user_service.stream_user_list(
+                *query, page=page, page_size=page_size, page_info=page_info,
+                cursor=cursor, include_total=include_total
+            )
+        )
+        return StreamingResponse(
+            stream_envelope(items, lambda: _page_fields(**page_info), i18n.tr("success")),
+            media_type="application/json"
+        )
     
-    return {
-        "code": 200,
-        "message": i18n.t("success"),
-        "data": {
-            "items": items,
-            "total": total
-        },
-        "timestamp": int(time.time()),
-    }
+    try:
+        users, total, next_cursor = await user_service.get_user_list(
+            db,
+            page=page,
+            page_size=page_size,
+            cursor=cursor,
+            include_total=include_total,
+            **filters
+        )
+    except ValueError as e:
+        return envelope(None, str(e), 400)
+    
+    return envelope_response(
+        {"items": [_user_item(user) for user in users], **_page_fields(total, next_cursor)},
+        i18n.tr("success")
+    )
 
 
 @router.get("/{user_id}", response_model=Response)
@@ -119,38 +150,21 @@ async def get_user(
     Get user details by ID.
     Requires permission: user:detail
     """
-    user = await user_service.get_by_id(db, user_id)
+    # Users of other tenants are filtered out in the query (404, not 403)
+    user = await user_service.get_by_id(
+        db, user_id, load_roles=True, tenant_id=deps.tenant_scope(current_user)
+    )
     
     if not user:
-        return {
-            "code": 404,
-            "message": i18n.t("resource_not_found"),
-            "data": None,
-            "timestamp": int(time.time()),
-        }
+        return _not_found()
     
-    # Check tenant access
-    if user.tenant_id != current_user.tenant_id and current_user.user_type != 0:
-        return {
-            "code": 403,
-            "message": i18n.t("forbidden"),
-            "data": None,
-            "timestamp": int(time.time()),
-        }
+    # Roles were loaded with the user
+    roles = [role for role in user.roles if not role.is_deleted]
+    user_dict = _dump_users((user,))[0]
     
-    # Get user roles
-    roles = await user_service.get_user_roles(db, user_id)
-    user_dict = UserResponse.model_validate(user).model_dump(mode='json')
+    _set_roles(user_dict, roles)
     
-    user_dict["role_ids"] = [role.id for role in roles]
-    user_dict["roles"] = [{"id": role.id, "name": role.name, "code": role.code} for role in roles]
-    
-    return {
-        "code": 200,
-        "message": i18n.t("success"),
-        "data": user_dict,
-        "timestamp": int(time.time()),
-    }
+    return envelope_response(user_dict, i18n.tr("success"))
 
 
 @router.get("/{user_id}/roles", response_model=Response)
@@ -163,33 +177,17 @@ async def get_user_roles(
     Get user's roles.
     Requires permission: user:detail
     """
-    user = await user_service.get_by_id(db, user_id)
+    # Users of other tenants are filtered out in the query (404, not 403)
+    user = await user_service.get_by_id(
+        db, user_id, load_roles=True, tenant_id=deps.tenant_scope(current_user)
+    )
     
     if not user:
-        return {
-            "code": 404,
-            "message": i18n.t("resource_not_found"),
-            "data": None,
-            "timestamp": int(time.time()),
-        }
-    
-    # Check tenant access
-    if user.tenant_id != current_user.tenant_id and current_user.user_type != 0:
-        return {
-            "code": 403,
-            "message": i18n.t("forbidden"),
-            "data": None,
-            "timestamp": int(time.time()),
-        }
+        return _not_found()
     
-    roles = await user_service.get_user_roles(db, user_id)
+    roles = [role for role in user.roles if not role.is_deleted]
     
-    return {
-        "code": 200,
-        "message": i18n.t("success"),
-        "data": [{"id": role.id, "name": role.name, "code": role.code} for role in roles],
-        "timestamp": int(time.time()),
-    }
+    return envelope_response(_role_items(roles), i18n.tr("success"))
 
 
 @router.post("", response_model=Response)
@@ -210,19 +208,9 @@ async def create_user(
             tenant_id=current_user.tenant_id
         )
     except ValueError as e:
-        return {
-            "code": 400,
-            "message": str(e),
-            "data": None,
-            "timestamp": int(time.time()),
-        }
+        return envelope(None, str(e), 400)
         
-    return {
-        "code": 200,
-        "message": i18n.t("user_created"),
-        "data": {"id": new_user.id},
-        "timestamp": int(time.time()),
-    }
+    return envelope({"id": new_user.id}, i18n.tr("user_created"))
 
 
 @router.put("/{user_id}", response_model=Response)
@@ -236,63 +224,33 @@ async def update_user(
     Update user.
     Requires permission: user:update
     """
-    # Get the user to update
-    user = await user_service.get_by_id(db, user_id)
-    if not user:
-        return {
-            "code": 404,
-            "message": i18n.t("resource_not_found"),
-            "data": None,
-            "timestamp": int(time.time()),
-        }
-    
-    # Check tenant access
-    if user.tenant_id != current_user.tenant_id and current_user.user_type != 0:
-        return {
-            "code": 403,
-            "message": i18n.t("forbidden"),
-            "data": None,
-            "timestamp": int(time.time()),
-        }
-
-    # Update user (username cannot be changed via UserUpdate schema)
+    # Update user (username cannot be changed via UserUpdate schema).
+    # Users of other tenants are filtered out in the UPDATE (404, not 403)
     try:
         updated_user = await user_service.update_user(
             db,
             user_id,
-            user_in.model_dump(exclude_unset=True)
+            user_in.model_dump(exclude_unset=True),
+            tenant_id=deps.tenant_scope(current_user)
         )
     except ValueError as e:
-        return {
-            "code": 400,
-            "message": str(e),
-            "data": None,
-            "timestamp": int(time.time()),
-        }
+        # The columns may already be written: discard them
+        await db.rollback()
+        return envelope(None, str(e), 400)
     
     if not updated_user:
-        return {
-            "code": 404,
-            "message": i18n.t("resource_not_found"),
-            "data": None,
-            "timestamp": int(time.time()),
-        }
+        return _not_found()
     
     # Commit the transaction
     await db.commit()
         
-    return {
-        "code": 200,
-        "message": i18n.t("user_updated"),
-        "data": { "id": user_id },
-        "timestamp": int(time.time()),
-    }
+    return envelope({"id": user_id}, i18n.tr("user_updated"))
 
 
 @router.post("/{user_id}/reset-password", response_model=Response)
 async def reset_password(
     user_id: str,
-    password_in: dict, # { "password": "new_password" }
+    password_in: UserPasswordReset,
     current_user: User = Depends(deps.require_permissions("user:reset-password")),
     db: AsyncSession = Depends(get_db),
 ):
@@ -300,31 +258,15 @@ async def reset_password(
     Reset user password (Admin).
     Requires permission: user:reset-password
     """
-    new_password = password_in.get("password")
-    if not new_password or len(new_password) < 6:
-         return {
-            "code": 400,
-            "message": i18n.t("password_min_length"),
-            "data": None,
-            "timestamp": int(time.time()),
-        }
-
-    success = await user_service.reset_password(db, user_id, new_password)
+    # The minimum length is checked by UserPasswordReset (422)
+    success = await user_service.reset_password(
+        db, user_id, password_in.password, tenant_id=deps.tenant_scope(current_user)
+    )
     
     if not success:
-         return {
-            "code": 404,
-            "message": i18n.t("resource_not_found"),
-            "data": None,
-            "timestamp": int(time.time()),
-        }
+        return _not_found()
         
-    return {
-        "code": 200,
-        "message": i18n.t("password_reset_success"),
-        "data": None,
-        "timestamp": int(time.time()),
-    }
+    return envelope(None, i18n.tr("password_reset_success"))
 
 
 @router.delete("/{user_id}", response_model=Response)
@@ -337,19 +279,9 @@ async def delete_user(
     Delete user.
     Requires permission: user:delete
     """
-    success = await user_service.delete_user(db, user_id)
+    success = await user_service.delete_user(db, user_id, tenant_id=deps.tenant_scope(current_user))
     
     if not success:
-          return {
-            "code": 404,
-            "message": i18n.t("resource_not_found"),
-            "data": None,
-            "timestamp": int(time.time()),
-        }
+        return _not_found()
         
-    return {
-        "code": 200,
-        "message": i18n.t("user_deleted"),
-        "data": None,
-        "timestamp": int(time.time()),
-    }
+    return envelope(None, i18n.tr("user_deleted"))
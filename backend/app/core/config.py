@@ -1,7 +1,7 @@
 """
 FastAPI application configuration using Pydantic Settings.
 """
-from typing import List, Union
+from typing import FrozenSet, List, Union
 from pydantic import field_validator
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
@@ -30,11 +30,17 @@ class Settings(BaseSettings):
     DATABASE_URL: str = ""  # REQUIRED: Set via environment variable
     DATABASE_ECHO: bool = False
     DATABASE_POOL_SIZE: int = 20
-    DATABASE_MAX_OVERFLOW: int = 10
+    DATABASE_MAX_OVERFLOW: int = 40
+    DATABASE_POOL_TIMEOUT: int = 30
+    DATABASE_POOL_RECYCLE: int = 1800
+    DATABASE_STATEMENT_CACHE_SIZE: int = 1024
     
     # Redis
     REDIS_URL: str = "redis://localhost:6379/0"
     REDIS_PASSWORD: str = ""  # Set via environment variable
+    REDIS_MAX_CONNECTIONS: int = 64
+    REDIS_POOL_TIMEOUT: int = 5  # Seconds to wait for a free connection
+    REDIS_HEALTH_CHECK_INTERVAL: int = 30
 
     
     # Security
@@ -47,6 +53,9 @@ class Settings(BaseSettings):
     PASSWORD_MIN_LENGTH: int = 8
     PASSWORD_EXPIRE_DAYS: int = 30 # Password requires change every 30 days
     PASSWORD_REQUIRE_COMPLEXITY: bool = True # Require Upper, Lower, Special chars
+    # Skip bcrypt for a (password, hash) pair already verified within this many
+    # seconds (in-process, HMAC-keyed). 0 disables; a memory/security tradeoff
+    PASSWORD_VERIFY_CACHE_SECONDS: int = 0
     SINGLE_SESSION_MODE: bool = False # Temporarily disabled due to Redis auth issue
 
     
@@ -57,7 +66,8 @@ class Settings(BaseSettings):
 
     
     # CORS
-    CORS_ORIGINS: List[str] = ["http://localhost:3000", "http://localhost:5173"]
+    # A set: CORSMiddleware tests `origin in allow_origins` on every request
+    CORS_ORIGINS: FrozenSet[str] = frozenset({"http://localhost:3000", "http://localhost:5173"})
     CORS_ALLOW_CREDENTIALS: bool = True
     CORS_ALLOW_METHODS: List[str] = ["*"]
     CORS_ALLOW_HEADERS: List[str] = ["*"]
@@ -80,11 +90,11 @@ class Settings(BaseSettings):
     
     @field_validator("CORS_ORIGINS", mode="before")
     @classmethod
-    def parse_cors_origins(cls, v: Union[str, List[str]]) -> List[str]:
+    def parse_cors_origins(cls, v: Union[str, List[str]]) -> FrozenSet[str]:
         """Parse CORS origins from string or list."""
         if isinstance(v, str):
-            return [origin.strip() for origin in v.split(",")]
-        return v
+            return frozenset(origin.strip() for origin in v.split(","))
+        return frozenset(v)
     
     @property
     def is_production(self) -> bool:
@@ -5,6 +5,9 @@ from typing import Any, Optional
 
 class AppException(Exception):
     """Base exception for application."""
+    # Slots instead of a per-instance __dict__
+    __slots__ = ("code", "message", "data", "http_status_code")
+    
     def __init__(
         self, 
         code: int = 500, 
@@ -23,6 +26,8 @@ class BusinessException(AppException):
     Business logic exception.
     Usually returns HTTP 200 with specific error code, or HTTP 400.
     """
+    __slots__ = ()
+    
     def __init__(
         self, 
         code: int = 400, 
@@ -41,6 +46,8 @@ class SystemException(AppException):
     """
     System level exception.
     """
+    __slots__ = ()
+    
     def __init__(
         self, 
         code: int = 500, 
@@ -59,20 +66,28 @@ class SystemException(AppException):
 
 class AuthException(BusinessException):
     """Authentication failed."""
+    __slots__ = ()
+    
     def __init__(self, message: str = "Authentication failed", data: Any = None):
         super().__init__(code=401, message=message, data=data, http_status_code=401)
 
 class PermissionException(BusinessException):
     """Permission denied."""
+    __slots__ = ()
+    
     def __init__(self, message: str = "Permission denied", data: Any = None):
         super().__init__(code=403, message=message, data=data, http_status_code=403)
 
 class NotFoundException(BusinessException):
     """Resource not found."""
+    __slots__ = ()
+    
     def __init__(self, message: str = "Resource not found", data: Any = None):
         super().__init__(code=404, message=message, data=data, http_status_code=404)
 
 class ValidationError(BusinessException):
     """Data validation error."""
+    __slots__ = ()
+    
     def __init__(self, message: str = "Validation error", data: Any = None):
         super().__init__(code=422, message=message, data=data, http_status_code=422)
@@ -1,45 +1,70 @@
 
-import json
-import os
 from contextvars import ContextVar
+from pathlib import Path
 from typing import Dict, Optional
 
+import orjson
+
 from app.core.config import settings
 
+_LOCALES_DIR = Path(__file__).resolve().parents[1] / "locales"
+
 # Thread-safe context variable to store the current request's locale
 _request_locale: ContextVar[str] = ContextVar("request_locale", default="zh")
+# Translation table of that locale, resolved once per request by set_locale
+_request_translations: ContextVar[Optional[Dict[str, str]]] = ContextVar("request_translations", default=None)
 
 class I18n:
     def __init__(self):
-        self._locales: Dict[str, Dict[str, str]] = {}
+        # Per locale: dotted key ("menu.invalid_parent") -> text
+        self._flat: Dict[str, Dict[str, str]] = {}
         self.default_locale = "zh"
         self.supported_locales = ["zh", "en", "ja"]
         self.load_locales()
 
     def load_locales(self):
-        """Load JSON files from app/locales directory."""
-        base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-        locales_dir = os.path.join(base_dir, "locales")
-        
-        for lang in self.supported_locales:
-            file_path = os.path.join(locales_dir, f"{lang}.json")
-            if os.path.exists(file_path):
-                with open(file_path, "r", encoding="utf-8") as f:
-                    self._locales[lang] = json.load(f)
-            else:
-                print(f"Warning: Locale file not found: {file_path}")
-                self._locales[lang] = {}
+        """
+        (Re)load translations from the app/locales directory.
+        Only the default locale is loaded here; the others are loaded by
+        set_locale when a request first asks for them.
+        """
+        self._flat.clear()
+        self._load_locale(self.default_locale)
+
+    def _load_locale(self, lang: str) -> None:
+        """Read and flatten one locale file."""
+        file_path = _LOCALES_DIR / f"{lang}.json"
+        try:
+            self._flat[lang] = _flatten(orjson.loads(file_path.read_bytes()))
+        except FileNotFoundError:
+            print(f"Warning: Locale file not found: {file_path}")
+            self._flat[lang] = {}
 
     def get_locale(self) -> str:
         """Get current locale from context."""
         return _request_locale.get()
 
     def set_locale(self, locale: str):
-        """Set current locale in context."""
-        if locale in self.supported_locales:
-            _request_locale.set(locale)
-        else:
-            _request_locale.set(self.default_locale)
+        """Set current locale in context, loading its translations on first use."""
+        if locale not in self.supported_locales:
+            locale = self.default_locale
+        elif locale not in self._flat:
+            self._load_locale(locale)
+        _request_locale.set(locale)
+        _request_translations.set(self._flat[locale])
+
+    def tr(self, key: str) -> str:
+        """
+        Translate key to current locale, without formatting.
+        Falls back to the default locale, then to the key itself.
+        """
+        translations = _request_translations.get()
+        if translations is None:
+            translations = self._flat[_request_locale.get()]
+        text = translations.get(key)
+        if text is None:
+            text = self._flat[self.default_locale].get(key, key)
+        return text
 
     def t(self, key: str, **kwargs) -> str:
         """
@@ -48,41 +73,26 @@ class I18n:
         Support string formatting via kwargs.
         Support nested keys with dot notation (e.g., "menu.invalid_parent").
         """
-        locale = self.get_locale()
-        translations = self._locales.get(locale, {})
-        
-        # Support nested keys with dot notation
-        keys = key.split(".")
-        text = translations
-        for k in keys:
-            if isinstance(text, dict):
-                text = text.get(k)
-            else:
-                text = None
-                break
-        
-        # Fallback to default locale if not found
-        if text is None:
-            default_translations = self._locales.get(self.default_locale, {})
-            text = default_translations
-            for k in keys:
-                if isinstance(text, dict):
-                    text = text.get(k)
-                else:
-                    text = None
-                    break
-        
-        # Final fallback to key itself
-        if text is None:
-            text = key
+        text = self.tr(key)
             
-        if kwargs and isinstance(text, str):
+        if kwargs:
             try:
                 return text.format(**kwargs)
             except Exception:
                 pass
                 
-        return text if isinstance(text, str) else key
+        return text
+
+
+def _flatten(translations: dict, prefix: str = "") -> Dict[str, str]:
+    """Flatten nested translations into dotted keys, keeping only texts."""
+    flat: Dict[str, str] = {}
+    for key, value in translations.items():
+        if isinstance(value, dict):
+            flat.update(_flatten(value, f"{prefix}{key}."))
+        elif isinstance(value, str):
+            flat[f"{prefix}{key}"] = value
+    return flat
 
 # Global instance
 i18n = I18n()
@@ -1,11 +1,58 @@
 """
-Log decorators.
+Log decorators and application logger setup.
 """
+import logging
+import os
+import queue
 from functools import wraps
+from logging.handlers import QueueHandler, QueueListener
 from typing import Optional
 
 from fastapi import Request
 
+from app.core.config import settings
+
+# Records of the "app" logger tree are queued by the caller and written by the
+# listener thread, so logging never blocks the event loop on stream/file IO
+_log_queue: queue.SimpleQueue = queue.SimpleQueue()
+_queue_handler = QueueHandler(_log_queue)
+_listener: Optional[QueueListener] = None
+
+
+def start_logging() -> None:
+    """Write the "app" loggers to stderr and settings.LOG_FILE from a background thread."""
+    global _listener
+    if _listener is not None:
+        return
+    
+    log_dir = os.path.dirname(settings.LOG_FILE)
+    if log_dir:
+        os.makedirs(log_dir, exist_ok=True)
+    formatter = logging.Formatter("%(asctime)s %(levelname)s [%(name)s] %(message)s")
+    handlers = [logging.StreamHandler(), logging.FileHandler(settings.LOG_FILE, encoding="utf-8")]
+    for handler in handlers:
+        handler.setFormatter(formatter)
+    
+    _listener = QueueListener(_log_queue, *handlers)
+    _listener.start()
+    
+    logger = logging.getLogger("app")
+    logger.setLevel(settings.LOG_LEVEL.upper())
+    logger.addHandler(_queue_handler)
+    logger.propagate = False
+
+
+def stop_logging() -> None:
+    """Flush queued records and stop the listener thread."""
+    global _listener
+    if _listener is None:
+        return
+    logging.getLogger("app").removeHandler(_queue_handler)
+    _listener.stop()
+    for handler in _listener.handlers:
+        handler.close()
+    _listener = None
+
 
 def log_module(module: str, summary: str):
     """
@@ -2,11 +2,12 @@
 Permission control decorators and data scope filtering.
 """
 from enum import IntEnum
-from typing import List, Callable, Set
+from typing import List, Callable, FrozenSet, Iterable, NamedTuple, Optional, Set
 from functools import wraps
 
+from cachetools import TTLCache
 from fastapi import HTTPException, status, Depends
-from sqlalchemy import select
+from sqlalchemy import and_, select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core import get_db
@@ -14,17 +15,48 @@ from app.api.deps import get_current_user
 from app.models.user import User
 from app.core.i18n import i18n
 
+# In-process copy of each user's UserAccess, in front of the Redis cache, as
+# (grants version, UserAccess). An entry is only used while the Redis-held
+# grants version (TreeVersionCache.GRANTS, read by the auth dependency) still
+# matches, so a revocation handled by one worker reaches the others on their
+# next request instead of after the TTL.
+_permission_cache: TTLCache = TTLCache(maxsize=10_000, ttl=30)
 
-async def clear_user_permission_cache(user_id) -> None:
+
+async def clear_user_permission_cache(db: AsyncSession, user_id) -> None:
     """
     Clear permission cache for a user.
     This should be called when user's roles or permissions change.
     
+    The grants tree version is bumped once db commits.
+    
     Args:
+        db: Database session holding the change
         user_id: User ID
     """
-    from app.utils.cache import PermissionCache
+    from app.utils.cache import PermissionCache, TreeVersionCache
+    _permission_cache.pop(str(user_id), None)
     await PermissionCache.clear_all_user_cache(user_id)
+    TreeVersionCache.bump_after_commit(db, TreeVersionCache.GRANTS)
+
+
+async def clear_users_permission_cache(db: AsyncSession, user_ids: Iterable) -> None:
+    """
+    Clear permission cache for several users at once (one Redis round trip).
+    
+    The grants tree version is bumped once db commits.
+    
+    Args:
+        db: Database session holding the change
+        user_ids: User IDs
+    """
+    from app.utils.cache import PermissionCache, TreeVersionCache
+    user_ids = list(user_ids)
+    for user_id in user_ids:
+        _permission_cache.pop(str(user_id), None)
+    await PermissionCache.clear_users_cache(user_ids)
+    if user_ids:
+        TreeVersionCache.bump_after_commit(db, TreeVersionCache.GRANTS)
 
 
 class DataScope(IntEnum):
@@ -49,6 +81,8 @@ def require_permissions(*permission_codes: str):
     Args:
         *permission_codes: Permission codes required (e.g., "user:list", "user:create")
     """
+    required_permissions = tuple(permission_codes)
+    
     def decorator(func: Callable):
         @wraps(func)
         async def wrapper(*args, **kwargs):
@@ -57,7 +91,7 @@ def require_permissions(*permission_codes: str):
             if not current_user:
                 raise HTTPException(
                     status_code=status.HTTP_401_UNAUTHORIZED,
-                    detail=i18n.t("unauthorized")
+                    detail=i18n.tr("unauthorized")
                 )
             
             # Superadmin bypasses permission check
@@ -75,12 +109,11 @@ def require_permissions(*permission_codes: str):
             # Get user's permissions
             user_permissions = await get_user_permissions(db, current_user)
             
-            # Check if user has all required permissions
-            missing_permissions = set(permission_codes) - user_permissions
-            if missing_permissions:
+            # Check if user has all required permissions (stops at the first missing one)
+            if not all(p in user_permissions for p in required_permissions):
                 raise HTTPException(
                     status_code=status.HTTP_403_FORBIDDEN,
-                    detail=i18n.t("forbidden")
+                    detail=i18n.tr("forbidden")
                 )
             
             return await func(*args, **kwargs)
@@ -103,7 +136,7 @@ def require_any_permission(*permission_codes: str):
             if not current_user:
                 raise HTTPException(
                     status_code=status.HTTP_401_UNAUTHORIZED,
-                    detail=i18n.t("unauthorized")
+                    detail=i18n.tr("unauthorized")
                 )
             
             # Superadmin bypasses permission check
@@ -123,7 +156,7 @@ def require_any_permission(*permission_codes: str):
             if not any(perm in user_permissions for perm in permission_codes):
                 raise HTTPException(
                     status_code=status.HTTP_403_FORBIDDEN,
-                    detail=i18n.t("forbidden")
+                    detail=i18n.tr("forbidden")
                 )
             
             return await func(*args, **kwargs)
@@ -146,7 +179,7 @@ def require_roles(*role_codes: str):
             if not current_user:
                 raise HTTPException(
                     status_code=status.HTTP_401_UNAUTHORIZED,
-                    detail=i18n.t("unauthorized")
+                    detail=i18n.tr("unauthorized")
                 )
             
             # Superadmin bypasses role check
@@ -166,7 +199,7 @@ def require_roles(*role_codes: str):
             if not any(role in user_roles for role in role_codes):
                 raise HTTPException(
                     status_code=status.HTTP_403_FORBIDDEN,
-                    detail=i18n.t("forbidden")
+                    detail=i18n.tr("forbidden")
                 )
             
             return await func(*args, **kwargs)
@@ -175,60 +208,164 @@ def require_roles(*role_codes: str):
     return decorator
 
 
-async def get_user_permissions(db: AsyncSession, user: User) -> Set[str]:
+class UserAccess(NamedTuple):
+    """Everything authorization reads about a user, loaded and cached together."""
+    permissions: FrozenSet[str]
+    roles: FrozenSet[str]
+    data_scope: DataScope
+
+
+async def get_user_access(db: AsyncSession, user: User) -> UserAccess:
     """
-    Get all permission codes for a user.
-    Uses cache to improve performance.
+    Get a user's permission codes, active role codes and data scope.
+    
+    The three are loaded by one query and cached under one key: in-process
+    TTL cache, then Redis, then the database. The result is also kept on the
+    user object, which lives for one request (its session), so repeated
+    checks in a request don't touch any cache.
     
     Args:
         db: Database session
         user: User object
         
     Returns:
-        Set of permission codes
+        UserAccess of the user
+    """
+    access = getattr(user, "_access", None)
+    if access is None:
+        access = await _load_user_access(db, user)
+        user._access = access
+    return access
+
+
+def _access_from_cache(cached: dict) -> UserAccess:
+    """UserAccess from its Redis form {"p": [...], "r": [...], "d": scope}."""
+    return UserAccess(frozenset(cached["p"]), frozenset(cached["r"]), DataScope(cached["d"]))
+
+
+def has_local_access(user_id) -> bool:
+    """Whether the in-process cache holds the access data of a user."""
+    return str(user_id) in _permission_cache
+
+
+def prime_user_access(user: User, cached_data: Optional[str], grants_version: Optional[str]) -> None:
+    """
+    Seed get_user_access with access data read from Redis ahead of time
+    (the auth dependency fetches it together with the blacklist check).
+    
+    A local entry read under another grants version is dropped.
+    
+    Args:
+        user: User object of the current request
+        cached_data: Raw "user:access" value, or None on a cache miss or when
+            it wasn't fetched because the access data is held locally
+        grants_version: Current grants version, or None if Redis is unavailable
+            (the local cache is then bypassed)
     """
     from app.utils.cache import PermissionCache
     
-    # Try to get from cache first
-    cached_permissions = await PermissionCache.get_user_permissions(user.id)
-    if cached_permissions is not None:
-        return cached_permissions
+    user._grants_version = grants_version
+    local_key = str(user.id)
+    local = _permission_cache.get(local_key)
+    if local is not None:
+        if grants_version is not None and local[0] == grants_version:
+            user._access = local[1]
+            return
+        _permission_cache.pop(local_key, None)
+    
+    cached = PermissionCache.decode_access(cached_data)
+    if cached is not None:
+        access = _access_from_cache(cached)
+        _remember_access(user, access)
+        user._access = access
+
+
+def _remember_access(user: User, access: UserAccess) -> None:
+    """Keep access data locally, tagged with the grants version it was read under."""
+    grants_version = getattr(user, "_grants_version", None)
+    if grants_version is not None:
+        _permission_cache[str(user.id)] = (grants_version, access)
+
+
+async def _load_user_access(db: AsyncSession, user: User) -> UserAccess:
+    """Access data of a user: local cache, then Redis, then one DB query."""
+    from app.utils.cache import PermissionCache
+    
+    grants_version = getattr(user, "_grants_version", None)
+    local = _permission_cache.get(str(user.id))
+    if local is not None and grants_version is not None and local[0] == grants_version:
+        return local[1]
     
-    # Cache miss, query from database
+    # Try to get from Redis cache
+    cached = await PermissionCache.get_user_access(user.id)
+    if cached is not None:
+        access = _access_from_cache(cached)
+        _remember_access(user, access)
+        return access
+    
+    # Cache miss: one row per (role, permission) of the user
     from app.models.associations import UserRole, RolePermission
     from app.models.permission import Permission
+    from app.models.role import Role
     
-    # Get user's roles
-    stmt = select(UserRole.role_id).where(UserRole.user_id == user.id)
+    # Only type=2 permissions (actual permissions, not groups)
+    stmt = (
+        select(Role.code, Role.data_scope, Role.status == 1, Role.is_deleted, Permission.code)
+        .select_from(UserRole)
+        .join(Role, Role.id == UserRole.role_id)
+        .outerjoin(RolePermission, RolePermission.role_id == UserRole.role_id)
+        .outerjoin(
+            Permission,
+            and_(
+                Permission.id == RolePermission.permission_id,
+                Permission.status == 1,
+                Permission.is_deleted == False,
+                Permission.type == 2  # Only actual permissions, not groups (type=1)
+            )
+        )
+        .where(UserRole.user_id == user.id)
+        .distinct()
+    )
     result = await db.execute(stmt)
-    role_ids = [row[0] for row in result.all()]
     
-    if not role_ids:
-        permissions = set()
-    else:
-        # Get permissions for these roles
-        # Only get type=2 permissions (actual permissions, not groups)
-        stmt = select(Permission.code).join(
-            RolePermission, RolePermission.permission_id == Permission.id
-        ).where(
-            RolePermission.role_id.in_(role_ids),
-            Permission.status == 1,
-            Permission.is_deleted == False,
-            Permission.type == 2  # Only actual permissions, not groups (type=1)
-        )
-        result = await db.execute(stmt)
-        permissions = {row[0] for row in result.all() if row[0]}
+    # Permissions come from every assigned role (as before); role codes and
+    # the data scope only from active ones
+    permissions = set()
+    roles = set()
+    data_scopes = []
+    for role_code, data_scope, role_active, role_deleted, permission_code in result.tuples():
+        if permission_code:
+            permissions.add(permission_code)
+        if role_active and not role_deleted:
+            if role_code:
+                roles.add(role_code)
+            data_scopes.append(data_scope)
+    access = UserAccess(frozenset(permissions), frozenset(roles), resolve_data_scope(data_scopes))
     
-    # Cache the result (fire and forget, don't wait for completion)
-    await PermissionCache.set_user_permissions(user.id, permissions)
+    # Cache the result
+    _remember_access(user, access)
+    await PermissionCache.set_user_access(user.id, access.permissions, access.roles, access.data_scope.value)
     
-    return permissions
+    return access
+
+
+async def get_user_permissions(db: AsyncSession, user: User) -> FrozenSet[str]:
+    """
+    Get all permission codes for a user (see get_user_access).
+    
+    Args:
+        db: Database session
+        user: User object
+        
+    Returns:
+        Frozen set of permission codes
+    """
+    return (await get_user_access(db, user)).permissions
 
 
 async def get_user_roles(db: AsyncSession, user: User) -> Set[str]:
     """
-    Get all role codes for a user.
-    Uses cache to improve performance.
+    Get all active role codes for a user (see get_user_access).
     
     Args:
         db: Database session
@@ -237,37 +374,29 @@ async def get_user_roles(db: AsyncSession, user: User) -> Set[str]:
     Returns:
         Set of role codes
     """
-    from app.utils.cache import PermissionCache
-    
-    # Try to get from cache first
-    cached_roles = await PermissionCache.get_user_roles(user.id)
-    if cached_roles is not None:
-        return cached_roles
-    
-    # Cache miss, query from database
-    from app.models.associations import UserRole
-    from app.models.role import Role
-    
-    stmt = select(Role.code).join(
-        UserRole, UserRole.role_id == Role.id
-    ).where(
-        UserRole.user_id == user.id,
-        Role.status == 1,
-        Role.is_deleted == False
-    )
-    result = await db.execute(stmt)
-    roles = {row[0] for row in result.all() if row[0]}
-    
-    # Cache the result (fire and forget, don't wait for completion)
-    await PermissionCache.set_user_roles(user.id, roles)
+    return set((await get_user_access(db, user)).roles)
+
+
+def resolve_data_scope(data_scopes: Iterable[Optional[int]]) -> DataScope:
+    """
+    Resolve the effective data scope of a set of role data scopes.
     
-    return roles
+    Args:
+        data_scopes: Data scope values of the user's active roles
+        
+    Returns:
+        The most permissive scope (lowest number), or SELF if there is none
+    """
+    data_scopes = [scope for scope in data_scopes if scope is not None]
+    if not data_scopes:
+        return DataScope.SELF  # Default to most restrictive
+    return DataScope(min(data_scopes))
 
 
 async def get_user_data_scope(db: AsyncSession, user: User) -> DataScope:
     """
     Get user's data scope (the most permissive one if user has multiple roles).
-    Uses cache to improve performance.
+    See get_user_access.
     
     Args:
         db: Database session
@@ -276,37 +405,7 @@ async def get_user_data_scope(db: AsyncSession, user: User) -> DataScope:
     Returns:
         DataScope enum value
     """
-    from app.utils.cache import PermissionCache
-    
-    # Try to get from cache first
-    cached_data_scope = await PermissionCache.get_user_data_scope(user.id)
-    if cached_data_scope is not None:
-        return DataScope(cached_data_scope)
-    
-    # Cache miss, query from database
-    from app.models.associations import UserRole
-    from app.models.role import Role
-    
-    stmt = select(Role.data_scope).join(
-        UserRole, UserRole.role_id == Role.id
-    ).where(
-        UserRole.user_id == user.id,
-        Role.status == 1,
-        Role.is_deleted == False
-    )
-    result = await db.execute(stmt)
-    data_scopes = [row[0] for row in result.all() if row[0] is not None]
-    
-    if not data_scopes:
-        data_scope = DataScope.SELF  # Default to most restrictive
-    else:
-        # Return the most permissive scope (lowest number)
-        data_scope = DataScope(min(data_scopes))
-    
-    # Cache the result
-    await PermissionCache.set_user_data_scope(user.id, data_scope.value)
-    
-    return data_scope
+    return (await get_user_access(db, user)).data_scope
 
 
 async def apply_data_scope_filter(db: AsyncSession, query, user: User, model, user_field: str = "created_by"):
@@ -342,7 +441,7 @@ async def apply_data_scope_filter(db: AsyncSession, query, user: User, model, us
     )
     
     result = await db.execute(stmt)
-    roles_data = result.all()
+    roles_data = result.tuples().all()
     
     if not roles_data:
         # No role => No data access (safe default? or SELF?)
@@ -392,8 +491,7 @@ async def apply_data_scope_filter(db: AsyncSession, query, user: User, model, us
             stmt_custom = select(RoleDepartment.department_id).where(
                 RoleDepartment.role_id.in_(custom_role_ids)
             )
-            res_custom = await db.execute(stmt_custom)
-            custom_dept_ids = {row[0] for row in res_custom.all()}
+            custom_dept_ids = set(await db.scalars(stmt_custom))
         else:
             custom_dept_ids = set()
         
@@ -1,6 +1,7 @@
 
 from typing import Optional
-from redis.asyncio import Redis, from_url
+from redis.asyncio import BlockingConnectionPool, Redis
+from redis.asyncio.client import Pipeline
 from app.core.config import settings
 
 class RedisClient:
@@ -17,13 +18,24 @@ class RedisClient:
                     rest = url[len(prefix):]
                     url = f"redis://:{settings.REDIS_PASSWORD}@{rest}"
 
-            cls._client = from_url(
+            # Bounded pool: under load callers wait up to REDIS_POOL_TIMEOUT for
+            # a free connection instead of opening sockets without limit
+            pool = BlockingConnectionPool.from_url(
                 url,
+                max_connections=settings.REDIS_MAX_CONNECTIONS,
+                timeout=settings.REDIS_POOL_TIMEOUT,
+                health_check_interval=settings.REDIS_HEALTH_CHECK_INTERVAL,
                 encoding="utf-8",
                 decode_responses=True
             )
+            cls._client = Redis.from_pool(pool)
         return cls._client
 
+    @classmethod
+    def pipeline(cls, transaction: bool = False) -> Pipeline:
+        """Pipeline on the shared client; non-transactional by default (one round trip, no MULTI)."""
+        return cls.get_client().pipeline(transaction=transaction)
+
     @classmethod
     async def close(cls):
         if cls._client:
@@ -1,8 +1,12 @@
 
+import hashlib
+import hmac
 import re
+import secrets
 from datetime import datetime, timedelta
-from typing import Optional, Any, Union
+from typing import Optional, Any, Tuple, Union
 
+from cachetools import TTLCache
 from jose import jwt, JWTError
 from passlib.context import CryptContext
 import bcrypt
@@ -11,6 +15,22 @@ from app.core.config import settings
 
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
+# Successful password checks, keyed by an HMAC of (password, hash) under a
+# per-process random key, so no password is kept in memory. Opt-in via
+# PASSWORD_VERIFY_CACHE_SECONDS; a changed hash never matches an old entry.
+_verified_passwords: Optional[TTLCache] = (
+    TTLCache(maxsize=4096, ttl=settings.PASSWORD_VERIFY_CACHE_SECONDS)
+    if settings.PASSWORD_VERIFY_CACHE_SECONDS > 0 else None
+)
+_verify_cache_key = secrets.token_bytes(32)
+
+# Password complexity: an uppercase letter, a lowercase letter, a digit and a
+# special character, anywhere in the password (one compiled match)
+_PASSWORD_COMPLEXITY = re.compile(
+    r"(?=.*[A-Z])(?=.*[a-z])(?=.*\d)(?=.*[ !@#$%^&*()_+\-=\[\]{};':\"\\|,.<>/?])",
+    re.DOTALL,
+)
+
 
 def _truncate_password(password: str) -> str:
     """
@@ -22,29 +42,49 @@ def _truncate_password(password: str) -> str:
     Returns:
         Truncated password string (max 72 bytes)
     """
+    # A UTF-8 character is at most 4 bytes: 18 characters always fit
+    if len(password) <= 18:
+        return password
+    
     password_bytes = password.encode('utf-8')
     if len(password_bytes) <= 72:
         return password
     
-    # Truncate to 72 bytes
-    password_bytes = password_bytes[:72]
-    
-    # Remove any incomplete UTF-8 sequences at the end
-    while len(password_bytes) > 0:
-        try:
-            return password_bytes.decode('utf-8')
-        except UnicodeDecodeError:
-            password_bytes = password_bytes[:-1]
-    
-    return ""
+    # Truncate to 72 bytes; 'ignore' drops a UTF-8 sequence cut off at the end
+    return password_bytes[:72].decode('utf-8', 'ignore')
 
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """
     Verify a password against a hash.
     
+    Both bcrypt.checkpw and passlib's verify compare digests in constant time,
+    so no extra hash comparison is done here.
+    
+    With PASSWORD_VERIFY_CACHE_SECONDS set, a pair that verified recently is
+    accepted without running bcrypt again (failures are never cached).
+    
     Note: bcrypt has a 72-byte limit. If password exceeds this, it will be truncated.
     """
+    if _verified_passwords is None:
+        return _check_password(plain_password, hashed_password)
+    
+    cache_key = hmac.new(
+        _verify_cache_key,
+        plain_password.encode("utf-8") + b"\0" + hashed_password.encode("utf-8"),
+        hashlib.sha256,
+    ).digest()
+    if cache_key in _verified_passwords:
+        return True
+    
+    verified = _check_password(plain_password, hashed_password)
+    if verified:
+        _verified_passwords[cache_key] = True
+    return verified
+
+
+def _check_password(plain_password: str, hashed_password: str) -> bool:
+    """Run bcrypt (or passlib as a fallback) for verify_password."""
     # Truncate password before verification to comply with bcrypt's 72-byte limit
     plain_password = _truncate_password(plain_password)
     
@@ -139,10 +179,28 @@ def _get_token_hash(token: str) -> str:
         token: JWT token string
         
     Returns:
-        SHA256 hash of token
+        128-bit BLAKE2b hash of token (32 hex chars)
+    """
+    return hashlib.blake2b(token.encode(), digest_size=16).hexdigest()
+
+
+def get_blacklist_key(token: str) -> str:
+    """Redis key marking a token as blacklisted."""
+    return f"token:blacklist:v2:{_get_token_hash(token)}"
+
+
+def _legacy_blacklist_key(token: str) -> str:
+    """
+    Pre-v2 (SHA-256) blacklist key, still honoured so tokens revoked before
+    the switch stay revoked. Can go once REFRESH_TOKEN_EXPIRE_DAYS have
+    passed since the v2 keys were deployed.
     """
-    import hashlib
-    return hashlib.sha256(token.encode()).hexdigest()
+    return f"token:blacklist:{hashlib.sha256(token.encode()).hexdigest()}"
+
+
+def blacklist_keys(token: str) -> Tuple[str, str]:
+    """Keys whose existence marks a token as blacklisted (current and legacy)."""
+    return get_blacklist_key(token), _legacy_blacklist_key(token)
 
 
 async def is_token_blacklisted(token: str) -> bool:
@@ -158,21 +216,27 @@ async def is_token_blacklisted(token: str) -> bool:
     try:
         from app.core.redis import RedisClient
         redis = RedisClient.get_client()
-        token_hash = _get_token_hash(token)
-        blacklisted = await redis.get(f"token:blacklist:{token_hash}")
-        return blacklisted is not None
+        # EXISTS counts both the current and the legacy key in one round trip
+        # without sending their values back
+        return bool(await redis.exists(*blacklist_keys(token)))
     except Exception:
         # If Redis fails, assume token is not blacklisted (fail open)
         return False
 
 
-async def blacklist_token(token: str, expires_in_seconds: int) -> bool:
+async def blacklist_token(
+    token: str,
+    expires_in_seconds: int,
+    session_user_id: Optional[str] = None,
+) -> bool:
     """
     Add a token to the blacklist.
     
     Args:
         token: JWT token string
         expires_in_seconds: Time in seconds until token expires (used as TTL)
+        session_user_id: If given, also delete this user's single-session
+            entry in the same Redis round trip
         
     Returns:
         True if successfully blacklisted, False otherwise
@@ -180,12 +244,18 @@ async def blacklist_token(token: str, expires_in_seconds: int) -> bool:
     try:
         from app.core.redis import RedisClient
         redis = RedisClient.get_client()
-        # Use token hash as key to avoid storing full token
-        token_hash = _get_token_hash(token)
-        await redis.set(f"token:blacklist:{token_hash}", "1", ex=expires_in_seconds)
+        async with redis.pipeline(transaction=False) as pipe:
+            # Use token hash as key to avoid storing full token. NX: a token
+            # that is already blacklisted keeps its entry and TTL. An expired
+            # token needs no entry.
+            if expires_in_seconds > 0:
+                pipe.set(get_blacklist_key(token), "1", ex=expires_in_seconds, nx=True)
+            if session_user_id is not None:
+                pipe.delete(f"user_session:{session_user_id}")
+            await pipe.execute()
         return True
     except Exception:
-        # If Redis fails, log but don't fail the request
+        # If Redis fails, the caller decides how to surface it
         return False
 
 
@@ -203,14 +273,7 @@ def validate_password_strength(password: str) -> bool:
         return False
         
     if settings.PASSWORD_REQUIRE_COMPLEXITY:
-        if not re.search(r"[A-Z]", password):
-            return False
-        if not re.search(r"[a-z]", password):
-            return False
-        if not re.search(r"\d", password):
-            return False
-        if not re.search(r"[ !@#$%^&*()_+\-=\[\]{};':\"\\|,.<>/?]", password):
-            return False
+        return _PASSWORD_COMPLEXITY.match(password) is not None
             
     return True
 
@@ -1,15 +1,17 @@
 """
 FastAPI main application.
 """
+import asyncio
 import time
-from contextlib import asynccontextmanager
+from contextlib import asynccontextmanager, suppress
 from typing import AsyncGenerator
 
 from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import ORJSONResponse
 
 from app.core import settings, init_db, close_db
+from app.core.log import start_logging, stop_logging
 from app.core.redis import RedisClient
 from app.api.v1 import api_router
 
@@ -18,6 +20,7 @@ from app.api.v1 import api_router
 async def lifespan(app: FastAPI) -> AsyncGenerator:
     """Application lifespan events."""
     # Startup
+    start_logging()
     print(f"🚀 Starting {settings.APP_NAME} v{settings.APP_VERSION}")
     print(f"📝 Environment: {settings.APP_ENV}")
     print(f"🔧 Debug mode: {settings.DEBUG}")
@@ -36,45 +39,22 @@ async def lifespan(app: FastAPI) -> AsyncGenerator:
     )
     print(f"✅ Snowflake ID generator initialized (DC:{settings.SNOWFLAKE_DATACENTER_ID}, Worker:{settings.SNOWFLAKE_WORKER_ID})")
 
+    # Batched writer for login/operation logs
+    from app.services.log_service import run_log_writer
+    log_writer = asyncio.create_task(run_log_writer())
     
     yield
     
     # Shutdown
+    log_writer.cancel()
+    with suppress(asyncio.CancelledError):
+        await log_writer
     await close_db()
     print("👋 Application shutdown")
+    stop_logging()
 
 
 
-# Custom JSONResponse to preserve Chinese characters
-from fastapi.responses import JSONResponse as FastAPIJSONResponse
-from datetime import datetime, date
-import json
-
-class JSONEncoder(json.JSONEncoder):
-    """Custom JSON encoder that handles datetime, date objects, and large integers."""
-    def default(self, obj):
-        if isinstance(obj, (datetime, date)):
-            return obj.isoformat()
-        # Handle large integers (Snowflake IDs) by converting to string to avoid JavaScript precision loss
-        # JavaScript Number.MAX_SAFE_INTEGER is 2^53 - 1 = 9007199254740991
-        if isinstance(obj, int) and abs(obj) > 9007199254740991:
-            return str(obj)
-        return super().default(obj)
-
-class JSONResponse(FastAPIJSONResponse):
-    """Custom JSON response that preserves non-ASCII characters (e.g., Chinese)."""
-    
-    def render(self, content) -> bytes:
-        return json.dumps(
-            content,
-            ensure_ascii=False,
-            allow_nan=False,
-            indent=None,
-            separators=(",", ":"),
-            cls=JSONEncoder,
-        ).encode("utf-8")
-
-
 # Create FastAPI app
 app = FastAPI(
     title=settings.APP_NAME,
@@ -84,7 +64,8 @@ app = FastAPI(
     redoc_url="/redoc" if settings.DEBUG else None,
     openapi_url="/openapi.json" if settings.DEBUG else None,
     lifespan=lifespan,
-    default_response_class=JSONResponse,  # Use custom JSON response
+    # orjson writes non-ASCII (e.g. Chinese) as UTF-8 and handles datetime natively
+    default_response_class=ORJSONResponse,
 )
 
 
@@ -83,6 +83,10 @@ class BaseModel(Base, TimestampMixin, SoftDeleteMixin):
     """
     
     __abstract__ = True
+    # Fetch server-generated values (created_at, updated_at, column server
+    # defaults) with RETURNING in the INSERT/UPDATE itself, so written rows
+    # can be serialized without a refresh SELECT
+    __mapper_args__ = {"eager_defaults": True}
     
     id: Mapped[str] = mapped_column(
         String(50),
@@ -2,7 +2,7 @@
 Dictionary data model for system dictionaries.
 """
 from typing import Optional
-from sqlalchemy import Integer, SmallInteger, String
+from sqlalchemy import Index, Integer, SmallInteger, String
 from sqlalchemy.orm import Mapped, mapped_column
 
 from app.models.base import BaseModel, TenantMixin
@@ -12,13 +12,19 @@ class DictData(BaseModel, TenantMixin):
     """Dictionary data model."""
     
     __tablename__ = "dict_data"
-    __table_args__ = {"comment": "字典数据表"}
+    __table_args__ = (
+        Index(
+            "ix_dict_data_lookup",
+            "tenant_id", "dict_type_id", "status", "sort",
+            postgresql_include=["label", "value", "color", "icon"],
+        ),
+        {"comment": "字典数据表"},
+    )
     
     # Foreign key
     dict_type_id: Mapped[str] = mapped_column(
         String(50),
         nullable=False,
-        index=True,
         comment="字典类型ID"
     )
     
@@ -4,7 +4,7 @@ Log models.
 from datetime import datetime
 from typing import Optional
 
-from sqlalchemy import String, SmallInteger, Text, DateTime, JSON, Integer
+from sqlalchemy import String, SmallInteger, Text, DateTime, JSON, Integer, Index
 from sqlalchemy.orm import Mapped, mapped_column
 
 from app.models.base import BaseModel, TenantMixin
@@ -14,7 +14,11 @@ class LoginLog(BaseModel, TenantMixin):
     """Login log model."""
     
     __tablename__ = "sys_login_log"
-    __table_args__ = {"comment": "登录日志表"}
+    __table_args__ = (
+        # Keyset pagination: (login_time, id) < cursor, newest first
+        Index("ix_sys_login_log_keyset", "tenant_id", "login_time", "id"),
+        {"comment": "登录日志表"},
+    )
     
     user_id: Mapped[Optional[str]] = mapped_column(
         String(50),
@@ -69,7 +73,11 @@ class OperationLog(BaseModel, TenantMixin):
     """Operation log model."""
     
     __tablename__ = "sys_opt_log"
-    __table_args__ = {"comment": "操作日志表"}
+    __table_args__ = (
+        # Keyset pagination: (created_at, id) < cursor, newest first
+        Index("ix_sys_opt_log_keyset", "tenant_id", "created_at", "id"),
+        {"comment": "操作日志表"},
+    )
     
     user_id: Mapped[Optional[str]] = mapped_column(
         String(50),
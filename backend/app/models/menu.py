@@ -2,7 +2,7 @@
 Menu model for navigation and permission control.
 """
 from typing import Optional
-from sqlalchemy import Integer, SmallInteger, String
+from sqlalchemy import Index, Integer, SmallInteger, String
 from sqlalchemy.orm import Mapped, mapped_column
 
 from app.models.base import BaseModel, TenantMixin
@@ -12,7 +12,11 @@ class Menu(BaseModel, TenantMixin):
     """Menu model for navigation tree."""
     
     __tablename__ = "menus"
-    __table_args__ = {"comment": "菜单表"}
+    __table_args__ = (
+        # Keyset pagination: (sort, id) > cursor
+        Index("ix_menus_keyset", "tenant_id", "sort", "id"),
+        {"comment": "菜单表"},
+    )
     
     # Parent relationship
     parent_id: Mapped[Optional[str]] = mapped_column(
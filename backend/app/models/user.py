@@ -4,7 +4,7 @@ User model.
 from typing import Optional, List
 from datetime import datetime
 
-from sqlalchemy import Boolean, Integer, SmallInteger, String, DateTime
+from sqlalchemy import Boolean, Integer, SmallInteger, String, DateTime, Index
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from app.models.base import BaseModel, TenantMixin
@@ -14,7 +14,11 @@ class User(BaseModel, TenantMixin):
     """User model."""
     
     __tablename__ = "users"
-    __table_args__ = {"comment": "用户表"}
+    __table_args__ = (
+        # Keyset pagination: (created_at, id) < cursor, newest first
+        Index("ix_users_keyset", "tenant_id", "created_at", "id"),
+        {"comment": "用户表"},
+    )
     
     # Basic info
     username: Mapped[str] = mapped_column(
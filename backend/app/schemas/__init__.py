@@ -14,7 +14,8 @@ from app.schemas.user import (
     UserBase,
     UserResponse,
     UserListResponse,
-    UserPasswordUpdate
+    UserPasswordUpdate,
+    UserPasswordReset
 )
 
 __all__ = [
@@ -33,4 +34,5 @@ __all__ = [
     "UserResponse",
     "UserListResponse",
     "UserPasswordUpdate",
+    "UserPasswordReset",
 ]
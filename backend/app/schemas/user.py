@@ -104,3 +104,8 @@ class UserPasswordUpdate(BaseModel):
         if not security.validate_password_strength(v):
             raise ValueError("Password is too weak")
         return v
+
+
+class UserPasswordReset(BaseModel):
+    """Admin password reset schema."""
+    password: str = Field(..., min_length=6, description="新密码")
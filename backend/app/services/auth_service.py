@@ -116,6 +116,7 @@ class AuthService:
                 access_token, 
                 ex=int(access_token_expires.total_seconds())
             )
+            deps.invalidate_session_cache(user.id)
         
         return TokenResponse(
             access_token=access_token,
@@ -201,6 +202,7 @@ class AuthService:
                 access_token,
                 ex=int(access_token_expires.total_seconds())
             )
+            deps.invalidate_session_cache(user.id)
         
         return {
             "access_token": access_token,
@@ -2,13 +2,13 @@
 Department service for department management and tree building.
 """
 import logging
-from typing import List, Optional
+from typing import Any, Dict, List, Optional
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.models.department import Department
 from app.models.user import User
-from app.schemas.department import DepartmentTreeNode, DepartmentCreate, DepartmentUpdate, DepartmentResponse
+from app.schemas.department import DepartmentCreate, DepartmentUpdate, DepartmentResponse
 from app.utils.cache import DepartmentCache
 
 logger = logging.getLogger(__name__)
@@ -59,10 +59,10 @@ class DepartmentService:
                         updated_by=dept_dict.get('updated_by'),
                     )
                     dept_list.append(dept)
-                logger.debug(f"Cache hit for departments list: tenant_id={tenant_id}, count={len(dept_list)}")
+                logger.debug("Cache hit for departments list: tenant_id=%s, count=%s", tenant_id, len(dept_list))
                 return dept_list
         except Exception as e:
-            logger.warning(f"Failed to get departments from cache, falling back to DB: {e}")
+            logger.warning("Failed to get departments from cache, falling back to DB: %s", e)
         
         # Cache miss or error - query database
         stmt = select(Department).where(
@@ -80,7 +80,7 @@ class DepartmentService:
         try:
             await DepartmentCache.set_departments_list(tenant_id, departments)
         except Exception as e:
-            logger.warning(f"Failed to set departments list to cache: {e}")
+            logger.warning("Failed to set departments list to cache: %s", e)
         
         return departments
     
@@ -98,7 +98,7 @@ class DepartmentService:
         Returns:
             Optional[Department]: Department object
         """
-        logger.info(f"Querying department: id={dept_id}, tenant_id={tenant_id}, is_superadmin={tenant_id == '0'}")
+        logger.debug("Querying department: id=%s, tenant_id=%s, is_superadmin=%s", dept_id, tenant_id, tenant_id == '0')
         
         # Try to get from cache
         try:
@@ -126,13 +126,13 @@ class DepartmentService:
                 )
                 # Check tenant_id filter if provided
                 if tenant_id is not None and tenant_id != "0" and dept.tenant_id != tenant_id:
-                    logger.warning(f"Cached department tenant_id mismatch: cached={dept.tenant_id}, requested={tenant_id}")
+                    logger.warning("Cached department tenant_id mismatch: cached=%s, requested=%s", dept.tenant_id, tenant_id)
                     # Fall through to DB query for security check
                 else:
-                    logger.debug(f"Cache hit for department detail: dept_id={dept_id}")
+                    logger.debug("Cache hit for department detail: dept_id=%s", dept_id)
                     return dept
         except Exception as e:
-            logger.warning(f"Failed to get department from cache, falling back to DB: {e}")
+            logger.warning("Failed to get department from cache, falling back to DB: %s", e)
         
         # Cache miss or error - query database
         stmt = select(Department).where(
@@ -142,9 +142,9 @@ class DepartmentService:
         # Superadmin (tenant_id="0") can access all departments, so don't filter by tenant_id
         if tenant_id is not None and tenant_id != "0":
             stmt = stmt.where(Department.tenant_id == tenant_id)
-            logger.info(f"Applied tenant filter: tenant_id={tenant_id}")
+            logger.debug("Applied tenant filter: tenant_id=%s", tenant_id)
         else:
-            logger.info(f"No tenant filter applied (superadmin or None)")
+            logger.debug("No tenant filter applied (superadmin or None)")
         
         result = await db.execute(stmt)
         dept = result.scalar_one_or_none()
@@ -155,35 +155,37 @@ class DepartmentService:
             result_check = await db.execute(stmt_check)
             dept_check = result_check.scalar_one_or_none()
             if dept_check:
-                logger.warning(f"Department exists but: is_deleted={dept_check.is_deleted}, tenant_id={dept_check.tenant_id}, requested_tenant_id={tenant_id}")
+                logger.warning("Department exists but: is_deleted=%s, tenant_id=%s, requested_tenant_id=%s", dept_check.is_deleted, dept_check.tenant_id, tenant_id)
             else:
-                logger.warning(f"Department not found in database: id={dept_id}")
+                logger.warning("Department not found in database: id=%s", dept_id)
         else:
-            logger.info(f"Department found: id={dept.id}, name={dept.name}, tenant_id={dept.tenant_id}")
+            logger.debug("Department found: id=%s, name=%s, tenant_id=%s", dept.id, dept.name, dept.tenant_id)
             # Write to cache (async, don't wait for it)
             try:
                 await DepartmentCache.set_department_detail(dept_id, dept)
             except Exception as e:
-                logger.warning(f"Failed to set department detail to cache: {e}")
+                logger.warning("Failed to set department detail to cache: %s", e)
         
         return dept
     
     @staticmethod
-    def build_department_tree(departments: List[Department]) -> List[DepartmentTreeNode]:
+    def build_department_tree(departments: List[Department]) -> List[Dict[str, Any]]:
         """
-        Build department tree from flat list.
+        Build department tree from flat list in two O(n) passes.
+        
+        Departments whose parent is not in the list are returned as roots.
         
         Args:
             departments: Flat list of departments
             
         Returns:
-            Tree structure with nested children
+            Tree structure with nested children (DepartmentTreeNode-shaped dicts)
         """
-        # Convert to dict for quick lookup
-        dept_dict = {}
+        # First pass: one node per department, keyed by ID
+        nodes = {}
         for dept in departments:
-            # Ensure tenant_id is string (database might return int for old data)
-            dept_dict_entry = {
+            # Ensure IDs are strings (database might return int for old data)
+            nodes[str(dept.id)] = {
                 "id": str(dept.id),
                 "tenant_id": str(dept.tenant_id) if dept.tenant_id is not None else "0",
                 "name": dept.name,
@@ -196,26 +198,43 @@ class DepartmentService:
                 "status": dept.status,
                 "remark": dept.remark,
                 "leader_name": None,
+                "children": [],
             }
-            node = DepartmentTreeNode.model_validate(dept_dict_entry)
-            dept_dict[dept.id] = node
         
-        # Build tree
+        # Second pass: attach each node to its parent
         root_depts = []
-        for dept in departments:
-            dept_node = dept_dict[dept.id]
-            
-            if dept.parent_id is None or dept.parent_id == 0:
-                # Root department
-                root_depts.append(dept_node)
+        for node in nodes.values():
+            parent = nodes.get(node["parent_id"]) if node["parent_id"] else None
+            if parent is not None:
+                parent["children"].append(node)
             else:
-                # Child department
-                parent = dept_dict.get(dept.parent_id)
-                if parent:
-                    parent.children.append(dept_node)
+                root_depts.append(node)
         
         return root_depts
     
+    @staticmethod
+    async def get_department_tree(db: AsyncSession, tenant_id: str) -> List[Dict[str, Any]]:
+        """
+        Get the department tree of a tenant.
+        Uses cache when available, falls back to building it on cache miss.
+        
+        Args:
+            db: Database session
+            tenant_id: Tenant ID (0 for superadmin means all departments)
+            
+        Returns:
+            Department tree
+        """
+        cached_tree = await DepartmentCache.get_departments_tree(tenant_id)
+        if cached_tree is not None:
+            return cached_tree
+        
+        departments = await DepartmentService.get_departments(db, tenant_id)
+        tree = DepartmentService.build_department_tree(departments)
+        
+        await DepartmentCache.set_departments_tree(tenant_id, tree)
+        return tree
+    
     @staticmethod
     async def create_department(
         db: AsyncSession,
@@ -235,14 +254,13 @@ class DepartmentService:
         )
         db.add(dept)
         await db.flush()
-        await db.refresh(dept)
         
         # Clear cache after creation
         try:
             await DepartmentCache.clear_all_cache(tenant_id, dept_id=None)
-            logger.debug(f"Cleared cache after creating department: tenant_id={tenant_id}")
+            logger.debug("Cleared cache after creating department: tenant_id=%s", tenant_id)
         except Exception as e:
-            logger.warning(f"Failed to clear cache after creating department: {e}")
+            logger.warning("Failed to clear cache after creating department: %s", e)
         
         return dept
     
@@ -288,14 +306,13 @@ class DepartmentService:
             setattr(dept, field, value)
         
         await db.flush()
-        await db.refresh(dept)
         
         # Clear cache after update
         try:
             await DepartmentCache.clear_all_cache(actual_tenant_id, dept_id=dept_id)
-            logger.debug(f"Cleared cache after updating department: tenant_id={actual_tenant_id}, dept_id={dept_id}")
+            logger.debug("Cleared cache after updating department: tenant_id=%s, dept_id=%s", actual_tenant_id, dept_id)
         except Exception as e:
-            logger.warning(f"Failed to clear cache after updating department: {e}")
+            logger.warning("Failed to clear cache after updating department: %s", e)
         
         return dept
     
@@ -333,9 +350,9 @@ class DepartmentService:
         # Clear cache after deletion
         try:
             await DepartmentCache.clear_all_cache(actual_tenant_id, dept_id=dept_id)
-            logger.debug(f"Cleared cache after deleting department: tenant_id={actual_tenant_id}, dept_id={dept_id}")
+            logger.debug("Cleared cache after deleting department: tenant_id=%s, dept_id=%s", actual_tenant_id, dept_id)
         except Exception as e:
-            logger.warning(f"Failed to clear cache after deleting department: {e}")
+            logger.warning("Failed to clear cache after deleting department: %s", e)
         
         return True
     
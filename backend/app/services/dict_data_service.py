@@ -1,13 +1,27 @@
 """
 Dictionary data service for dictionary data management.
 """
-import json
 from typing import List, Optional, Tuple
-from sqlalchemy import select, func, or_
+
+import orjson
+from cachetools import TTLCache
+from pydantic import TypeAdapter
+from sqlalchemy import select, or_
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.models.dict_data import DictData
-from app.schemas.dict_data import DictDataCreate, DictDataUpdate
+from app.schemas.dict_data import DictDataCreate, DictDataUpdate, DictDataResponse
+from app.utils.response import dump_list
+from app.utils.pagination import fetch_page
+
+# Validate whole lists in one pass instead of one model_validate per row
+# (shared with the dict data endpoints)
+DICT_DATA_LIST = TypeAdapter(List[DictDataResponse])
+
+# Local copy of the "dict:{tenant_id}:{type_code}" Redis entries, keyed by
+# (tenant_id, type_code). Emptied on every dictionary write (see
+# DictTypeService._clear_dict_cache); other workers catch up within the TTL.
+_dict_by_type_cache: TTLCache = TTLCache(maxsize=512, ttl=60)
 
 
 class DictDataService:
@@ -18,9 +32,11 @@ class DictDataService:
         db: AsyncSession,
         type_code: str,
         tenant_id: str
-    ) -> List[DictData]:
+    ) -> bytes:
         """
-        Get dictionary data by type code with Redis cache.
+        Get enabled dictionary data of a type as pre-serialized JSON.
+        
+        Looks up the in-process cache first, then Redis, then the database.
         
         Args:
             db: Database session
@@ -28,31 +44,28 @@ class DictDataService:
             tenant_id: Tenant ID
             
         Returns:
-            List of dictionary data
+            JSON array of DictDataResponse items
         """
+        key = (tenant_id, type_code)
+        payload = _dict_by_type_cache.get(key)
+        if payload is not None:
+            return payload
+        
         from app.core.redis import RedisClient
         redis = RedisClient.get_client()
         cache_key = f"dict:{tenant_id}:{type_code}"
         
-        # Try to get from cache
         cached_data = await redis.get(cache_key)
         if cached_data:
-            try:
-                data_list = json.loads(cached_data)
-                # Convert back to DictData objects (simplified - just return dicts)
-                # For full objects, we'd need to reconstruct from DB
-                # For now, return cached data as-is and let API layer handle it
-                # Actually, let's fetch from DB to ensure consistency
-                # Cache hit means we can skip the type lookup
-                pass
-            except:
-                pass
+            payload = cached_data.encode()
+            _dict_by_type_cache[key] = payload
+            return payload
         
         # Get dict type
         from app.services.dict_type_service import dict_type_service
         dict_type = await dict_type_service.get_dict_type_by_code(db, type_code, tenant_id)
         if not dict_type:
-            return []
+            return b"[]"
         
         # Get dict data
         stmt = select(DictData).where(
@@ -63,26 +76,13 @@ class DictDataService:
         ).order_by(DictData.sort.asc(), DictData.id.asc())
         
         result = await db.execute(stmt)
-        dict_data_list = list(result.scalars().all())
+        payload = orjson.dumps(dump_list(DICT_DATA_LIST, result.scalars().all()))
         
-        # Cache the data (serialize to JSON)
-        if dict_data_list:
-            cache_data = [
-                {
-                    "id": item.id,
-                    "label": item.label,
-                    "value": item.value,
-                    "sort": item.sort,
-                    "status": item.status,
-                    "css_class": item.css_class,
-                    "color": item.color,
-                    "icon": item.icon,
-                }
-                for item in dict_data_list
-            ]
-            await redis.set(cache_key, json.dumps(cache_data), ex=3600)  # 1 hour TTL
+        if payload != b"[]":
+            await redis.set(cache_key, payload, ex=3600)  # 1 hour TTL
+            _dict_by_type_cache[key] = payload
         
-        return dict_data_list
+        return payload
     
     @staticmethod
     async def get_all_dict_data(
@@ -121,17 +121,9 @@ class DictDataService:
         if status is not None:
             stmt = stmt.where(DictData.status == status)
         
-        # Get total count
-        count_stmt = select(func.count()).select_from(stmt.subquery())
-        total_result = await db.execute(count_stmt)
-        total = total_result.scalar() or 0
-        
-        # Apply pagination and ordering
+        # Apply ordering and pagination (COUNT only if the page doesn't settle it)
         stmt = stmt.order_by(DictData.sort.asc(), DictData.id.asc())
-        stmt = stmt.offset((page - 1) * page_size).limit(page_size)
-        
-        result = await db.execute(stmt)
-        dict_data = list(result.scalars().all())
+        dict_data, total = await fetch_page(db, stmt, page, page_size)
         
         return dict_data, total
     
@@ -172,7 +164,6 @@ class DictDataService:
         )
         db.add(dict_data)
         await db.flush()
-        await db.refresh(dict_data)
         
         # Clear cache
         await DictDataService._clear_dict_cache_by_type_id(db, dict_data_data.dict_type_id, tenant_id)
@@ -217,15 +208,18 @@ class DictDataService:
             if existing:
                 raise ValueError("Dictionary data value already exists for this type")
         
+        old_dict_type_id = dict_data.dict_type_id
+        
         # Update fields
         for field, value in update_data.items():
             setattr(dict_data, field, value)
         
         await db.flush()
-        await db.refresh(dict_data)
         
-        # Clear cache
+        # Clear cache (both types if the item moved)
         await DictDataService._clear_dict_cache_by_type_id(db, dict_data.dict_type_id, tenant_id)
+        if old_dict_type_id != dict_data.dict_type_id:
+            await DictDataService._clear_dict_cache_by_type_id(db, old_dict_type_id, tenant_id)
         
         return dict_data
     
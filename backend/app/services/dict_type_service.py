@@ -7,6 +7,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.models.dict_type import DictType
 from app.schemas.dict_type import DictTypeCreate, DictTypeUpdate
+from app.utils.pagination import fetch_page
 
 
 class DictTypeService:
@@ -45,17 +46,9 @@ class DictTypeService:
         if status is not None:
             stmt = stmt.where(DictType.status == status)
         
-        # Get total count
-        count_stmt = select(func.count()).select_from(stmt.subquery())
-        total_result = await db.execute(count_stmt)
-        total = total_result.scalar() or 0
-        
-        # Apply pagination and ordering
+        # Apply ordering and pagination (COUNT only if the page doesn't settle it)
         stmt = stmt.order_by(DictType.sort.asc(), DictType.id.asc())
-        stmt = stmt.offset((page - 1) * page_size).limit(page_size)
-        
-        result = await db.execute(stmt)
-        dict_types = list(result.scalars().all())
+        dict_types, total = await fetch_page(db, stmt, page, page_size)
         
         return dict_types, total
     
@@ -95,7 +88,6 @@ class DictTypeService:
         )
         db.add(dict_type)
         await db.flush()
-        await db.refresh(dict_type)
         
         return dict_type
     
@@ -125,7 +117,6 @@ class DictTypeService:
             setattr(dict_type, field, value)
         
         await db.flush()
-        await db.refresh(dict_type)
         
         # Clear cache for this dict type
         await DictTypeService._clear_dict_cache(tenant_id, dict_type.code)
@@ -163,6 +154,8 @@ class DictTypeService:
     async def _clear_dict_cache(tenant_id: str, type_code: str):
         """Clear dictionary cache for a specific type."""
         from app.core.redis import RedisClient
+        from app.services.dict_data_service import _dict_by_type_cache
+        _dict_by_type_cache.clear()
         redis = RedisClient.get_client()
         cache_key = f"dict:{tenant_id}:{type_code}"
         await redis.delete(cache_key)
@@ -1,16 +1,68 @@
 """
 Log service.
 """
+import asyncio
+import logging
+from collections import defaultdict
 from typing import Optional, Tuple, List
 from datetime import datetime
 
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, func, and_, or_
+from sqlalchemy import select, and_, or_, insert
 from fastapi import Request
 
 from app.core.database import AsyncSessionLocal
 from app.models.log import LoginLog, OperationLog
 from app.utils.ip import IPUtils
+from app.utils.pagination import apply_keyset, count_rows, encode_cursor, execute_page
+from app.utils.snowflake import generate_id
+
+logger = logging.getLogger(__name__)
+
+# Login/operation log rows waiting to be written, as (model, row) pairs
+_log_queue: asyncio.Queue = asyncio.Queue()
+LOG_FLUSH_INTERVAL = 0.1  # seconds
+LOG_BATCH_SIZE = 500
+
+async def flush_logs() -> None:
+    """
+    Write all queued log rows, one multi-row INSERT per table and batch.
+    
+    Each table is written in its own transaction, so a failing INSERT into
+    one table doesn't discard the rows queued for the other.
+    """
+    while not _log_queue.empty():
+        batch = defaultdict(list)
+        for _ in range(min(_log_queue.qsize(), LOG_BATCH_SIZE)):
+            model, row = _log_queue.get_nowait()
+            batch[model].append(row)
+        
+        for model, rows in batch.items():
+            async with AsyncSessionLocal() as db:
+                try:
+                    await db.execute(insert(model), rows)
+                    await db.commit()
+                except Exception:
+                    # Log system error, don't crash the writer
+                    logger.exception(
+                        "Failed to write %d %s rows", len(rows), model.__tablename__
+                    )
+                    await db.rollback()
+
+
+async def run_log_writer() -> None:
+    """
+    Drain the log queue every LOG_FLUSH_INTERVAL seconds.
+    
+    Started once at application startup; flushes what is left when cancelled.
+    """
+    try:
+        while True:
+            await asyncio.sleep(LOG_FLUSH_INTERVAL)
+            await flush_logs()
+    except asyncio.CancelledError:
+        await flush_logs()
+        raise
 
 
 class LogService:
@@ -29,7 +81,8 @@ class LogService:
         """
         Create login log asynchronously.
         
-        Should be called in background task.
+        Should be called in background task. The row is queued and written
+        by run_log_writer.
         """
         location = IPUtils.get_location(ip)
         # Parse UA simply
@@ -58,25 +111,18 @@ class LogService:
                 browser = "Edge"
             
         
-        async with AsyncSessionLocal() as db:
-            try:
-                log = LoginLog(
-                    username=username,
-                    user_id=user_id,
-                    status=status,
-                    ip=ip,
-                    location=location,
-                    msg=msg,
-                    browser=browser,
-                    os=os,
-                    tenant_id=tenant_id
-                )
-                db.add(log)
-                await db.commit()
-            except Exception as e:
-                # Log system error, don't crash
-                print(f"Error writing login log: {e}")
-                await db.rollback()
+        _log_queue.put_nowait((LoginLog, {
+            "id": generate_id(),
+            "username": username,
+            "user_id": user_id,
+            "status": status,
+            "ip": ip,
+            "location": location,
+            "msg": msg,
+            "browser": browser,
+            "os": os,
+            "tenant_id": tenant_id,
+        }))
                 
     @staticmethod
     async def create_operation_log(
@@ -97,32 +143,29 @@ class LogService:
     ) -> None:
         """
         Create operation log asynchronously.
+        
+        The row is queued and written by run_log_writer.
         """
         location = IPUtils.get_location(ip)
         
-        async with AsyncSessionLocal() as db:
-            try:
-                log = OperationLog(
-                    username=username,
-                    user_id=user_id,
-                    module=module,
-                    summary=summary,
-                    method=method,
-                    url=url,
-                    ip=ip,
-                    location=location,
-                    user_agent=user_agent,
-                    params=params,
-                    result=result,
-                    status=status,
-                    error_msg=error_msg,
-                    duration=duration,
-                    tenant_id=tenant_id
-                )
-                db.add(log)
-                await db.commit()
-            except Exception as e:
-                print(f"Error writing operation log: {e}")
+        _log_queue.put_nowait((OperationLog, {
+            "id": generate_id(),
+            "username": username,
+            "user_id": user_id,
+            "module": module,
+            "summary": summary,
+            "method": method,
+            "url": url,
+            "ip": ip,
+            "location": location,
+            "user_agent": user_agent,
+            "params": params,
+            "result": result,
+            "status": status,
+            "error_msg": error_msg,
+            "duration": duration,
+            "tenant_id": tenant_id,
+        }))
 
     @staticmethod
     async def get_login_logs(
@@ -134,8 +177,10 @@ class LogService:
         ip: Optional[str] = None,
         start_time: Optional[datetime] = None,
         end_time: Optional[datetime] = None,
-        tenant_id: Optional[str] = None
-    ) -> Tuple[List[LoginLog], int]:
+        tenant_id: Optional[str] = None,
+        cursor: Optional[str] = None,
+        include_total: bool = True
+    ) -> Tuple[List[LoginLog], Optional[int], Optional[str]]:
         """
         Get login logs with filters.
         
@@ -149,9 +194,17 @@ class LogService:
             start_time: Start time filter
             end_time: End time filter
             tenant_id: Tenant ID filter
+            cursor: next_cursor of the previous page; when given, the page
+                starts right after it (keyset pagination), page is ignored and
+                no COUNT is run (total is None)
+            include_total: Run COUNT when the total can't be derived from the
+                page; if False, total is None in that case
             
         Returns:
-            Tuple of (logs list, total count)
+            Tuple of (logs list, total count or None, next page cursor or None)
+            
+        Raises:
+            ValueError: If the cursor is malformed
         """
         stmt = select(LoginLog).where(LoginLog.is_deleted == False)
         
@@ -174,19 +227,35 @@ class LogService:
         if end_time:
             stmt = stmt.where(LoginLog.login_time <= end_time)
         
-        # Get total count
-        count_stmt = select(func.count()).select_from(stmt.subquery())
-        total_result = await db.execute(count_stmt)
-        total = total_result.scalar() or 0
-        
-        # Apply pagination and ordering
-        stmt = stmt.order_by(LoginLog.login_time.desc())
-        stmt = stmt.offset((page - 1) * page_size).limit(page_size)
-        
-        result = await db.execute(stmt)
-        logs = result.scalars().all()
-        
-        return list(logs), total
+        # Apply pagination and ordering. Rows are ordered by (login_time, id) so a
+        # cursor can seek straight to the next page instead of OFFSET-scanning.
+        # One extra row tells whether another page follows.
+        keys = (LoginLog.login_time, LoginLog.id)
+        page_stmt = apply_keyset(stmt, keys, cursor, descending=True)
+        if not cursor:
+            page_stmt = page_stmt.offset((page - 1) * page_size)
+        
+        # Past the first page the total usually has to be counted: run the
+        # COUNT concurrently with the page query
+        result, total = await execute_page(
+            db, page_stmt.limit(page_size + 1), stmt, include_total and not cursor and page > 1
+        )
+        logs = list(result.scalars().all())
+        has_more = len(logs) > page_size
+        del logs[page_size:]
+        
+        # Skip COUNT when the page settles the total (last page of an OFFSET listing)
+        if total is None and not cursor:
+            if not has_more and (logs or page == 1):
+                total = (page - 1) * page_size + len(logs)
+            elif include_total:
+                total = await count_rows(db, stmt)
+        
+        next_cursor = None
+        if has_more:
+            next_cursor = encode_cursor(logs[-1], keys)
+        
+        return logs, total, next_cursor
 
     @staticmethod
     async def get_operation_logs(
@@ -199,8 +268,10 @@ class LogService:
         method: Optional[str] = None,
         start_time: Optional[datetime] = None,
         end_time: Optional[datetime] = None,
-        tenant_id: Optional[str] = None
-    ) -> Tuple[List[OperationLog], int]:
+        tenant_id: Optional[str] = None,
+        cursor: Optional[str] = None,
+        include_total: bool = True
+    ) -> Tuple[List[OperationLog], Optional[int], Optional[str]]:
         """
         Get operation logs with filters.
         
@@ -215,9 +286,17 @@ class LogService:
             start_time: Start time filter
             end_time: End time filter
             tenant_id: Tenant ID filter
+            cursor: next_cursor of the previous page; when given, the page
+                starts right after it (keyset pagination), page is ignored and
+                no COUNT is run (total is None)
+            include_total: Run COUNT when the total can't be derived from the
+                page; if False, total is None in that case
             
         Returns:
-            Tuple of (logs list, total count)
+            Tuple of (logs list, total count or None, next page cursor or None)
+            
+        Raises:
+            ValueError: If the cursor is malformed
         """
         stmt = select(OperationLog).where(OperationLog.is_deleted == False)
         
@@ -243,19 +322,35 @@ class LogService:
         if end_time:
             stmt = stmt.where(OperationLog.created_at <= end_time)
         
-        # Get total count
-        count_stmt = select(func.count()).select_from(stmt.subquery())
-        total_result = await db.execute(count_stmt)
-        total = total_result.scalar() or 0
-        
-        # Apply pagination and ordering
-        stmt = stmt.order_by(OperationLog.created_at.desc())
-        stmt = stmt.offset((page - 1) * page_size).limit(page_size)
-        
-        result = await db.execute(stmt)
-        logs = result.scalars().all()
-        
-        return list(logs), total
+        # Apply pagination and ordering. Rows are ordered by (created_at, id) so a
+        # cursor can seek straight to the next page instead of OFFSET-scanning.
+        # One extra row tells whether another page follows.
+        keys = (OperationLog.created_at, OperationLog.id)
+        page_stmt = apply_keyset(stmt, keys, cursor, descending=True)
+        if not cursor:
+            page_stmt = page_stmt.offset((page - 1) * page_size)
+        
+        # Past the first page the total usually has to be counted: run the
+        # COUNT concurrently with the page query
+        result, total = await execute_page(
+            db, page_stmt.limit(page_size + 1), stmt, include_total and not cursor and page > 1
+        )
+        logs = list(result.scalars().all())
+        has_more = len(logs) > page_size
+        del logs[page_size:]
+        
+        # Skip COUNT when the page settles the total (last page of an OFFSET listing)
+        if total is None and not cursor:
+            if not has_more and (logs or page == 1):
+                total = (page - 1) * page_size + len(logs)
+            elif include_total:
+                total = await count_rows(db, stmt)
+        
+        next_cursor = None
+        if has_more:
+            next_cursor = encode_cursor(logs[-1], keys)
+        
+        return logs, total, next_cursor
 
     @staticmethod
     async def get_online_users(
@@ -2,12 +2,18 @@
 Menu service for menu management and tree building.
 """
 from typing import List, Optional, Set
-from sqlalchemy import select
+from pydantic import TypeAdapter
+from sqlalchemy import select, update
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.models.menu import Menu
 from app.models.user import User
 from app.schemas.menu import MenuTreeNode, MenuCreate, MenuUpdate
+from app.utils.pagination import apply_keyset, count_rows, encode_cursor, execute_page
+from app.utils.tree import nest_nodes, tree_select
+
+# Validates a whole list of menus into tree nodes in one call
+_MENU_TREE_NODES = TypeAdapter(List[MenuTreeNode])
 
 
 class MenuService:
@@ -90,13 +96,11 @@ class MenuService:
     @staticmethod
     async def _get_user_permissions(db: AsyncSession, user: User) -> Set[str]:
         """Get all permission codes for a user."""
-        from app.models.associations import UserRole, RolePermission
+        from app.models.associations import RolePermission
         from app.models.permission import Permission
         
-        # Get user's roles
-        stmt = select(UserRole.role_id).where(UserRole.user_id == user.id)
-        result = await db.execute(stmt)
-        role_ids = [row[0] for row in result.all()]
+        # The current user's roles are already loaded (see deps.get_current_user)
+        role_ids = [role.id for role in user.roles]
         
         if not role_ids:
             return set()
@@ -125,8 +129,9 @@ class MenuService:
         Returns:
             Tree structure with nested children
         """
-        # Convert to dict for quick lookup
-        menu_dict = {menu.id: MenuTreeNode.model_validate(menu) for menu in menus}
+        # Convert to dict for quick lookup (all nodes validated in one call)
+        nodes = _MENU_TREE_NODES.validate_python(menus, from_attributes=True)
+        menu_dict = {node.id: node for node in nodes}
         
         # Build tree
         root_menus = []
@@ -157,26 +162,41 @@ class MenuService:
         )
         db.add(menu)
         await db.flush()
-        await db.refresh(menu)
         
         # Clear cache after create
-        await MenuService._clear_menu_cache()
+        await MenuService._clear_menu_cache(db)
         
         return menu
     
     @staticmethod
-    async def update_menu(db: AsyncSession, menu_id: str, menu_data: MenuUpdate) -> Optional[Menu]:
-        """Update a menu."""
-        stmt = select(Menu).where(Menu.id == menu_id, Menu.is_deleted == False)
-        result = await db.execute(stmt)
+    async def update_menu(
+        db: AsyncSession,
+        menu_id: str,
+        menu_data: MenuUpdate,
+        tenant_id: Optional[str] = None
+    ) -> Optional[Menu]:
+        """
+        Update a menu.
+        
+        The fields are written with a single UPDATE ... RETURNING instead of
+        loading the menu first; a new parent is then validated against the
+        returned row, so callers must roll back on ValueError. With
+        tenant_id, menus of other tenants are left alone (None is returned).
+        """
+        # Get update data
+        update_data = menu_data.model_dump(exclude_unset=True)
+        if not update_data:
+            return await MenuService.get_menu_by_id(db, menu_id, tenant_id)
+        
+        stmt = update(Menu).where(Menu.id == menu_id, Menu.is_deleted == False)
+        if tenant_id is not None:
+            stmt = stmt.where(Menu.tenant_id == tenant_id)
+        result = await db.execute(stmt.values(**update_data).returning(Menu))
         menu = result.scalar_one_or_none()
         
         if not menu:
             return None
         
-        # Get update data
-        update_data = menu_data.model_dump(exclude_unset=True)
-        
         # Validate parent menu if being updated
         if 'parent_id' in update_data:
             new_parent_id = update_data['parent_id']
@@ -185,37 +205,28 @@ class MenuService:
             if not await MenuService.validate_parent_menu(db, new_parent_id, menu.tenant_id):
                 raise ValueError("Invalid parent menu")
             
-            # Check circular reference
+            # Check circular reference (the new parent chain is already written;
+            # the walk still stops once it reaches menu_id)
             if not await MenuService.check_circular_reference(db, menu_id, new_parent_id):
                 raise ValueError("Circular reference detected")
         
-        # Update fields
-        for field, value in update_data.items():
-            setattr(menu, field, value)
-        
-        await db.flush()
-        await db.refresh(menu)
-        
         # Clear cache after update
-        await MenuService._clear_menu_cache()
+        await MenuService._clear_menu_cache(db)
         
         return menu
     
     @staticmethod
-    async def delete_menu(db: AsyncSession, menu_id: str) -> bool:
-        """Soft delete a menu."""
-        stmt = select(Menu).where(Menu.id == menu_id, Menu.is_deleted == False)
-        result = await db.execute(stmt)
-        menu = result.scalar_one_or_none()
-        
-        if not menu:
+    async def delete_menu(db: AsyncSession, menu_id: str, tenant_id: Optional[str] = None) -> bool:
+        """Soft delete a menu (one UPDATE ... RETURNING; other tenants' menus are left alone)."""
+        stmt = update(Menu).where(Menu.id == menu_id, Menu.is_deleted == False)
+        if tenant_id is not None:
+            stmt = stmt.where(Menu.tenant_id == tenant_id)
+        result = await db.execute(stmt.values(is_deleted=True).returning(Menu.id))
+        if result.first() is None:
             return False
         
-        menu.is_deleted = True
-        await db.flush()
-        
         # Clear cache after delete
-        await MenuService._clear_menu_cache()
+        await MenuService._clear_menu_cache(db)
         
         return True
     
@@ -227,13 +238,24 @@ class MenuService:
         page_size: int = 20,
         keyword: Optional[str] = None,
         menu_type: Optional[int] = None,
-        status: Optional[int] = None
-    ) -> tuple[List[Menu], int]:
+        status: Optional[int] = None,
+        cursor: Optional[str] = None,
+        include_total: bool = True
+    ) -> tuple[List[Menu], Optional[int], Optional[str]]:
         """
         Get all menus with pagination and filters.
         
+        One extra row is fetched to tell whether another page follows. With a
+        cursor (next_cursor of the previous page) the page starts right after
+        it (keyset pagination on (sort, id)), page is ignored and no COUNT is
+        run (total is None). Without include_total, COUNT is skipped too and
+        total is None unless the page itself settles it.
+        
         Returns:
-            Tuple of (menus, total_count)
+            Tuple of (menus, total_count or None, next page cursor or None)
+            
+        Raises:
+            ValueError: If the cursor is malformed
         """
         # Build query
         stmt = select(Menu).where(
@@ -249,25 +271,40 @@ class MenuService:
         if status is not None:
             stmt = stmt.where(Menu.status == status)
         
-        # Get total count
-        from sqlalchemy import func
-        count_stmt = select(func.count()).select_from(stmt.subquery())
-        total_result = await db.execute(count_stmt)
-        total = total_result.scalar()
-        
-        # Apply pagination and ordering
-        stmt = stmt.order_by(Menu.sort.asc(), Menu.id.asc())
-        stmt = stmt.offset((page - 1) * page_size).limit(page_size)
+        keys = (Menu.sort, Menu.id)
+        page_stmt = apply_keyset(stmt, keys, cursor)
+        if not cursor:
+            page_stmt = page_stmt.offset((page - 1) * page_size)
         
-        result = await db.execute(stmt)
+        # Past the first page the total usually has to be counted: run the
+        # COUNT concurrently with the page query
+        result, total = await execute_page(
+            db, page_stmt.limit(page_size + 1), stmt, include_total and not cursor and page > 1
+        )
         menus = list(result.scalars().all())
-        
-        return menus, total
+        has_more = len(menus) > page_size
+        del menus[page_size:]
+        
+        # Skip COUNT when the page settles the total (last page of an OFFSET listing)
+        if total is None and not cursor:
+            if not has_more and (menus or page == 1):
+                total = (page - 1) * page_size + len(menus)
+            elif include_total:
+                total = await count_rows(db, stmt)
+        
+        next_cursor = encode_cursor(menus[-1], keys) if has_more else None
+        return menus, total, next_cursor
     
     @staticmethod
-    async def get_menu_by_id(db: AsyncSession, menu_id: str) -> Optional[Menu]:
-        """Get a single menu by ID."""
+    async def get_menu_by_id(
+        db: AsyncSession,
+        menu_id: str,
+        tenant_id: Optional[str] = None
+    ) -> Optional[Menu]:
+        """Get a single menu by ID, optionally only within a tenant."""
         stmt = select(Menu).where(Menu.id == menu_id, Menu.is_deleted == False)
+        if tenant_id is not None:
+            stmt = stmt.where(Menu.tenant_id == tenant_id)
         result = await db.execute(stmt)
         return result.scalar_one_or_none()
     
@@ -276,16 +313,21 @@ class MenuService:
         """
         Get complete menu tree (without permission filtering).
         For admin use only.
+        
+        The recursive CTE returns the menus depth-first (parents before
+        children, siblings by sort), so the tree is nested in one pass.
         """
-        stmt = select(Menu).where(
+        stmt = tree_select(
+            Menu,
             Menu.tenant_id == tenant_id,
-            Menu.is_deleted == False
-        ).order_by(Menu.sort.asc(), Menu.id.asc())
+            Menu.is_deleted == False,
+            order_by=(Menu.sort.asc(), Menu.id.asc())
+        )
         
         result = await db.execute(stmt)
-        menus = list(result.scalars().all())
-        
-        return MenuService.build_menu_tree(menus)
+        return nest_nodes(
+            _MENU_TREE_NODES.validate_python(result.scalars().all(), from_attributes=True)
+        )
     
     @staticmethod
     async def validate_parent_menu(db: AsyncSession, parent_id: Optional[str], tenant_id: str) -> bool:
@@ -352,9 +394,16 @@ class MenuService:
         return True
     
     @staticmethod
-    async def _clear_menu_cache():
-        """Clear all menu caches."""
+    async def _clear_menu_cache(db: AsyncSession):
+        """
+        Clear all menu caches and invalidate the menu tree ETags.
+        
+        The menus version is bumped only once db commits: bumped earlier, a
+        concurrent GET could cache the old tree under the new ETag.
+        """
         from app.core.redis import RedisClient
+        from app.utils.cache import TreeVersionCache
+        TreeVersionCache.bump_after_commit(db, TreeVersionCache.MENUS)
         redis = RedisClient.get_client()
         
         # Delete all user menu caches
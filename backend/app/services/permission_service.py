@@ -2,11 +2,18 @@
 Permission service for permission management and tree building.
 """
 from typing import List, Optional
+from pydantic import TypeAdapter
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.models.associations import RolePermission, UserRole
 from app.models.permission import Permission
 from app.schemas.permission import PermissionTreeNode, PermissionCreate, PermissionUpdate
+from app.utils.cache import TreeVersionCache
+from app.utils.tree import nest_nodes, tree_select
+
+# Validates a whole list of permissions into tree nodes in one call
+_PERMISSION_TREE_NODES = TypeAdapter(List[PermissionTreeNode])
 
 
 class PermissionService:
@@ -32,6 +39,35 @@ class PermissionService:
         result = await db.execute(stmt)
         return list(result.scalars().all())
     
+    @staticmethod
+    async def get_permission_tree(db: AsyncSession, tenant_id: str) -> List[PermissionTreeNode]:
+        """
+        Get the permission tree of a tenant.
+        
+        The recursive CTE returns the permissions depth-first (parents before
+        children, siblings by sort), so the tree is nested in one pass.
+        Permissions whose parent is missing are treated as roots.
+        
+        Args:
+            db: Database session
+            tenant_id: Tenant ID
+            
+        Returns:
+            Tree structure with nested children
+        """
+        stmt = tree_select(
+            Permission,
+            Permission.tenant_id == tenant_id,
+            Permission.is_deleted == False,
+            order_by=(Permission.sort.asc(), Permission.id.asc()),
+            orphans_as_roots=True
+        )
+        
+        result = await db.execute(stmt)
+        return nest_nodes(
+            _PERMISSION_TREE_NODES.validate_python(result.scalars().all(), from_attributes=True)
+        )
+    
     @staticmethod
     def build_permission_tree(permissions: List[Permission]) -> List[PermissionTreeNode]:
         """
@@ -92,7 +128,7 @@ class PermissionService:
         )
         db.add(perm)
         await db.flush()
-        await db.refresh(perm)
+        TreeVersionCache.bump_after_commit(db, TreeVersionCache.PERMISSIONS)
         return perm
     
     @staticmethod
@@ -118,8 +154,31 @@ class PermissionService:
             setattr(perm, field, value)
         
         await db.flush()
-        await db.refresh(perm)
+        TreeVersionCache.bump_after_commit(db, TreeVersionCache.PERMISSIONS)
+        
+        # code, status and type decide which codes end up in users' cached permissions
+        if {"code", "status", "type"} & update_data.keys():
+            await PermissionService._clear_users_cache_for_permission(db, perm_id)
+        
         return perm
+    
+    @staticmethod
+    async def _clear_users_cache_for_permission(db: AsyncSession, perm_id: str) -> None:
+        """
+        Clear permission cache for all users who have this permission through a role.
+        
+        Args:
+            db: Database session
+            perm_id: Permission ID
+        """
+        from app.core.permissions import clear_users_permission_cache
+        
+        stmt = select(UserRole.user_id).distinct().join(
+            RolePermission, RolePermission.role_id == UserRole.role_id
+        ).where(RolePermission.permission_id == perm_id)
+        result = await db.execute(stmt)
+        
+        await clear_users_permission_cache(db, result.scalars().all())
 
 
 # Global instance
@@ -4,6 +4,7 @@ Role service for role management and permission assignment.
 from typing import List, Optional
 from sqlalchemy import select, delete
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import lazyload, selectinload
 
 from app.models.role import Role
 from app.models.permission import Permission
@@ -36,12 +37,25 @@ class RoleService:
         return list(result.scalars().all())
     
     @staticmethod
-    async def get_role_by_id(db: AsyncSession, role_id: str) -> Optional[Role]:
-        """Get role by ID."""
+    async def get_role_by_id(
+        db: AsyncSession,
+        role_id: str,
+        load_permissions: bool = False
+    ) -> Optional[Role]:
+        """
+        Get role by ID.
+        
+        With load_permissions, role.permissions is fetched in one extra
+        SELECT ... IN (Permission.roles is not loaded back).
+        """
         stmt = select(Role).where(
             Role.id == role_id,
             Role.is_deleted == False
         )
+        if load_permissions:
+            stmt = stmt.options(
+                selectinload(Role.permissions).options(lazyload(Permission.roles))
+            )
         result = await db.execute(stmt)
         return result.scalar_one_or_none()
     
@@ -82,7 +96,6 @@ class RoleService:
         role = Role(**role_dict, tenant_id=tenant_id)
         db.add(role)
         await db.flush()
-        await db.refresh(role)
         
         # Assign permissions
         if permission_ids:
@@ -105,8 +118,9 @@ class RoleService:
         update_data = role_data.model_dump(exclude_unset=True)
         permission_ids = update_data.pop("permission_ids", None)
         
-        # Track if data_scope changed (affects cache)
-        data_scope_changed = "data_scope" in update_data
+        # Track if cached fields changed (name, code, status and data_scope affect
+        # the cached roles, permissions, data scope and user info of the role's users)
+        cached_fields_changed = bool({"name", "code", "status", "data_scope"} & update_data.keys())
         
         # Update role fields
         for field, value in update_data.items():
@@ -124,11 +138,10 @@ class RoleService:
             if permission_ids:
                 await RoleService._assign_permissions(db, role_id, permission_ids)
         
-        # Clear cache for all users with this role if permissions or data_scope changed
-        if permission_ids is not None or data_scope_changed:
+        # Clear cache for all users with this role if permissions or cached fields changed
+        if permission_ids is not None or cached_fields_changed:
             await RoleService._clear_users_cache_for_role(db, role_id)
         
-        await db.refresh(role)
         return role
     
     @staticmethod
@@ -204,16 +217,14 @@ class RoleService:
             db: Database session
             role_id: Role ID
         """
-        from app.core.permissions import clear_user_permission_cache
+        from app.core.permissions import clear_users_permission_cache
         
         # Get all user IDs with this role
         stmt = select(UserRole.user_id).where(UserRole.role_id == role_id)
         result = await db.execute(stmt)
-        user_ids = [row[0] for row in result.all()]
         
         # Clear cache for all affected users
-        for user_id in user_ids:
-            await clear_user_permission_cache(user_id)
+        await clear_users_permission_cache(db, result.scalars().all())
 
 
 # Global instance
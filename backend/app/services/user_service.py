@@ -1,10 +1,11 @@
 """
 User service.
 """
+import logging
 from datetime import datetime, timezone
-from typing import Optional, List, Tuple
-from sqlalchemy import select, func, delete
-from sqlalchemy.orm import joinedload
+from typing import AsyncIterator, Optional, List, Tuple
+from sqlalchemy import Select, select, func, delete, update
+from sqlalchemy.orm import joinedload, lazyload, selectinload
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.models.user import User
@@ -13,9 +14,24 @@ from app.models.department import Department
 from app.models.associations import UserRole
 from app.models.tenant import Tenant
 
+from app.core.database import AsyncSessionLocal
 from app.core.security import get_password_hash
 from app.services.department_service import department_service, DepartmentService
 from app.services.role_service import RoleService
+from app.utils.pagination import apply_keyset, count_rows, encode_cursor, execute_page
+
+logger = logging.getLogger(__name__)
+
+# Rows fetched per round trip when streaming a user list
+_STREAM_BATCH_SIZE = 50
+
+# Load user.roles with one SELECT ... IN, without the selectin cascade from
+# Role (users, permissions, departments)
+_ROLES_ONLY = selectinload(User.roles).options(
+    lazyload(Role.users),
+    lazyload(Role.permissions),
+    lazyload(Role.custom_departments),
+)
 
 
 class UserService:
@@ -51,8 +67,19 @@ class UserService:
         return await UserService.get_by_username(db, username, tenant_id)
     
     @staticmethod
-    async def get_by_id(db: AsyncSession, user_id: str) -> Optional[User]:
-        """Get user by ID with department name."""
+    async def get_by_id(
+        db: AsyncSession,
+        user_id: str,
+        load_roles: bool = False,
+        tenant_id: Optional[str] = None
+    ) -> Optional[User]:
+        """
+        Get user by ID with department name.
+        
+        With load_roles, user.roles is fetched in one extra SELECT ... IN,
+        without the selectin cascade from Role (users, permissions, departments).
+        With tenant_id, users of other tenants are filtered out in the query.
+        """
         stmt = (
             select(User, Department.name.label('dept_name'))
             .outerjoin(Department, User.dept_id == Department.id)
@@ -61,6 +88,10 @@ class UserService:
                 User.is_deleted == False
             )
         )
+        if tenant_id is not None:
+            stmt = stmt.where(User.tenant_id == tenant_id)
+        if load_roles:
+            stmt = stmt.options(_ROLES_ONLY)
         result = await db.execute(stmt)
         row = result.first()
         
@@ -74,10 +105,10 @@ class UserService:
         return user
 
     @staticmethod
-    async def get_user_list(
+    async def user_list_query(
         db: AsyncSession,
-        page: str = 1,
-        page_size: str = 10,
+        page: int = 1,
+        page_size: int = 10,
         username: str = None,
         email: str = None,
         phone: str = None,
@@ -86,12 +117,22 @@ class UserService:
         dept_id: str = None,
         last_login_start: Optional[datetime] = None,
         last_login_end: Optional[datetime] = None,
-        tenant_id: str = None
-    ) -> Tuple[List[User], int]:
+        tenant_id: str = None,
+        cursor: Optional[str] = None
+    ) -> Tuple[Select, Select, Tuple]:
         """
-        Get user list with pagination and filtering.
+        Build the queries of a user list page.
         Includes department information via left join.
         When dept_id is provided, includes users from all sub-departments.
+        With a cursor (next_cursor of the previous page) the page starts right
+        after it (keyset pagination on (created_at, id)) and page is ignored.
+        
+        Returns:
+            Tuple of (page query fetching page_size + 1 rows, join-free COUNT
+            base query, keyset columns)
+            
+        Raises:
+            ValueError: If the cursor is malformed
         """
         # Convert timezone-aware datetime to timezone-naive for database comparison
         # Database uses TIMESTAMP WITHOUT TIME ZONE, so we need to remove timezone info
@@ -110,77 +151,138 @@ class UserService:
             if not dept_ids:
                 dept_ids = [dept_id]
         
-        # Build base query with left join to department
-        base_stmt = (
-            select(User, Department.name.label('dept_name'))
-            .outerjoin(Department, User.dept_id == Department.id)
-            .where(User.is_deleted == False)
-        )
-        
-        # Apply filters to base query
+        # Filters shared by the page query and the COUNT
+        criteria = [User.is_deleted == False]
         if tenant_id:
-            base_stmt = base_stmt.where(User.tenant_id == tenant_id)
+            criteria.append(User.tenant_id == tenant_id)
         if username:
-            base_stmt = base_stmt.where(User.username.like(f"%{username}%"))
+            criteria.append(User.username.like(f"%{username}%"))
         if email:
-            base_stmt = base_stmt.where(User.email.like(f"%{email}%"))
+            criteria.append(User.email.like(f"%{email}%"))
         if phone:
-            base_stmt = base_stmt.where(User.phone.like(f"%{phone}%"))
+            criteria.append(User.phone.like(f"%{phone}%"))
         if status is not None:
-            base_stmt = base_stmt.where(User.status == status)
+            criteria.append(User.status == status)
         if user_type is not None:
-            base_stmt = base_stmt.where(User.user_type == user_type)
+            criteria.append(User.user_type == user_type)
         if dept_ids:
             # Use IN query to match the department and all its sub-departments
-            base_stmt = base_stmt.where(User.dept_id.in_(dept_ids))
+            criteria.append(User.dept_id.in_(dept_ids))
         if last_login_start:
-            base_stmt = base_stmt.where(User.last_login_time >= last_login_start)
+            criteria.append(User.last_login_time >= last_login_start)
         if last_login_end:
-            base_stmt = base_stmt.where(User.last_login_time <= last_login_end)
-            
-        # Count total (build count query with same filters, but without join)
-        count_base = select(User).where(User.is_deleted == False)
-        if tenant_id:
-            count_base = count_base.where(User.tenant_id == tenant_id)
-        if username:
-            count_base = count_base.where(User.username.like(f"%{username}%"))
-        if email:
-            count_base = count_base.where(User.email.like(f"%{email}%"))
-        if phone:
-            count_base = count_base.where(User.phone.like(f"%{phone}%"))
-        if status is not None:
-            count_base = count_base.where(User.status == status)
-        if user_type is not None:
-            count_base = count_base.where(User.user_type == user_type)
-        if dept_ids:
-            # Use IN query to match the department and all its sub-departments
-            count_base = count_base.where(User.dept_id.in_(dept_ids))
-        if last_login_start:
-            count_base = count_base.where(User.last_login_time >= last_login_start)
-        if last_login_end:
-            count_base = count_base.where(User.last_login_time <= last_login_end)
+            criteria.append(User.last_login_time <= last_login_end)
         
-        count_stmt = select(func.count()).select_from(count_base.subquery())
-        total_result = await db.execute(count_stmt)
-        total = total_result.scalar() or 0
+        # Page query with left join to department: newest first;
+        # (created_at, id) doubles as the keyset. The page's roles come in one
+        # more SELECT ... IN (no per-user loads, no cascade into Role)
+        base_stmt = (
+            select(User, Department.name.label('dept_name'))
+            .outerjoin(Department, User.dept_id == Department.id)
+            .where(*criteria)
+            .options(_ROLES_ONLY)
+        )
+        keys = (User.created_at, User.id)
+        stmt = apply_keyset(base_stmt, keys, cursor, descending=True)
+        if not cursor:
+            stmt = stmt.offset((page - 1) * page_size)
         
-        # Pagination
-        stmt = base_stmt.order_by(User.created_at.desc())
-        stmt = stmt.offset((page - 1) * page_size).limit(page_size)
+        # Count without the join
+        count_base = select(User.id).where(*criteria)
+        return stmt.limit(page_size + 1), count_base, keys
+
+    @staticmethod
+    async def get_user_list(
+        db: AsyncSession,
+        page: str = 1,
+        page_size: str = 10,
+        cursor: Optional[str] = None,
+        include_total: bool = True,
+        **filters
+    ) -> Tuple[List[User], Optional[int], Optional[str]]:
+        """
+        Get user list with pagination and filtering (see user_list_query).
+        With a cursor no COUNT is run (total is None). Without include_total,
+        COUNT is skipped too and total is None unless the page itself
+        settles it.
         
-        result = await db.execute(stmt)
+        Returns:
+            Tuple of (users, total count or None, next page cursor or None)
+            
+        Raises:
+            ValueError: If the cursor is malformed
+        """
+        stmt, count_base, keys = await UserService.user_list_query(
+            db, page=page, page_size=page_size, cursor=cursor, **filters
+        )
+        
+        # Past the first page the total usually has to be counted: run the
+        # COUNT concurrently with the page query
+        result, total = await execute_page(
+            db, stmt, count_base, include_total and not cursor and page > 1
+        )
         rows = result.all()
+        has_more = len(rows) > page_size
         
         # Attach dept_name to user objects
         users = []
-        for row in rows:
+        for row in rows[:page_size]:
             user = row[0]  # User object
             dept_name = row[1]  # Department name
             # Add dept_name as a dynamic attribute
             user.dept_name = dept_name
             users.append(user)
         
-        return users, total
+        # Skip COUNT when the page settles the total (last page of an OFFSET listing)
+        if total is None and not cursor:
+            if not has_more and (users or page == 1):
+                total = (page - 1) * page_size + len(users)
+            elif include_total:
+                total = await count_rows(db, count_base)
+        
+        next_cursor = encode_cursor(users[-1], keys) if has_more else None
+        return users, total, next_cursor
+
+    @staticmethod
+    async def stream_user_list(
+        stmt: Select,
+        count_base: Select,
+        keys: Tuple,
+        page: int,
+        page_size: int,
+        page_info: dict,
+        cursor: Optional[str] = None,
+        include_total: bool = True
+    ) -> AsyncIterator[User]:
+        """
+        Stream the users of a page built by user_list_query, batch by batch.
+        
+        Runs on its own session: a streamed response outlives the request's
+        session. Once all users are consumed, page_info holds "total" and
+        "next_cursor" as returned by get_user_list.
+        """
+        async with AsyncSessionLocal() as db:
+            result = await db.stream(stmt.execution_options(yield_per=_STREAM_BATCH_SIZE))
+            count = 0
+            last_user = None
+            async for user, dept_name in result:
+                count += 1
+                if count > page_size:
+                    break
+                user.dept_name = dept_name
+                last_user = user
+                yield user
+            await result.close()
+            
+            has_more = count > page_size
+            total = None
+            if not cursor:
+                if not has_more and (last_user is not None or page == 1):
+                    total = (page - 1) * page_size + count
+                elif include_total:
+                    total = await count_rows(db, count_base)
+            page_info["total"] = total
+            page_info["next_cursor"] = encode_cursor(last_user, keys) if has_more else None
 
     @staticmethod
     async def create_user(
@@ -270,38 +372,56 @@ class UserService:
     async def update_user(
         db: AsyncSession,
         user_id: str,
-        user_in: dict
+        user_in: dict,
+        tenant_id: Optional[str] = None
     ) -> Optional[User]:
-        """Update user."""
-        user = await UserService.get_by_id(db, user_id)
-        if not user:
-            return None
+        """
+        Update user.
         
+        The columns are written with a single UPDATE ... RETURNING instead of
+        loading the user first; department and roles are then validated
+        against the tenant it returns, so callers must roll back on
+        ValueError. With tenant_id, users of other tenants are left alone
+        (None is returned).
+        """
         # Business validation: Check if email exists (if being updated, exclude current user)
         if "email" in user_in and user_in["email"] is not None and user_in["email"] != "":
-            # Skip check if new email is the same as current user's email
-            if user_in["email"] != user.email:
-                stmt = select(User).where(
-                    User.email == user_in["email"],
-                    User.id != user_id,
-                    User.is_deleted == False
-                )
-                result = await db.execute(stmt)
-                if result.scalars().first():
-                    raise ValueError("Email already exists")
+            stmt = select(User.id).where(
+                User.email == user_in["email"],
+                User.id != user_id,
+                User.is_deleted == False
+            )
+            result = await db.execute(stmt)
+            if result.first():
+                raise ValueError("Email already exists")
         
         # Business validation: Check if phone exists (if being updated, exclude current user)
         if "phone" in user_in and user_in["phone"] is not None and user_in["phone"] != "":
-            # Skip check if new phone is the same as current user's phone
-            if user_in["phone"] != user.phone:
-                stmt = select(User).where(
-                    User.phone == user_in["phone"],
-                    User.id != user_id,
-                    User.is_deleted == False
-                )
-                result = await db.execute(stmt)
-                if result.scalars().first():
-                    raise ValueError("Phone number already exists")
+            stmt = select(User.id).where(
+                User.phone == user_in["phone"],
+                User.id != user_id,
+                User.is_deleted == False
+            )
+            result = await db.execute(stmt)
+            if result.first():
+                raise ValueError("Phone number already exists")
+        
+        # Update basic fields
+        values = {
+            field: user_in[field]
+            for field in ["email", "phone", "real_name", "nickname", "dept_id", "position", "gender", "status", "remark"]
+            if field in user_in and user_in[field] is not None
+        }
+        if values:
+            stmt = update(User).where(User.id == user_id, User.is_deleted == False)
+            if tenant_id is not None:
+                stmt = stmt.where(User.tenant_id == tenant_id)
+            result = await db.execute(stmt.values(**values).returning(User))
+            user = result.scalar_one_or_none()
+        else:
+            user = await UserService.get_by_id(db, user_id, tenant_id=tenant_id)
+        if not user:
+            return None
         
         # Business validation: Check if department exists (if being updated)
         if "dept_id" in user_in and user_in["dept_id"] is not None:
@@ -318,11 +438,11 @@ class UserService:
                 # Check tenant match for roles
                 if role.tenant_id != user.tenant_id and user.tenant_id != "0":
                     raise ValueError(f"Role {role_id} does not belong to current tenant")
-            
-        # Update basic fields
-        for field in ["email", "phone", "real_name", "nickname", "dept_id", "position", "gender", "status", "remark"]:
-            if field in user_in and user_in[field] is not None:
-                setattr(user, field, user_in[field])
+        
+        # real_name is part of the cached /auth/user-info payload
+        if user_in.get("real_name") is not None:
+            from app.utils.cache import PermissionCache
+            await PermissionCache.clear_user_info(user_id)
                 
         # Update roles if provided
         if "role_ids" in user_in and user_in["role_ids"] is not None:
@@ -342,41 +462,65 @@ class UserService:
             
             # Clear user permission cache when roles change
             from app.core.permissions import clear_user_permission_cache
-            await clear_user_permission_cache(user_id)
+            await clear_user_permission_cache(db, user_id)
         
-        await db.flush()  # Flush changes to get updated user
-        await db.refresh(user)  # Refresh to get latest state
+        await db.flush()
         return user
 
     @staticmethod
-    async def delete_user(db: AsyncSession, user_id: str) -> bool:
-        """Soft delete user."""
-        user = await UserService.get_by_id(db, user_id)
-        if not user:
-            return False
-            
-        user.is_deleted = True
-        # user.deleted_at = datetime.now() # Handled by mixin if implemented, else manual
+    async def delete_user(db: AsyncSession, user_id: str, tenant_id: Optional[str] = None) -> bool:
+        """Soft delete user (one UPDATE ... RETURNING; other tenants' users are left alone)."""
+        stmt = update(User).where(User.id == user_id, User.is_deleted == False)
+        if tenant_id is not None:
+            stmt = stmt.where(User.tenant_id == tenant_id)
+        result = await db.execute(stmt.values(is_deleted=True).returning(User.id))
+        return result.first() is not None
+
+    @staticmethod
+    async def update_login_info(user_id: str, ip: str, login_time: float) -> None:
+        """
+        Record a successful login (last login time/IP, login count).
         
-        return True
+        Runs as a background task with its own session, as a single UPDATE.
+        login_time is a Unix timestamp; it is converted to datetime here, off
+        the request path.
+        """
+        async with AsyncSessionLocal() as db:
+            try:
+                await db.execute(
+                    update(User)
+                    .where(User.id == user_id)
+                    .values(
+                        last_login_time=datetime.fromtimestamp(login_time),
+                        last_login_ip=ip,
+                        login_count=func.coalesce(User.login_count, 0) + 1,
+                    )
+                )
+                await db.commit()
+            except Exception:
+                logger.exception("Failed to update login info of user %s", user_id)
+                await db.rollback()
 
     @staticmethod
     async def reset_password(
         db: AsyncSession,
         user_id: str,
-        password: str
+        password: str,
+        tenant_id: Optional[str] = None
     ) -> bool:
-        """Reset user password."""
-        user = await UserService.get_by_id(db, user_id)
-        if not user:
-            return False
-            
+        """Reset user password (one UPDATE ... RETURNING; other tenants' users are left alone)."""
         hashed_password = get_password_hash(password)
-        user.password = hashed_password
-        user.password_updated_at = datetime.now()
-        user.must_change_password = False
-        
-        return True
+        stmt = update(User).where(User.id == user_id, User.is_deleted == False)
+        if tenant_id is not None:
+            stmt = stmt.where(User.tenant_id == tenant_id)
+        result = await db.execute(
+            stmt.values(
+                password=hashed_password,
+                password_updated_at=datetime.now(),
+                must_change_password=False,
+            ).returning(User.id)
+        )
+        return result.first() is not None
     
     @staticmethod
     async def get_user_roles(db: AsyncSession, user_id: str) -> List[Role]:
@@ -3,10 +3,16 @@
 
 提供部门数据的Redis缓存操作。
 """
+import asyncio
 import json
 import logging
-from typing import Optional, List, Dict, Any, Union
+from typing import Any, Dict, Iterable, List, Optional, Set, Union
+
+import orjson
 from redis.asyncio import Redis
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
 
 from app.core.redis import RedisClient
 from app.schemas.department import DepartmentResponse, DepartmentTreeNode
@@ -38,6 +44,9 @@ class DepartmentCache:
     CACHE_KEY_TREE = "dept:tree:{tenant_id}"
     CACHE_KEY_DETAIL = "dept:detail:{dept_id}"
     
+    # 部门树缓存过期时间（秒），写操作时也会主动清除
+    TREE_EXPIRE_SECONDS = 60
+    
     @staticmethod
     def _get_redis() -> Optional[Redis]:
         """获取Redis客户端，失败时返回None"""
@@ -161,7 +170,7 @@ class DepartmentCache:
             
             tree_dicts = [serialize_tree_node(node) for node in tree]
             cached_data = json.dumps(tree_dicts, ensure_ascii=False)
-            await redis.set(cache_key, cached_data)
+            await redis.set(cache_key, cached_data, ex=DepartmentCache.TREE_EXPIRE_SECONDS)
             return True
         except Exception as e:
             logger.warning(f"Failed to set departments tree to cache: {e}")
@@ -339,12 +348,13 @@ class PermissionCache:
     """用户权限数据缓存工具类"""
     
     # 缓存键前缀
-    CACHE_KEY_PERMISSIONS = "user:permissions:{user_id}"
-    CACHE_KEY_ROLES = "user:roles:{user_id}"
-    CACHE_KEY_DATA_SCOPE = "user:data_scope:{user_id}"
+    CACHE_KEY_USER_INFO = "user:info:{user_id}"
+    CACHE_KEY_ACCESS = "user:access:{user_id}"
     
-    # 缓存过期时间（秒）- 15分钟
-    CACHE_EXPIRE_SECONDS = 15 * 60
+    # 用户信息（/auth/user-info）缓存过期时间（秒）
+    USER_INFO_EXPIRE_SECONDS = 60
+    # 用户访问数据（权限码、角色码、数据权限范围）缓存过期时间（秒）- 5分钟
+    PERMISSIONS_EXPIRE_SECONDS = 5 * 60
     
     @staticmethod
     def _get_redis() -> Optional[Redis]:
@@ -356,39 +366,59 @@ class PermissionCache:
             return None
     
     @staticmethod
-    async def get_user_permissions(user_id: Union[int, str]) -> Optional[set]:
+    def access_key(user_id: Union[int, str]) -> str:
+        """用户访问数据缓存键（供与其他命令合并为一个管道读取）"""
+        return PermissionCache.CACHE_KEY_ACCESS.format(user_id=_to_id_string(user_id))
+    
+    @staticmethod
+    def decode_access(cached_data: Optional[str]) -> Optional[Dict[str, Any]]:
+        """解析用户访问数据缓存值，空值或格式错误返回None"""
+        if not cached_data:
+            return None
+        try:
+            return orjson.loads(cached_data)
+        except orjson.JSONDecodeError as e:
+            logger.warning(f"Failed to decode user access cache: {e}")
+            return None
+    
+    @staticmethod
+    async def get_user_access(user_id: Union[int, str]) -> Optional[Dict[str, Any]]:
         """
-        获取用户权限缓存
+        获取用户访问数据缓存（权限码、角色码、数据权限范围合并为一个键）
         
         Args:
             user_id: 用户ID
             
         Returns:
-            权限码集合，缓存未命中返回None
+            {"p": 权限码列表, "r": 角色码列表, "d": 数据权限范围值}，缓存未命中返回None
         """
         redis = PermissionCache._get_redis()
         if not redis:
             return None
         
         try:
-            cache_key = PermissionCache.CACHE_KEY_PERMISSIONS.format(user_id=_to_id_string(user_id))
-            cached_data = await redis.get(cache_key)
-            if cached_data:
-                permissions_list = json.loads(cached_data)
-                return set(permissions_list)
+            cached_data = await redis.get(PermissionCache.access_key(user_id))
+            return PermissionCache.decode_access(cached_data)
         except Exception as e:
-            logger.warning(f"Failed to get user permissions from cache: {e}")
+            logger.warning(f"Failed to get user access from cache: {e}")
         
         return None
     
     @staticmethod
-    async def set_user_permissions(user_id: Union[int, str], permissions: set) -> bool:
+    async def set_user_access(
+        user_id: Union[int, str],
+        permissions: Iterable[str],
+        roles: Iterable[str],
+        data_scope: int
+    ) -> bool:
         """
-        设置用户权限缓存
+        设置用户访问数据缓存
         
         Args:
             user_id: 用户ID
             permissions: 权限码集合
+            roles: 角色码集合
+            data_scope: 数据权限范围值（DataScope枚举值）
             
         Returns:
             是否设置成功
@@ -398,50 +428,48 @@ class PermissionCache:
             return False
         
         try:
-            cache_key = PermissionCache.CACHE_KEY_PERMISSIONS.format(user_id=_to_id_string(user_id))
-            permissions_list = list(permissions)
-            cached_data = json.dumps(permissions_list, ensure_ascii=False)
-            await redis.set(cache_key, cached_data, ex=PermissionCache.CACHE_EXPIRE_SECONDS)
+            cache_key = PermissionCache.CACHE_KEY_ACCESS.format(user_id=_to_id_string(user_id))
+            cached_data = orjson.dumps({"p": list(permissions), "r": list(roles), "d": data_scope})
+            await redis.set(cache_key, cached_data, ex=PermissionCache.PERMISSIONS_EXPIRE_SECONDS)
             return True
         except Exception as e:
-            logger.warning(f"Failed to set user permissions to cache: {e}")
+            logger.warning(f"Failed to set user access to cache: {e}")
         
         return False
     
     @staticmethod
-    async def get_user_roles(user_id: Union[int, str]) -> Optional[set]:
+    async def get_user_info(user_id: Union[int, str]) -> Optional[Dict[str, Any]]:
         """
-        获取用户角色缓存
+        获取用户信息缓存（/auth/user-info 的 data 部分）
         
         Args:
             user_id: 用户ID
             
         Returns:
-            角色码集合，缓存未命中返回None
+            用户信息字典，缓存未命中返回None
         """
         redis = PermissionCache._get_redis()
         if not redis:
             return None
         
         try:
-            cache_key = PermissionCache.CACHE_KEY_ROLES.format(user_id=_to_id_string(user_id))
+            cache_key = PermissionCache.CACHE_KEY_USER_INFO.format(user_id=_to_id_string(user_id))
             cached_data = await redis.get(cache_key)
             if cached_data:
-                roles_list = json.loads(cached_data)
-                return set(roles_list)
+                return orjson.loads(cached_data)
         except Exception as e:
-            logger.warning(f"Failed to get user roles from cache: {e}")
+            logger.warning(f"Failed to get user info from cache: {e}")
         
         return None
     
     @staticmethod
-    async def set_user_roles(user_id: Union[int, str], roles: set) -> bool:
+    async def set_user_info(user_id: Union[int, str], user_info: Dict[str, Any]) -> bool:
         """
-        设置用户角色缓存
+        设置用户信息缓存
         
         Args:
             user_id: 用户ID
-            roles: 角色码集合
+            user_info: 用户信息字典
             
         Returns:
             是否设置成功
@@ -451,162 +479,279 @@ class PermissionCache:
             return False
         
         try:
-            cache_key = PermissionCache.CACHE_KEY_ROLES.format(user_id=_to_id_string(user_id))
-            roles_list = list(roles)
-            cached_data = json.dumps(roles_list, ensure_ascii=False)
-            await redis.set(cache_key, cached_data, ex=PermissionCache.CACHE_EXPIRE_SECONDS)
+            cache_key = PermissionCache.CACHE_KEY_USER_INFO.format(user_id=_to_id_string(user_id))
+            await redis.set(cache_key, orjson.dumps(user_info), ex=PermissionCache.USER_INFO_EXPIRE_SECONDS)
             return True
         except Exception as e:
-            logger.warning(f"Failed to set user roles to cache: {e}")
+            logger.warning(f"Failed to set user info to cache: {e}")
         
         return False
     
     @staticmethod
-    async def get_user_data_scope(user_id: Union[int, str]) -> Optional[int]:
+    async def clear_user_info(user_id: Union[int, str]) -> bool:
         """
-        获取用户数据权限范围缓存
+        清除用户信息缓存
         
         Args:
             user_id: 用户ID
             
         Returns:
-            数据权限范围值（DataScope枚举值），缓存未命中返回None
+            是否清除成功
         """
         redis = PermissionCache._get_redis()
         if not redis:
-            return None
+            return False
         
         try:
-            cache_key = PermissionCache.CACHE_KEY_DATA_SCOPE.format(user_id=_to_id_string(user_id))
-            cached_data = await redis.get(cache_key)
-            if cached_data:
-                return int(cached_data)
+            cache_key = PermissionCache.CACHE_KEY_USER_INFO.format(user_id=_to_id_string(user_id))
+            await redis.delete(cache_key)
+            return True
         except Exception as e:
-            logger.warning(f"Failed to get user data scope from cache: {e}")
+            logger.warning(f"Failed to clear user info cache: {e}")
         
-        return None
+        return False
     
     @staticmethod
-    async def set_user_data_scope(user_id: Union[int, str], data_scope: int) -> bool:
+    async def clear_all_user_cache(user_id: Union[int, str]) -> bool:
         """
-        设置用户数据权限范围缓存
+        清除用户所有权限相关缓存
         
         Args:
             user_id: 用户ID
-            data_scope: 数据权限范围值（DataScope枚举值）
             
         Returns:
-            是否设置成功
+            是否清除成功
         """
         redis = PermissionCache._get_redis()
         if not redis:
             return False
         
         try:
-            cache_key = PermissionCache.CACHE_KEY_DATA_SCOPE.format(user_id=_to_id_string(user_id))
-            await redis.set(cache_key, str(data_scope), ex=PermissionCache.CACHE_EXPIRE_SECONDS)
+            user_info_key = PermissionCache.CACHE_KEY_USER_INFO.format(user_id=_to_id_string(user_id))
+            access_key = PermissionCache.CACHE_KEY_ACCESS.format(user_id=_to_id_string(user_id))
+            
+            await redis.delete(user_info_key, access_key)
             return True
         except Exception as e:
-            logger.warning(f"Failed to set user data scope to cache: {e}")
+            logger.warning(f"Failed to clear all user permission cache: {e}")
         
         return False
     
     @staticmethod
-    async def clear_user_permissions(user_id: Union[int, str]) -> bool:
+    async def clear_users_cache(user_ids: List[Union[int, str]]) -> bool:
         """
-        清除用户权限缓存
+        批量清除多个用户的所有权限相关缓存（一次DEL）
         
         Args:
-            user_id: 用户ID
+            user_ids: 用户ID列表
             
         Returns:
             是否清除成功
         """
+        if not user_ids:
+            return True
+        
         redis = PermissionCache._get_redis()
         if not redis:
             return False
         
         try:
-            cache_key = PermissionCache.CACHE_KEY_PERMISSIONS.format(user_id=_to_id_string(user_id))
-            await redis.delete(cache_key)
+            keys = []
+            for user_id in user_ids:
+                user_id = _to_id_string(user_id)
+                keys.append(PermissionCache.CACHE_KEY_USER_INFO.format(user_id=user_id))
+                keys.append(PermissionCache.CACHE_KEY_ACCESS.format(user_id=user_id))
+            
+            await redis.delete(*keys)
             return True
         except Exception as e:
-            logger.warning(f"Failed to clear user permissions cache: {e}")
+            logger.warning(f"Failed to clear users permission cache: {e}")
         
         return False
+
+
+
+class TreeVersionCache:
+    """树形数据版本号（用于树接口的ETag），写操作时递增"""
+    
+    # 缓存键前缀
+    CACHE_KEY_VERSION = "tree:version:{name}"
+    
+    CACHE_KEY_TREE = "tree:data:{etag}"
+    
+    # 树数据缓存过期时间（秒）；键中含版本号，写操作后旧键不再被读取
+    TREE_EXPIRE_SECONDS = 300
+    
+    # 版本号名称
+    MENUS = "menus"              # 菜单表
+    PERMISSIONS = "permissions"  # 权限表
+    GRANTS = "grants"            # 用户-角色-权限授权关系
+    
+    @staticmethod
+    def _get_redis() -> Optional[Redis]:
+        """获取Redis客户端，失败时返回None"""
+        try:
+            return RedisClient.get_client()
+        except Exception as e:
+            logger.warning(f"Failed to get Redis client: {e}")
+            return None
     
     @staticmethod
-    async def clear_user_roles(user_id: Union[int, str]) -> bool:
+    def version_key(name: str) -> str:
+        """版本号缓存键（供与其他命令合并为一个管道读取）"""
+        return TreeVersionCache.CACHE_KEY_VERSION.format(name=name)
+    
+    @staticmethod
+    async def get_versions(*names: str) -> Optional[List[int]]:
         """
-        清除用户角色缓存
+        获取多个版本号（一次MGET），未设置的版本号为0
         
         Args:
-            user_id: 用户ID
+            *names: 版本号名称
             
         Returns:
-            是否清除成功
+            版本号列表，Redis不可用时返回None（调用方不使用ETag）
         """
-        redis = PermissionCache._get_redis()
+        redis = TreeVersionCache._get_redis()
         if not redis:
-            return False
+            return None
         
         try:
-            cache_key = PermissionCache.CACHE_KEY_ROLES.format(user_id=_to_id_string(user_id))
-            await redis.delete(cache_key)
-            return True
+            keys = [TreeVersionCache.CACHE_KEY_VERSION.format(name=name) for name in names]
+            values = await redis.mget(keys)
+            return [int(value) if value else 0 for value in values]
         except Exception as e:
-            logger.warning(f"Failed to clear user roles cache: {e}")
+            logger.warning(f"Failed to get tree versions: {e}")
         
-        return False
+        return None
     
     @staticmethod
-    async def clear_user_data_scope(user_id: Union[int, str]) -> bool:
+    async def etag(scope: str, *names: str) -> Optional[str]:
         """
-        清除用户数据权限范围缓存
+        由作用域（租户/用户）和版本号生成弱ETag
         
         Args:
-            user_id: 用户ID
+            scope: 作用域，如 "menus:{tenant_id}"
+            *names: 树数据依赖的版本号名称
             
         Returns:
-            是否清除成功
+            ETag，Redis不可用时返回None
         """
-        redis = PermissionCache._get_redis()
+        versions = await TreeVersionCache.get_versions(*names)
+        if versions is None:
+            return None
+        return f'W/"{scope}:{"-".join(map(str, versions))}"'
+    
+    @staticmethod
+    async def bump(*names: str) -> bool:
+        """
+        递增版本号，使对应树接口的ETag失效
+        
+        Args:
+            *names: 版本号名称
+            
+        Returns:
+            是否递增成功
+        """
+        redis = TreeVersionCache._get_redis()
         if not redis:
             return False
         
         try:
-            cache_key = PermissionCache.CACHE_KEY_DATA_SCOPE.format(user_id=_to_id_string(user_id))
-            await redis.delete(cache_key)
+            async with redis.pipeline(transaction=False) as pipe:
+                for name in names:
+                    pipe.incr(TreeVersionCache.CACHE_KEY_VERSION.format(name=name))
+                await pipe.execute()
             return True
         except Exception as e:
-            logger.warning(f"Failed to clear user data scope cache: {e}")
+            logger.warning(f"Failed to bump tree versions: {e}")
         
         return False
     
     @staticmethod
-    async def clear_all_user_cache(user_id: Union[int, str]) -> bool:
+    def bump_after_commit(db: AsyncSession, *names: str) -> None:
         """
-        清除用户所有权限相关缓存
+        在会话事务提交后递增版本号
+        
+        提交前递增时，并发的GET可能用旧数据构建树并以新ETag缓存，
+        客户端会一直收到304。回滚时不递增。
         
         Args:
-            user_id: 用户ID
+            db: 数据库会话
+            *names: 版本号名称
+        """
+        db.info.setdefault(_PENDING_BUMPS_KEY, set()).update(names)
+    
+    @staticmethod
+    async def get_tree(etag: str) -> Optional[str]:
+        """
+        获取已序列化的树数据（JSON）
+        
+        Args:
+            etag: 树数据的ETag（含作用域和版本号）
             
         Returns:
-            是否清除成功
+            树数据JSON，不存在时返回None
         """
-        redis = PermissionCache._get_redis()
+        redis = TreeVersionCache._get_redis()
         if not redis:
-            return False
+            return None
         
         try:
-            permissions_key = PermissionCache.CACHE_KEY_PERMISSIONS.format(user_id=_to_id_string(user_id))
-            roles_key = PermissionCache.CACHE_KEY_ROLES.format(user_id=_to_id_string(user_id))
-            data_scope_key = PermissionCache.CACHE_KEY_DATA_SCOPE.format(user_id=_to_id_string(user_id))
+            return await redis.get(TreeVersionCache.CACHE_KEY_TREE.format(etag=etag))
+        except Exception as e:
+            logger.warning(f"Failed to get tree cache: {e}")
+        
+        return None
+    
+    @staticmethod
+    async def set_tree(etag: str, data: bytes) -> bool:
+        """
+        缓存已序列化的树数据（JSON）
+        
+        Args:
+            etag: 树数据的ETag（含作用域和版本号）
+            data: 树数据JSON
             
-            await redis.delete(permissions_key, roles_key, data_scope_key)
+        Returns:
+            是否缓存成功
+        """
+        redis = TreeVersionCache._get_redis()
+        if not redis:
+            return False
+        
+        try:
+            await redis.set(
+                TreeVersionCache.CACHE_KEY_TREE.format(etag=etag),
+                data,
+                ex=TreeVersionCache.TREE_EXPIRE_SECONDS
+            )
             return True
         except Exception as e:
-            logger.warning(f"Failed to clear all user permission cache: {e}")
+            logger.warning(f"Failed to set tree cache: {e}")
         
         return False
 
+
+
+# 会话中待提交后递增的版本号名称（Session.info 键）
+_PENDING_BUMPS_KEY = "tree_version_bumps"
+# 提交后递增版本号的任务（保留引用直到完成）
+_bump_tasks: Set[asyncio.Task] = set()
+
+
+@event.listens_for(Session, "after_commit")
+def _bump_tree_versions_after_commit(session: Session) -> None:
+    """事务提交后递增 bump_after_commit 登记的版本号"""
+    names = session.info.pop(_PENDING_BUMPS_KEY, None)
+    if not names:
+        return
+    task = asyncio.get_running_loop().create_task(TreeVersionCache.bump(*names))
+    _bump_tasks.add(task)
+    task.add_done_callback(_bump_tasks.discard)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_tree_version_bumps(session: Session) -> None:
+    """事务回滚后丢弃登记的版本号"""
+    session.info.pop(_PENDING_BUMPS_KEY, None)
@@ -3,6 +3,8 @@ IP utility functions.
 """
 from fastapi import Request
 
+_LOCAL_IPS = frozenset({"127.0.0.1", "localhost", "::1"})
+
 
 class IPUtils:
     """IP utilities."""
@@ -20,19 +22,24 @@ class IPUtils:
         """
         if not request:
             return "127.0.0.1"
+        
+        # Header names are stored lowercased; passing them lowercased skips
+        # the per-lookup normalization
+        headers = request.headers
             
-        # Check X-Forwarded-For
-        x_forwarded_for = request.headers.get("X-Forwarded-For")
+        # Check X-Forwarded-For (client is the first entry; stop at the first comma)
+        x_forwarded_for = headers.get("x-forwarded-for")
         if x_forwarded_for:
-            return x_forwarded_for.split(",")[0].strip()
+            return x_forwarded_for.split(",", 1)[0].strip()
             
         # Check X-Real-IP
-        x_real_ip = request.headers.get("X-Real-IP")
+        x_real_ip = headers.get("x-real-ip")
         if x_real_ip:
             return x_real_ip
             
-        if request.client:
-            return request.client.host
+        client = request.client
+        if client:
+            return client.host
             
         return "127.0.0.1"
     
@@ -48,6 +55,6 @@ class IPUtils:
         Returns:
             Location string
         """
-        if ip in ["127.0.0.1", "localhost", "::1"]:
+        if ip in _LOCAL_IPS:
             return "内网IP"
         return "未知位置"
@@ -0,0 +1,76 @@
+"""
+Alembic migration helpers.
+
+Lives outside alembic/versions because Alembic treats every module there as a
+revision script.
+"""
+from typing import Dict, Iterable, Set, Tuple
+
+import sqlalchemy as sa
+from sqlalchemy.engine import Connection
+from sqlalchemy.engine.reflection import Inspector
+
+# One Inspector per connection, so a whole `alembic upgrade head` run shares
+# its reflection cache
+_inspectors: Dict[int, Inspector] = {}
+_columns: Dict[Tuple[int, str], Set[str]] = {}
+
+
+def get_inspector(connection: Connection) -> Inspector:
+    """Get the shared Inspector for a connection."""
+    inspector = _inspectors.get(id(connection))
+    if inspector is None:
+        inspector = sa.inspect(connection)
+        _inspectors[id(connection)] = inspector
+    return inspector
+
+
+def table_exists(connection: Connection, table_name: str) -> bool:
+    """Check whether a table exists."""
+    return get_inspector(connection).has_table(table_name)
+
+
+def get_columns_cached(connection: Connection, table_name: str) -> Set[str]:
+    """
+    Get the column names of a table, reflecting it at most once per connection.
+
+    Returns an empty set if the table does not exist.
+    """
+    key = (id(connection), table_name)
+    columns = _columns.get(key)
+    if columns is None:
+        if table_exists(connection, table_name):
+            columns = {col['name'] for col in get_inspector(connection).get_columns(table_name)}
+        else:
+            columns = set()
+        _columns[key] = columns
+    return columns
+
+
+def get_multi_columns_cached(connection: Connection, table_names: Iterable[str]) -> Dict[str, Set[str]]:
+    """
+    Get the column names of several tables with one bulk reflection query.
+
+    Tables that don't exist are left out of the result.
+    """
+    table_names = list(table_names)
+    missing = [name for name in table_names if (id(connection), name) not in _columns]
+    if missing:
+        reflected = get_inspector(connection).get_multi_columns(filter_names=missing)
+        for (_schema, table_name), cols in reflected.items():
+            _columns[(id(connection), table_name)] = {col['name'] for col in cols}
+        for name in missing:
+            _columns.setdefault((id(connection), name), set())
+    return {
+        name: _columns[(id(connection), name)]
+        for name in table_names
+        if _columns.get((id(connection), name))
+    }
+
+
+def invalidate_table(connection: Connection, table_name: str) -> None:
+    """Forget cached reflection data of a table after altering it."""
+    _columns.pop((id(connection), table_name), None)
+    inspector = _inspectors.get(id(connection))
+    if inspector is not None:
+        inspector.clear_cache()
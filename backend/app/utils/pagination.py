@@ -0,0 +1,140 @@
+"""
+Pagination helpers shared by list services.
+"""
+import asyncio
+import base64
+import binascii
+from datetime import datetime
+from typing import Any, List, Optional, Sequence, Tuple
+
+import orjson
+from sqlalchemy import DateTime, Select, func, select, tuple_
+from sqlalchemy.engine import Result
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.database import AsyncSessionLocal
+
+
+async def count_rows(db: AsyncSession, stmt: Select) -> int:
+    """Count the rows a (filtered) SELECT would return."""
+    count_stmt = select(func.count()).select_from(stmt.order_by(None).subquery())
+    result = await db.execute(count_stmt)
+    return result.scalar() or 0
+
+
+async def count_rows_detached(stmt: Select) -> int:
+    """
+    Count rows on a separate pooled session, so the COUNT can run alongside a
+    query on the request's session (one AsyncSession can't run two at once).
+    """
+    async with AsyncSessionLocal() as session:
+        return await count_rows(session, stmt)
+
+
+async def execute_page(
+    db: AsyncSession,
+    page_stmt: Select,
+    stmt: Select,
+    with_count: bool,
+) -> Tuple[Result, Optional[int]]:
+    """
+    Execute a page query, and the COUNT of the unpaginated statement
+    concurrently with it if with_count is set.
+    
+    Returns:
+        Tuple of (page result, total count or None)
+    """
+    if not with_count:
+        return await db.execute(page_stmt), None
+    return await asyncio.gather(db.execute(page_stmt), count_rows_detached(stmt))
+
+
+async def fetch_page(
+    db: AsyncSession,
+    stmt: Select,
+    page: int,
+    page_size: int,
+    include_total: bool = True,
+) -> Tuple[List[Any], Optional[int]]:
+    """
+    Fetch one OFFSET page of an ordered SELECT, counting only when needed.
+    
+    One extra row is fetched to tell whether more rows follow. On page 1 the
+    COUNT query is skipped when no more rows follow (the total is known from
+    the page itself); on later pages it runs concurrently with the page query.
+    
+    Args:
+        db: Database session
+        stmt: Filtered and ordered SELECT of one entity
+        page: Page number (1-based)
+        page_size: Page size
+        include_total: Run COUNT when the total can't be derived; if False,
+            total is None in that case
+        
+    Returns:
+        Tuple of (rows, total count or None)
+    """
+    offset = (page - 1) * page_size
+    # Past page 1 the total usually has to be counted: overlap the COUNT with
+    # the page query instead of running them back to back
+    result, total = await execute_page(
+        db, stmt.offset(offset).limit(page_size + 1), stmt, include_total and offset > 0
+    )
+    rows = list(result.scalars().all())
+    
+    has_more = len(rows) > page_size
+    del rows[page_size:]
+    
+    # Last page reached: rows before it plus this page. (An empty page past
+    # the end says nothing about the total.)
+    if total is None and not has_more and (rows or offset == 0):
+        total = offset + len(rows)
+    elif total is None and include_total:
+        total = await count_rows(db, stmt)
+    return rows, total
+
+
+def encode_cursor(row: Any, keys: Sequence[Any]) -> str:
+    """
+    Encode the keyset position of a row as an opaque URL-safe cursor.
+    
+    Args:
+        row: Last row (ORM object) of the current page
+        keys: Ordering columns, e.g. (Menu.sort, Menu.id)
+    """
+    values = [getattr(row, key.key) for key in keys]
+    return base64.urlsafe_b64encode(orjson.dumps(values)).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, keys: Sequence[Any]) -> List[Any]:
+    """
+    Decode a cursor produced by encode_cursor for the same keys.
+    
+    Raises:
+        ValueError: If the cursor is malformed
+    """
+    try:
+        values = orjson.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        if not isinstance(values, list) or len(values) != len(keys):
+            raise ValueError
+        return [
+            datetime.fromisoformat(value) if isinstance(key.type, DateTime) else value
+            for key, value in zip(keys, values)
+        ]
+    except (ValueError, TypeError, binascii.Error):
+        raise ValueError("Invalid cursor") from None
+
+
+def apply_keyset(stmt: Select, keys: Sequence[Any], cursor: Optional[str], descending: bool = False) -> Select:
+    """
+    Order a SELECT by its keyset columns and, given a cursor, start right
+    after that position: an index seek instead of an OFFSET scan.
+    
+    Raises:
+        ValueError: If the cursor is malformed
+    """
+    stmt = stmt.order_by(*(key.desc() if descending else key.asc() for key in keys))
+    if cursor:
+        position = tuple_(*decode_cursor(cursor, keys))
+        stmt = stmt.where(tuple_(*keys) < position if descending else tuple_(*keys) > position)
+    return stmt
@@ -0,0 +1,201 @@
+"""
+Response helpers shared by API endpoints.
+"""
+import time
+from operator import attrgetter
+from typing import Any, AsyncIterable, AsyncIterator, Awaitable, Callable, Dict, Iterable, List, Optional, Sequence, Tuple, Type
+
+import orjson
+from fastapi import Request
+from fastapi.responses import Response
+from pydantic import BaseModel, TypeAdapter
+
+from app.utils.cache import TreeVersionCache
+
+_time = time.time
+
+# Clients may keep ETag'd responses but must revalidate them on every use
+ETAG_CACHE_CONTROL = "private, no-cache"
+
+# Serialized '{"code":...,"message":...,"data":' per (code, message)
+_envelope_prefixes: Dict[Tuple[int, str], bytes] = {}
+
+
+def timestamp() -> int:
+    """Current Unix timestamp (seconds) for response envelopes."""
+    return int(_time())
+
+
+def envelope(data: Any, message: str, code: int = 200) -> Dict[str, Any]:
+    """Standard response envelope, stamped with the current timestamp."""
+    return {"code": code, "message": message, "data": data, "timestamp": timestamp()}
+
+
+def envelope_bytes(data: Any, message: str, code: int = 200) -> bytes:
+    """
+    Serialize a standard response envelope around data.
+    
+    The code/message head is serialized once per (code, message) and only
+    data and the timestamp are encoded per call. message must come from a
+    finite set (translated messages), not from user input.
+    
+    Args:
+        data: JSON-ready payload (orjson types)
+        message: Response message
+        code: Business code
+        
+    Returns:
+        JSON bytes of {"code", "message", "data", "timestamp"}
+    """
+    return b"%b%b,\"timestamp\":%d}" % (
+        _envelope_prefix(code, message), orjson.dumps(data, option=orjson.OPT_NON_STR_KEYS), timestamp()
+    )
+
+
+def _envelope_prefix(code: int, message: str) -> bytes:
+    """Serialized envelope head up to the "data" value."""
+    prefix = _envelope_prefixes.get((code, message))
+    if prefix is None:
+        prefix = b'{"code":%d,"message":%b,"data":' % (code, orjson.dumps(message))
+        _envelope_prefixes[(code, message)] = prefix
+    return prefix
+
+
+def envelope_response(data: Any, message: str, code: int = 200) -> Response:
+    """JSON response with the standard envelope, see envelope_bytes."""
+    return Response(envelope_bytes(data, message, code), media_type="application/json")
+
+
+async def stream_envelope(
+    items: AsyncIterable[Any],
+    tail: Callable[[], Dict[str, Any]],
+    message: str,
+    code: int = 200,
+) -> AsyncIterator[bytes]:
+    """
+    Serialize a standard envelope around {"items": [...], **tail()} item by
+    item, for a StreamingResponse.
+    
+    Only one item is held in serialized form at a time. tail is called once
+    all items are consumed, so it can report totals gathered while streaming.
+    
+    Args:
+        items: JSON-ready items
+        tail: Returns the remaining data fields (total, next_cursor, ...)
+        message: Response message
+        code: Business code
+    """
+    yield _envelope_prefix(code, message) + b'{"items":['
+    separator = b""
+    async for item in items:
+        yield separator + orjson.dumps(item, option=orjson.OPT_NON_STR_KEYS)
+        separator = b","
+    rest = orjson.dumps(tail(), option=orjson.OPT_NON_STR_KEYS)
+    # rest is '{...}': splice its fields into the data object
+    yield b"]%b%b,\"timestamp\":%d}" % (b"," if len(rest) > 2 else b"", rest[1:], timestamp())
+
+
+def not_modified(request: Request, etag: Optional[str]) -> Optional[Response]:
+    """
+    Answer a conditional GET whose If-None-Match matches etag.
+    
+    Returns:
+        An empty 304 response, or None if the client's copy is missing or stale
+    """
+    if etag is None:
+        return None
+    header = request.headers.get("if-none-match")
+    if not header:
+        return None
+    if header.strip() != "*" and etag not in (tag.strip() for tag in header.split(",")):
+        return None
+    return Response(status_code=304, headers={"ETag": etag, "Cache-Control": ETAG_CACHE_CONTROL})
+
+
+def with_etag(response: Response, etag: Optional[str]) -> Response:
+    """Set the ETag (if any) and revalidation headers on a response."""
+    if etag is not None:
+        response.headers["ETag"] = etag
+        response.headers["Cache-Control"] = ETAG_CACHE_CONTROL
+    return response
+
+
+async def tree_response(
+    request: Request,
+    scope: str,
+    versions: Sequence[str],
+    build: Callable[[], Awaitable[List[BaseModel]]],
+    message: str,
+) -> Response:
+    """
+    Serve a tree endpoint through its version-based ETag and Redis cache.
+    
+    A matching If-None-Match gets a 304. Otherwise the serialized tree is
+    read from Redis, or built and stored there, keyed by the ETag, so it is
+    built at most once per scope between writes.
+    
+    Args:
+        request: Current request
+        scope: Cache scope, e.g. "menus:{tenant_id}"
+        versions: TreeVersionCache names the tree depends on
+        build: Builds the tree nodes on a cache miss
+        message: Response message
+    """
+    etag = await TreeVersionCache.etag(scope, *versions)
+    cached = not_modified(request, etag)
+    if cached is not None:
+        return cached
+    
+    data = await TreeVersionCache.get_tree(etag) if etag is not None else None
+    if data is None:
+        data = orjson.dumps([node.model_dump() for node in await build()])
+        if etag is not None:
+            await TreeVersionCache.set_tree(etag, data)
+    
+    return with_etag(envelope_response(orjson.Fragment(data), message), etag)
+
+
+def dump_list(adapter: TypeAdapter, rows: Iterable[Any]) -> List[Any]:
+    """
+    Validate rows (ORM objects or dicts) with a list TypeAdapter and dump them
+    to plain data in the same pass.
+
+    Datetimes are left as they are: orjson (ORJSONResponse, cached payloads)
+    encodes them natively, so they aren't turned into strings here.
+
+    Args:
+        adapter: TypeAdapter of List[ResponseSchema]
+        rows: Rows to serialize
+
+    Returns:
+        List of orjson-serializable dicts
+    """
+    return adapter.dump_python(adapter.validate_python(rows, from_attributes=True))
+
+
+def row_dumper(
+    schema: Type[BaseModel],
+    exclude: Iterable[str] = ()
+) -> Callable[[Iterable[Any]], List[Dict[str, Any]]]:
+    """
+    Build a function that reads the fields of a response schema off ORM rows
+    into plain dicts, skipping pydantic validation.
+    
+    Only for rows whose attributes already have the schema's JSON types (plain
+    columns, string IDs); ORJSONResponse serializes datetimes natively.
+    
+    Args:
+        schema: Response schema whose field names are read
+        exclude: Fields the caller fills in itself
+        
+    Returns:
+        Function turning rows into a list of dicts
+    """
+    excluded = frozenset(exclude)
+    fields = tuple(name for name in schema.model_fields if name not in excluded)
+    getter = attrgetter(*fields)
+    
+    def dump(rows: Iterable[Any]) -> List[Dict[str, Any]]:
+        return [dict(zip(fields, getter(row))) for row in rows]
+    
+    return dump
@@ -0,0 +1,87 @@
+"""
+Recursive CTE helpers for self-referencing (parent_id) tables.
+"""
+from typing import Any, Dict, Iterable, List, Tuple
+
+from sqlalchemy import Select, exists, func, or_, select
+from sqlalchemy.dialects.postgresql import array
+
+# parent_id values that mark a root node
+ROOT_PARENT_IDS: Tuple[str, ...] = ("", "0")
+
+
+def tree_select(
+    model: Any,
+    *criteria: Any,
+    order_by: Iterable[Any],
+    orphans_as_roots: bool = False,
+) -> Select:
+    """
+    Select the rows of a parent_id tree in depth-first order.
+
+    A recursive CTE walks the tree from its roots and orders the rows by
+    their path of sibling ranks, so every parent comes before its children
+    and siblings keep the given order. Rows not reachable from a root are
+    left out.
+
+    Args:
+        model: Mapped class with id and parent_id columns
+        *criteria: Filters applied to every node (tenant, is_deleted, ...)
+        order_by: Sibling order
+        orphans_as_roots: Also start from rows whose parent is filtered out
+
+    Returns:
+        Select of model ordered depth-first
+    """
+    # Rank once over the whole set; the ranks keep the sibling order
+    ranked = (
+        select(
+            model.id,
+            model.parent_id,
+            func.row_number().over(order_by=tuple(order_by)).label("rn"),
+        )
+        .where(*criteria)
+        .cte("ranked")
+    )
+
+    root_clauses = [ranked.c.parent_id.is_(None), ranked.c.parent_id.in_(ROOT_PARENT_IDS)]
+    if orphans_as_roots:
+        parent = ranked.alias("parent")
+        root_clauses.append(~exists().where(parent.c.id == ranked.c.parent_id))
+
+    tree = (
+        select(ranked.c.id, array([ranked.c.rn]).label("path"))
+        .where(or_(*root_clauses))
+        .cte("tree", recursive=True)
+    )
+    tree = tree.union_all(
+        select(ranked.c.id, func.array_append(tree.c.path, ranked.c.rn))
+        .join(tree, ranked.c.parent_id == tree.c.id)
+    )
+
+    return select(model).join(tree, model.id == tree.c.id).order_by(tree.c.path)
+
+
+def nest_nodes(nodes: Iterable[Any]) -> List[Any]:
+    """
+    Nest nodes in depth-first order (see tree_select) in a single pass.
+
+    Every parent precedes its children, so each node is appended to an
+    already seen parent; nodes whose parent isn't in the set become roots.
+
+    Args:
+        nodes: Tree nodes with id, parent_id and a children list, parents first
+
+    Returns:
+        Root nodes
+    """
+    by_id: Dict[Any, Any] = {}
+    roots = []
+    for node in nodes:
+        by_id[node.id] = node
+        parent = by_id.get(node.parent_id)
+        if parent is None:
+            roots.append(node)
+        else:
+            parent.children.append(node)
+    return roots
@@ -0,0 +1,101 @@
+"""
+Batched login/operation log writer tests.
+"""
+import asyncio
+import logging
+
+import pytest
+from sqlalchemy import event, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core import log as app_log
+from app.core.config import settings
+from app.models.log import LoginLog, OperationLog
+from app.services import log_service
+from app.services.log_service import LogService, flush_logs, run_log_writer
+from tests.conftest import TestSessionLocal, test_engine
+
+
+@pytest.fixture
+def log_writer_db(monkeypatch):
+    """Point the log writer at the test database and count its INSERT statements."""
+    monkeypatch.setattr(log_service, "AsyncSessionLocal", TestSessionLocal)
+    while not log_service._log_queue.empty():
+        log_service._log_queue.get_nowait()
+
+    inserts = []
+
+    def count_inserts(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("INSERT INTO"):
+            inserts.append(statement.split()[2])
+
+    event.listen(test_engine.sync_engine, "before_cursor_execute", count_inserts)
+    yield inserts
+    event.remove(test_engine.sync_engine, "before_cursor_execute", count_inserts)
+
+
+async def _queue_logs(count: int, tag: str) -> None:
+    """Queue count login and count operation log rows tagged with tag."""
+    for i in range(count):
+        await LogService.create_login_log(
+            username=f"{tag}{i}", status="1", ip="127.0.0.1", user_agent="Mozilla/5.0 Chrome"
+        )
+        await LogService.create_operation_log(
+            username=f"{tag}{i}", method="GET", url="/api/v1/users", ip="127.0.0.1",
+            user_agent="Mozilla/5.0 Chrome", status="1", duration="1"
+        )
+
+
+async def _count_logs(db: AsyncSession, tag: str) -> tuple:
+    """Number of login and operation log rows tagged with tag."""
+    login = await db.scalar(
+        select(func.count()).select_from(LoginLog).where(LoginLog.username.like(f"{tag}%"))
+    )
+    operation = await db.scalar(
+        select(func.count()).select_from(OperationLog).where(OperationLog.username.like(f"{tag}%"))
+    )
+    return login, operation
+
+
+class TestLogWriter:
+    """Test the queue-backed log writer."""
+
+    @pytest.mark.asyncio
+    async def test_flush_writes_one_batch_per_table(self, db_session: AsyncSession, log_writer_db):
+        """Queued rows are written with one INSERT per table."""
+        await _queue_logs(5, "batch_user")
+
+        await flush_logs()
+
+        assert log_service._log_queue.empty()
+        assert await _count_logs(db_session, "batch_user") == (5, 5)
+        assert sorted(log_writer_db) == [LoginLog.__tablename__, OperationLog.__tablename__]
+
+    @pytest.mark.asyncio
+    async def test_queued_rows_flushed_on_shutdown(self, db_session: AsyncSession, log_writer_db):
+        """Cancelling the writer (application shutdown) writes what is still queued."""
+        writer = asyncio.create_task(run_log_writer())
+        await asyncio.sleep(0)
+        await _queue_logs(3, "shutdown_user")
+
+        writer.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await writer
+
+        assert log_service._log_queue.empty()
+        assert await _count_logs(db_session, "shutdown_user") == (3, 3)
+
+
+class TestStopLogging:
+    """Test the application logger shutdown."""
+
+    def test_stop_logging_flushes_queued_records(self, monkeypatch, tmp_path):
+        """Records still queued for the listener thread are written by stop_logging."""
+        log_file = tmp_path / "app.log"
+        monkeypatch.setattr(settings, "LOG_FILE", str(log_file))
+
+        app_log.start_logging()
+        logging.getLogger("app.test").warning("queued before shutdown")
+        app_log.stop_logging()
+
+        assert "queued before shutdown" in log_file.read_text(encoding="utf-8")
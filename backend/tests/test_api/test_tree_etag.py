@@ -0,0 +1,41 @@
+"""
+Tree endpoint ETag / conditional GET tests.
+"""
+import pytest
+from httpx import AsyncClient
+
+from app.utils.cache import TreeVersionCache
+
+
+PERMISSION_TREE_URL = "/api/v1/roles/permissions/tree"
+
+
+class TestPermissionTreeETag:
+    """Test the version-based ETag of the permission tree."""
+
+    @pytest.mark.asyncio
+    async def test_matching_etag_gets_304(self, client: AsyncClient, admin_token: str):
+        """A repeated GET with If-None-Match gets an empty 304."""
+        headers = {"Authorization": f"Bearer {admin_token}"}
+        response = await client.get(PERMISSION_TREE_URL, headers=headers)
+        assert response.status_code == 200
+        etag = response.headers["etag"]
+
+        response = await client.get(PERMISSION_TREE_URL, headers={**headers, "If-None-Match": etag})
+        assert response.status_code == 304
+        assert response.content == b""
+        assert response.headers["etag"] == etag
+
+    @pytest.mark.asyncio
+    async def test_bump_changes_etag(self, client: AsyncClient, admin_token: str):
+        """After the permissions version is bumped the old ETag gets a full 200."""
+        headers = {"Authorization": f"Bearer {admin_token}"}
+        response = await client.get(PERMISSION_TREE_URL, headers=headers)
+        etag = response.headers["etag"]
+
+        assert await TreeVersionCache.bump(TreeVersionCache.PERMISSIONS)
+
+        response = await client.get(PERMISSION_TREE_URL, headers={**headers, "If-None-Match": etag})
+        assert response.status_code == 200
+        assert response.headers["etag"] != etag
+        assert response.json()["code"] == 200
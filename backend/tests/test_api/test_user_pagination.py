@@ -0,0 +1,84 @@
+"""
+User list keyset (cursor) pagination tests.
+"""
+from datetime import datetime
+
+import pytest
+from httpx import AsyncClient
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.user import User
+from app.core.security import get_password_hash
+
+
+class TestUserCursorPagination:
+    """Test paging through the user list with next_cursor."""
+
+    @pytest.mark.asyncio
+    async def test_cursor_pages_cover_all_users_once(
+        self, client: AsyncClient, db_session: AsyncSession, admin_token: str
+    ):
+        """Pages chained by next_cursor neither repeat nor skip users with equal created_at."""
+        # Same created_at for all: only the id tie-breaker orders them
+        created_at = datetime(2025, 1, 1, 12, 0, 0)
+        for i in range(7):
+            db_session.add(User(
+                username=f"cursor_user{i}",
+                password=get_password_hash("Test@123"),
+                tenant_id=0,
+                user_type=2,
+                status=1,
+                created_at=created_at,
+            ))
+        await db_session.commit()
+
+        result = await db_session.execute(select(User.id).where(User.tenant_id == 0))
+        expected_ids = set(result.scalars().all())
+
+        headers = {"Authorization": f"Bearer {admin_token}"}
+        seen_ids = []
+        params = {"page_size": 2}
+        while True:
+            response = await client.get("/api/v1/users", params=params, headers=headers)
+            assert response.status_code == 200
+            data = response.json()["data"]
+            assert len(data["items"]) <= 2
+            seen_ids.extend(item["id"] for item in data["items"])
+
+            if not data["has_more"]:
+                assert data["next_cursor"] is None
+                break
+            params = {"page_size": 2, "cursor": data["next_cursor"]}
+
+        assert len(seen_ids) == len(set(seen_ids))
+        assert set(seen_ids) == expected_ids
+
+    @pytest.mark.asyncio
+    async def test_cursor_page_has_no_total(self, client: AsyncClient, admin_token: str, test_user: User):
+        """A cursor page skips the COUNT query."""
+        headers = {"Authorization": f"Bearer {admin_token}"}
+        response = await client.get("/api/v1/users", params={"page_size": 1}, headers=headers)
+        next_cursor = response.json()["data"]["next_cursor"]
+        assert next_cursor is not None
+
+        response = await client.get(
+            "/api/v1/users", params={"page_size": 1, "cursor": next_cursor}, headers=headers
+        )
+        assert response.status_code == 200
+        assert response.json()["data"]["total"] is None
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("cursor", ["not-a-cursor", "WzFd", "bnVsbA"])
+    async def test_malformed_cursor(self, client: AsyncClient, admin_token: str, cursor: str):
+        """A malformed cursor gets the 400 envelope, not a 500."""
+        response = await client.get(
+            "/api/v1/users",
+            params={"cursor": cursor},
+            headers={"Authorization": f"Bearer {admin_token}"}
+        )
+
+        assert response.status_code != 500
+        data = response.json()
+        assert data["code"] == 400
+        assert data["data"] is None
@@ -62,7 +62,7 @@ class TestUserService:
         await db_session.commit()
         
         # Test pagination
-        users, total = await user_service.get_user_list(
+        users, total, next_cursor = await user_service.get_user_list(
             db_session,
             page=1,
             page_size=2,
@@ -70,6 +70,18 @@ class TestUserService:
         )
         assert total == 5
         assert len(users) == 2
+        assert next_cursor is not None
+        
+        # Without include_total the COUNT is skipped when the page doesn't settle it
+        users, total, _ = await user_service.get_user_list(
+            db_session,
+            page=1,
+            page_size=2,
+            tenant_id=1,
+            include_total=False
+        )
+        assert total is None
+        assert len(users) == 2
     
     @pytest.mark.asyncio
     async def test_create_user_with_roles(self, db_session: AsyncSession):
@@ -205,7 +217,7 @@ class TestPermissionCheck:
     @pytest.mark.asyncio
     async def test_get_user_permissions(self, db_session: AsyncSession):
         """Test get user permissions."""
-        from app.core.permissions import get_user_permissions
+        from app.core.permissions import get_user_access, get_user_permissions
         
         # Create user, role, and permissions
         user = User(
@@ -270,6 +282,11 @@ class TestPermissionCheck:
         assert "user:list" in permissions
         assert "user:create" in permissions
         assert len(permissions) == 2
+        
+        # Role codes come from the same access bundle
+        access = await get_user_access(db_session, user)
+        assert access.permissions == permissions
+        assert access.roles == {"test_role"}
 
 
 class TestUserAPI:
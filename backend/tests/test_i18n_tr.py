@@ -0,0 +1,64 @@
+"""
+Translation lookup tests.
+"""
+import contextvars
+
+from app.core.i18n import I18n, _flatten
+
+
+def _tr_in_locale(translator: I18n, locale: str, key: str) -> str:
+    """Translate key with locale set in a throwaway context (no leak into other tests)."""
+    def run() -> str:
+        translator.set_locale(locale)
+        return translator.tr(key)
+    return contextvars.copy_context().run(run)
+
+
+class TestFlatten:
+    """Test flattening of nested locale files."""
+
+    def test_nested_keys_become_dotted(self):
+        """Nested sections are flattened into dotted keys; non-text values are dropped."""
+        flat = _flatten({
+            "success": "ok",
+            "menu": {"invalid_parent": "bad parent", "deep": {"key": "deep text"}},
+            "count": 3,
+        })
+
+        assert flat == {
+            "success": "ok",
+            "menu.invalid_parent": "bad parent",
+            "menu.deep.key": "deep text",
+        }
+
+
+class TestTranslate:
+    """Test I18n.tr lookups and fallbacks."""
+
+    def test_nested_key(self):
+        """A nested key is found by its dotted name in the requested locale."""
+        translator = I18n()
+
+        assert _tr_in_locale(translator, "en", "menu.invalid_parent") == "Invalid parent menu"
+        assert _tr_in_locale(translator, "zh", "menu.invalid_parent") == "无效的父菜单"
+
+    def test_missing_key_falls_back_to_default_locale(self):
+        """A key missing in a non-default locale comes from the default locale."""
+        translator = I18n()
+        _tr_in_locale(translator, "en", "success")  # loads en
+        del translator._flat["en"]["menu.invalid_parent"]
+
+        assert _tr_in_locale(translator, "en", "menu.invalid_parent") == "无效的父菜单"
+
+    def test_missing_key_everywhere_returns_key(self):
+        """A key missing in every locale is returned as is."""
+        translator = I18n()
+
+        assert _tr_in_locale(translator, "en", "no.such.key") == "no.such.key"
+        assert _tr_in_locale(translator, "zh", "no.such.key") == "no.such.key"
+
+    def test_unsupported_locale_uses_default(self):
+        """An unsupported locale is served from the default locale."""
+        translator = I18n()
+
+        assert _tr_in_locale(translator, "fr", "menu.invalid_parent") == "无效的父菜单"
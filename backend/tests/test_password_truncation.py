@@ -0,0 +1,92 @@
+"""
+bcrypt 72-byte password truncation tests.
+"""
+import bcrypt
+import pytest
+
+from app.core.security import _truncate_password, get_password_hash, verify_password
+
+
+def _truncate_password_by_retry(password: str) -> str:
+    """Previous implementation: cut at 72 bytes, then drop bytes until it decodes."""
+    password_bytes = password.encode('utf-8')
+    if len(password_bytes) <= 72:
+        return password
+    password_bytes = password_bytes[:72]
+    while len(password_bytes) > 0:
+        try:
+            return password_bytes.decode('utf-8')
+        except UnicodeDecodeError:
+            password_bytes = password_bytes[:-1]
+    return ""
+
+
+# Passwords whose 72nd byte falls inside a multibyte character
+# (e.g. 71 ASCII bytes and then a 2-, 3- or 4-byte character), and ones whose
+# 72nd byte ends a character
+SPLIT_PASSWORDS = [
+    "a" * 71 + "é" + "tail",
+    "a" * 71 + "密" + "tail",
+    "a" * 70 + "密码",
+    "a" * 71 + "😀" + "tail",
+    "a" + "密" * 30,
+    "a" + "😀" * 25,
+]
+BOUNDARY_PASSWORDS = [
+    "a" * 72 + "tail",
+    "密" * 30,
+    "😀" * 25,
+]
+
+
+class TestTruncatePassword:
+    """Test _truncate_password."""
+
+    @pytest.mark.parametrize("password", SPLIT_PASSWORDS + BOUNDARY_PASSWORDS)
+    def test_same_as_previous_implementation(self, password: str):
+        """The single decode gives the same prefix as the retry loop."""
+        truncated = _truncate_password(password)
+
+        assert truncated == _truncate_password_by_retry(password)
+        assert len(truncated.encode('utf-8')) <= 72
+        assert password.startswith(truncated)
+
+    @pytest.mark.parametrize("password", SPLIT_PASSWORDS)
+    def test_split_character_is_dropped(self, password: str):
+        """A character cut at the 72nd byte is dropped whole."""
+        truncated = _truncate_password(password)
+
+        assert len(truncated.encode('utf-8')) < 72
+        assert len(password[:len(truncated) + 1].encode('utf-8')) > 72
+
+    @pytest.mark.parametrize("password", [
+        "",
+        "Short@123",
+        "a" * 18,
+        "密" * 18,
+        "😀" * 18,
+    ])
+    def test_short_password_is_returned_unchanged(self, password: str):
+        """Passwords of 18 characters or fewer are returned as is."""
+        assert _truncate_password(password) is password
+
+
+class TestTruncatedHashing:
+    """Test hashing and verifying passwords longer than 72 bytes."""
+
+    @pytest.mark.parametrize("password", SPLIT_PASSWORDS)
+    def test_hash_and_verify(self, password: str):
+        """A password split inside a character hashes and verifies."""
+        hashed = get_password_hash(password)
+
+        assert verify_password(password, hashed)
+        assert verify_password(_truncate_password(password), hashed)
+        assert not verify_password("b" + password[1:], hashed)
+
+    @pytest.mark.parametrize("password", SPLIT_PASSWORDS)
+    def test_verifies_hash_made_before(self, password: str):
+        """Hashes stored with the previous truncation still verify."""
+        previous = _truncate_password_by_retry(password).encode('utf-8')
+        hashed = bcrypt.hashpw(previous, bcrypt.gensalt()).decode('utf-8')
+
+        assert verify_password(password, hashed)